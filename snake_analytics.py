@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Snake Game Replay Analytics
+Re-simulates recorded games headlessly and reports where snakes died, how
+long food waited to be eaten, how often bonus food was picked up and how
+close snakes came to bombs
+Usage: python snake_analytics.py DIR [DIR ...] [--output FILE] [--summary FILE] [--workers N]
+
+Recordings are found, read and analyzed one chunk at a time, each game's
+line is written as soon as it is done and the totals are kept as running
+counts, so memory stays flat however many recordings there are.
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import snake_replay
+from snake_engine import SnakeEngine, CELL_BOMB
+
+BONUS_BUCKET = 10  # Bonus food lifetimes are grouped in runs of this many ticks
+HOTSPOTS = 5  # Deadliest cells listed per board
+
+
+# --- Games ----------------------------------------------------------------
+
+def find_recordings(paths):
+    """Yield the replay files among paths, walking directories as it goes
+    rather than listing them up front. Links to directories inside them are
+    not followed, so a link back up the tree cannot make the walk loop."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        directories = [path]
+        while directories:
+            with os.scandir(directories.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                    elif entry.name.endswith('.snkr'):
+                        yield entry.path
+
+
+def analyze(recording, name=None):
+    """Re-simulate a recording and return what happened in it as a dict.
+
+    The game is played a move at a time and compared before and after
+    each move: food that moved away from under the new head was eaten,
+    bonus food that changed was picked up or timed out, and a head next
+    to a bomb after a move it survived is a near miss.
+    """
+    engine = SnakeEngine(recording.height, recording.width, recording.seed)
+    playback = snake_replay.Playback(recording, engine)
+    food_since = 0  # Tick the current food appeared
+    latencies = []  # Ticks each eaten food waited
+    bonuses = []  # [duration given, countdowns left when picked up or None] per bonus food
+    lifetime = None
+    near_misses = 0
+    death_cell = None
+    while not playback.finished:
+        food, bonus, left = engine.food, engine.bonus_food, engine.bonus_food_timer
+        playback.advance_to(engine.tick + 1)
+        head = engine.snake[0]
+        if engine.death:
+            # The move was refused, so the snake still lies where it was
+            death_cell = [head[0] + engine.direction[0], head[1] + engine.direction[1]]
+            break
+        if engine.food != food:
+            if head == food:
+                latencies.append(engine.tick - food_since)
+            food_since = engine.tick
+        if engine.bonus_food != bonus:
+            if bonus is not None:
+                bonuses.append([lifetime, left if head == bonus else None])
+            if engine.bonus_food is not None:
+                # The duration it was given; the move that placed it has
+                # already counted down once
+                lifetime = engine.bonus_food_timer + 1
+        if engine.bombs:
+            # The head never touches the wall, so its neighbours are on the board
+            grid, index, width = engine.grid, head[0] * engine.width + head[1], engine.width
+            if (grid[index - 1] | grid[index + 1] | grid[index - width] |
+                    grid[index + width]) & CELL_BOMB:
+                near_misses += 1
+    if engine.bonus_food is not None:
+        # Still on the board when the game ended, so never picked up
+        bonuses.append([lifetime, None])
+    return {'file': name, 'seed': recording.seed,
+            'board': f"{engine.height}x{engine.width}",
+            'score': engine.score, 'length': len(engine.snake), 'ticks': engine.tick,
+            'matches': engine.score == recording.score,  # False if the rules changed since
+            'death': engine.death, 'death_cell': death_cell, 'won': engine.won,
+            'food_latency': latencies, 'bonuses': bonuses, 'near_misses': near_misses}
+
+
+def analyze_file(path):
+    """Analyze one replay file; a file that cannot be read gives an error line"""
+    try:
+        recording = snake_replay.load(path)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        return {'file': path, 'error': str(e) or type(e).__name__}
+    return analyze(recording, path)
+
+
+def analyze_chunk(paths):
+    """Worker entry point: analyze a run of files and return their results"""
+    return [analyze_file(path) for path in paths]
+
+
+def chunked(items, size):
+    """Yield lists of up to size items, taking them from items as needed"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze_all(paths, workers=None, chunk=50):
+    """Yield the results of the replay files from an iterable of paths, in order.
+
+    With more than one worker, chunks of paths go to a process pool, at
+    most two per worker in flight; the next chunk is only taken from
+    paths once the oldest has been handed on, so neither the paths nor
+    the results pile up.
+    """
+    workers = workers or os.cpu_count()
+    chunks = chunked(paths, chunk)
+    if workers == 1:
+        for unit in chunks:
+            yield from analyze_chunk(unit)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for unit in chunks:
+            pending.append(pool.submit(analyze_chunk, unit))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# --- Totals ---------------------------------------------------------------
+
+def percentile(counts, fraction):
+    """The value below which a fraction of a Counter's total falls"""
+    total = sum(counts.values())
+    if not total:
+        return None
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= fraction * total:
+            return value
+
+
+class Summary:
+    """Running totals over game results, sized by the boards and timings
+    seen rather than by the number of games"""
+    def __init__(self):
+        self.games = 0
+        self.errors = 0
+        self.mismatches = 0  # Games whose score differs from the recorded one
+        self.score = 0
+        self.ticks = 0
+        self.deaths = Counter()  # Cause -> games; None for wins and games cut short
+        self.heatmaps = defaultdict(Counter)  # Board -> (y, x) -> deaths
+        self.food_latency = Counter()  # Ticks waited -> foods eaten
+        self.bonus = defaultdict(lambda: [0, 0])  # Lifetime bucket -> [spawned, picked up]
+        self.bonus_left = Counter()  # Countdowns left at pickup -> bonus foods
+        self.near_misses = 0
+
+    def add(self, result):
+        if 'error' in result:
+            self.errors += 1
+            return
+        self.games += 1
+        self.mismatches += not result['matches']
+        self.score += result['score']
+        self.ticks += result['ticks']
+        self.deaths[result['death']] += 1
+        if result['death_cell']:
+            self.heatmaps[result['board']][tuple(result['death_cell'])] += 1
+        self.food_latency.update(result['food_latency'])
+        for lifetime, left in result['bonuses']:
+            counts = self.bonus[lifetime // BONUS_BUCKET * BONUS_BUCKET]
+            counts[0] += 1
+            if left is not None:
+                counts[1] += 1
+                self.bonus_left[left] += 1
+        self.near_misses += result['near_misses']
+
+    def to_dict(self):
+        games = max(1, self.games)
+        return {
+            'games': self.games,
+            'errors': self.errors,
+            'mismatches': self.mismatches,
+            'mean_score': self.score / games,
+            'mean_ticks': self.ticks / games,
+            'deaths': {str(cause): count for cause, count in self.deaths.items()},
+            # Sparse, deadliest cell first: [y, x, deaths]
+            'death_heatmaps': {board: [[y, x, count] for (y, x), count in cells.most_common()]
+                               for board, cells in self.heatmaps.items()},
+            'food_latency': {
+                'eaten': sum(self.food_latency.values()),
+                'mean': (sum(ticks * count for ticks, count in self.food_latency.items()) /
+                         max(1, sum(self.food_latency.values()))),
+                'p50': percentile(self.food_latency, 0.5),
+                'p90': percentile(self.food_latency, 0.9),
+                'p99': percentile(self.food_latency, 0.99),
+                'histogram': dict(sorted(self.food_latency.items())),
+            },
+            # Pickup rate by how long the bonus food was due to stay
+            'bonus_pickup': [{'lifetime': f"{bucket}-{bucket + BONUS_BUCKET - 1}",
+                              'spawned': spawned, 'picked': picked, 'rate': picked / spawned}
+                             for bucket, (spawned, picked) in sorted(self.bonus.items())],
+            'bonus_left_at_pickup': dict(sorted(self.bonus_left.items())),
+            'near_misses': self.near_misses,
+            'near_misses_per_1000_ticks': 1000 * self.near_misses / max(1, self.ticks),
+        }
+
+
+def report(summary):
+    """Print the totals as a short table"""
+    totals = summary.to_dict()
+    latency = totals['food_latency']
+    print(f"{totals['games']} games, {totals['errors']} unreadable, "
+          f"{totals['mismatches']} not matching their recorded score")
+    print(f"mean score {totals['mean_score']:.1f} over {totals['mean_ticks']:.0f} moves; "
+          "deaths " + ", ".join(f"{cause} {count}" for cause, count in
+                                sorted(totals['deaths'].items())))
+    if latency['eaten']:
+        print(f"food eaten after {latency['mean']:.1f} moves on average "
+              f"(p50 {latency['p50']}, p90 {latency['p90']}, p99 {latency['p99']})")
+    for row in totals['bonus_pickup']:
+        print(f"bonus food lasting {row['lifetime']:>7} moves: "
+              f"{row['picked']:6}/{row['spawned']:<6} picked up ({row['rate']:.0%})")
+    print(f"{totals['near_misses']} bomb near misses "
+          f"({totals['near_misses_per_1000_ticks']:.2f} per 1000 moves)")
+    for board, cells in totals['death_heatmaps'].items():
+        print(f"deadliest cells on {board}: " +
+              ", ".join(f"({y},{x}) {count}" for y, x, count in cells[:HOTSPOTS]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze recorded snake games")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help="replay files, or directories searched for *.snkr files")
+    parser.add_argument('--output', default='analytics.jsonl',
+                        help="JSON lines file with one line per game ('' to skip)")
+    parser.add_argument('--summary', metavar='FILE', help="also write the totals as JSON")
+    parser.add_argument('--workers', type=int, help="processes to use (default: one per core)")
+    parser.add_argument('--chunk', type=int, default=50, help="recordings per work unit")
+    args = parser.parse_args()
+
+    summary = Summary()
+    start = time.perf_counter()
+    out = open(args.output, 'w') if args.output else None
+    try:
+        for done, result in enumerate(analyze_all(find_recordings(args.paths),
+                                                  args.workers, args.chunk), 1):
+            summary.add(result)
+            if out:
+                out.write(json.dumps(result) + '\n')
+            if done % 1000 == 0:
+                rate = done / (time.perf_counter() - start)
+                print(f"\r{done} games, {rate:.0f} games/s", end='', file=sys.stderr)
+    finally:
+        if out:
+            out.close()
+    print(f"\r{summary.games + summary.errors} recordings analyzed in "
+          f"{time.perf_counter() - start:.1f}s", file=sys.stderr)
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary.to_dict(), f)
+    report(summary)
+
+
+if __name__ == "__main__":
+    main()
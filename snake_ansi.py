@@ -0,0 +1,301 @@
+"""
+Snake Game ANSI Output
+A stand-in for curses output that keeps front and back cell buffers and
+sends each frame to the terminal as a single write of ANSI escape codes
+"""
+
+import curses
+import os
+import unicodedata
+from functools import lru_cache
+
+DEFAULT_PAIR = (curses.COLOR_WHITE, curses.COLOR_BLACK)  # Pair 0 once colors are started
+WIDE = ''  # Cell covered by the right half of a two-column glyph
+BLANK = (' ', 0)
+MAX_GAP = 4  # Unchanged cells reprinted rather than moving the cursor past them
+BUDGET_BURST = 4  # Frames of unused byte budget that can be saved up for panels
+
+
+@lru_cache(maxsize=None)
+def char_width(ch):
+    """Columns a character takes up on the terminal"""
+    return 2 if unicodedata.east_asian_width(ch) in 'WF' else 1
+
+
+class AnsiWindow:
+    """The part of the curses window API the renderer and panels use.
+
+    Writes land in the window's own cells; noutrefresh() copies the cells
+    touched since the last copy onto the screen's back buffer, so windows
+    stack in the order they are refreshed, as with curses.
+    """
+    def __init__(self, screen, height, width, y=0, x=0, deferrable=False):
+        self.screen = screen
+        self.height = height
+        self.width = width
+        self.y = y
+        self.x = x
+        self.deferrable = deferrable  # May lag behind when a frame is over budget
+        self.cells = [BLANK] * (height * width)
+        self.touched = set()  # Cell indices written since the last noutrefresh
+        self.touched_all = True  # Every cell needs copying
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def put(self, index, ch, attr):
+        cells, width = self.cells, self.width
+        # Writing over half of a wide glyph blanks the other half, as curses does
+        if cells[index][0] == WIDE and index % width:
+            cells[index - 1] = BLANK
+            self.touched.add(index - 1)
+        elif index + 1 < len(cells) and cells[index + 1][0] == WIDE and (index + 1) % width:
+            cells[index + 1] = BLANK
+            self.touched.add(index + 1)
+        cells[index] = (ch, attr)
+        self.touched.add(index)
+        if char_width(ch) == 2 and (index + 1) % width:
+            cells[index + 1] = (WIDE, attr)
+            self.touched.add(index + 1)
+
+    def addch(self, y, x, ch, attr=0):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("addch() returned ERR")
+        self.put(y * self.width + x, ch if isinstance(ch, str) else chr(ch), attr)
+
+    def addstr(self, y, x, text, attr=0):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("addstr() returned ERR")
+        index = y * self.width + x
+        end = len(self.cells)
+        for ch in text:
+            if index >= end:
+                raise curses.error("addstr() returned ERR")
+            self.put(index, ch, attr)
+            index += char_width(ch)
+
+    def erase(self):
+        self.cells = [BLANK] * (self.height * self.width)
+        self.touchwin()
+
+    def touchwin(self):
+        self.touched_all = True
+
+    def mvwin(self, y, x):
+        self.y, self.x = y, x
+        self.touchwin()
+
+    def noutrefresh(self):
+        self.screen.copy(self)
+        self.touched = set()
+        self.touched_all = False
+
+    def refresh(self):
+        self.noutrefresh()
+        self.screen.flush()
+
+
+class AnsiScreen:
+    """Front and back buffers of the whole terminal, flushed with one write.
+
+    The back buffer holds what the next frame should show and the front
+    buffer what the terminal shows now; `pending` tracks the cells where
+    they differ. flush() walks those cells in screen order, moves the
+    cursor only across gaps longer than MAX_GAP unchanged cells, sends an
+    attribute change only when the attribute differs from the last one
+    sent, and writes the result in one go.
+
+    With a `budget` in bytes per frame, the board (non-deferrable windows)
+    always goes out and panel rows follow only while they fit; the rest
+    stays pending and goes out in a later frame. Budget a frame leaves
+    unused is saved up, to BUDGET_BURST frames' worth, so panels catch up
+    while the board is quiet.
+
+    `pairs` maps curses color pair numbers to (foreground, background);
+    pair 0 is white on black, as with curses.
+    """
+    def __init__(self, rows, cols, pairs, fd=1, budget=None):
+        self.pairs = pairs
+        self.fd = fd
+        self.budget = budget
+        self.sgr_cache = {}
+        self.windows = []
+        self.stdscr = AnsiWindow(self, rows, cols)
+        self.resize(rows, cols)
+        # Metrics: totals since creation and the last frame
+        self.frames = 0
+        self.bytes = 0
+        self.writes = 0  # write() system calls
+        self.over_budget = 0  # Frames whose board changes alone were over budget
+        self.credit = 0  # Unused budget saved up from earlier frames
+        self.deferred = 0  # Panel cells held back by the last frame
+        self.last_bytes = 0
+        self.last_writes = 0
+        self.max_bytes = 0
+
+    def resize(self, rows, cols):
+        """Start over on a terminal of a new size: clear it and repaint everything"""
+        self.rows, self.cols = rows, cols
+        self.back = [BLANK] * (rows * cols)
+        self.front = [BLANK] * (rows * cols)
+        self.pending = {}  # Cell index -> True if only deferrable windows changed it
+        # The clear sent with the next frame leaves the cursor home in the default colors
+        self.prefix = self.sgr(0) + '\x1b[H\x1b[2J'
+        self.cursor = 0  # Cell index the terminal cursor is on, None if unknown
+        self.attr = 0  # Attribute last sent
+        self.stdscr.height, self.stdscr.width = rows, cols
+        self.stdscr.erase()
+        for window in self.windows:
+            window.touchwin()
+
+    def newwin(self, height, width, y, x):
+        """A side panel window; its updates can be deferred"""
+        window = AnsiWindow(self, height, width, y, x, deferrable=True)
+        self.windows.append(window)
+        return window
+
+    def copy(self, window):
+        """Copy a window's touched cells onto the back buffer"""
+        back, front, pending = self.back, self.front, self.pending
+        cells, width = window.cells, window.width
+        deferrable = window.deferrable
+        # Clip the window to the screen
+        rows = max(0, min(window.height, self.rows - window.y))
+        columns = max(0, min(width, self.cols - window.x))
+        if window.touched_all:
+            # Whole rows compare at C speed; only rows that differ are walked
+            touched = []
+            for row in range(rows):
+                start = (window.y + row) * self.cols + window.x
+                if back[start:start + columns] != cells[row * width:row * width + columns]:
+                    touched.extend(range(row * width, row * width + columns))
+        else:
+            touched = [index for index in window.touched
+                       if index // width < rows and index % width < columns]
+        offset = window.y * self.cols + window.x
+        for index in touched:
+            target = offset + index // width * self.cols + index % width
+            cell = cells[index]
+            back[target] = cell
+            if cell != front[target]:
+                # A cell the board changed stays urgent
+                pending[target] = pending.get(target, True) and deferrable
+            else:
+                pending.pop(target, None)
+
+    def sgr(self, attr):
+        """Escape sequence selecting a curses attribute"""
+        code = self.sgr_cache.get(attr)
+        if code is None:
+            params = '0'
+            if attr & curses.A_BOLD:
+                params += ';1'
+            foreground, background = self.pairs.get((attr & curses.A_COLOR) >> 8, DEFAULT_PAIR)
+            params += f';{30 + foreground};{40 + background}'
+            code = self.sgr_cache[attr] = f'\x1b[{params}m'
+        return code
+
+    def encode(self, indices, cursor, attr):
+        """Return (text, cursor, attr, cells) drawing the cells at the
+        sorted indices, starting from the given cursor and attribute"""
+        back, front, cols = self.back, self.front, self.cols
+        size = len(back)
+        parts = []
+        done = set()
+        for index in indices:
+            ch, cell_attr = back[index]
+            if ch == WIDE:
+                if index - 1 in done or back[index - 1][0] == WIDE:
+                    done.add(index)
+                    continue
+                index -= 1  # Print the whole glyph again
+                ch, cell_attr = back[index]
+            if cursor is not None and cursor != index:
+                gap = index - cursor
+                # Reprinting a few unchanged cells is shorter than a cursor move
+                if (0 < gap <= MAX_GAP and cursor // cols == index // cols and
+                        all(back[i] == front[i] and back[i][1] == attr and
+                            char_width(back[i][0]) == 1 for i in range(cursor, index))):
+                    parts.append(''.join(back[i][0] for i in range(cursor, index)))
+                    cursor = index
+            if cursor != index:
+                parts.append(f'\x1b[{index // cols + 1};{index % cols + 1}H')
+            if cell_attr != attr:
+                parts.append(self.sgr(cell_attr))
+                attr = cell_attr
+            parts.append(ch)
+            done.add(index)
+            cursor = index + 1
+            if index + 1 < size and back[index + 1][0] == WIDE:
+                done.add(index + 1)
+                cursor += 1
+            if cursor % cols == 0:
+                cursor = None  # The terminal may wrap or not; move explicitly
+        return ''.join(parts), cursor, attr, done
+
+    def flush(self):
+        """Send the changes since the last flush to the terminal in one write"""
+        pending, cols = self.pending, self.cols
+        urgent = sorted(index for index, deferrable in pending.items() if not deferrable)
+        text, cursor, attr, done = self.encode(urgent, self.cursor, self.attr)
+        out = bytearray((self.prefix + text).encode())
+        self.prefix = ''
+        self.commit(done)
+
+        # Panel rows go out whole, in screen order, while they fit in this
+        # frame's budget plus what earlier frames left unused
+        allowance = None if self.budget is None else self.budget + self.credit
+        deferred = sorted(pending)
+        self.deferred = 0
+        start = 0
+        while start < len(deferred):
+            row = deferred[start] // cols
+            end = start
+            while end < len(deferred) and deferred[end] // cols == row:
+                end += 1
+            text, new_cursor, new_attr, done = self.encode(deferred[start:end], cursor, attr)
+            chunk = text.encode()
+            # With the savings full, a row goes out even if it is too long to ever fit
+            if (allowance is not None and len(out) + len(chunk) > allowance and
+                    not (start == 0 and self.credit == self.budget * BUDGET_BURST)):
+                self.deferred = len(deferred) - start
+                break
+            out += chunk
+            cursor, attr = new_cursor, new_attr
+            self.commit(done)
+            start = end
+        self.cursor, self.attr = cursor, attr
+        if allowance is not None:
+            if len(out) > allowance and start == 0:
+                self.over_budget += 1  # The board alone did not fit
+            self.credit = max(0, min(allowance - len(out), self.budget * BUDGET_BURST))
+
+        writes = 0
+        if out:
+            view = memoryview(out)
+            while view:
+                view = view[os.write(self.fd, view):]
+                writes += 1
+        self.frames += 1
+        self.bytes += len(out)
+        self.writes += writes
+        self.last_bytes, self.last_writes = len(out), writes
+        self.max_bytes = max(self.max_bytes, len(out))
+
+    def commit(self, indices):
+        """Record cells as shown on the terminal"""
+        back, front, pending = self.back, self.front, self.pending
+        for index in indices:
+            front[index] = back[index]
+            pending.pop(index, None)
+
+    def metrics(self):
+        """Bytes and write calls per frame so far"""
+        frames = max(1, self.frames)
+        return {
+            'frames': self.frames,
+            'bytes_per_frame': self.bytes / frames,
+            'writes_per_frame': self.writes / frames,
+            'max_frame_bytes': self.max_bytes,
+            'over_budget_frames': self.over_budget,
+        }
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Snake Game Arena
+Dozens to hundreds of snakes, bots or local players, on one board sharing
+the food, bombs and bonus food
+Usage: python snake_arena.py [--snakes N] [--players 0-2] [--board HxW] [--seed S]
+       python snake_arena.py --headless --snakes 500 --board 200x400 --ticks 1000
+Keys: arrows steer player 1, WASD player 2, space pause, q quit
+"""
+
+import argparse
+import random
+import time
+from array import array
+from itertools import islice
+
+from snake_engine import (Board, FreeCells, RingBody, TimerWheel, TurnQueue, DIRECTIONS, CELL_SNAKE,
+                          CELL_FOOD, CELL_BONUS, CELL_BOMB, DEATH_WALL, DEATH_SELF, DEATH_BOMB)
+
+# Deaths only possible with other snakes around
+DEATH_SNAKE = 'snake'  # Ran into another snake's body
+DEATH_HEAD = 'head'  # Reached the same cell as another head on the same tick
+
+# Values in Arena.owner besides snake ids
+FREE = -1
+WALL = -2
+
+
+class ArenaSnake:
+    """One snake in an arena; `step` is its direction as a packed index offset"""
+    __slots__ = ('id', 'body', 'direction', 'step', 'alive', 'score', 'death', 'ticks')
+
+    def __init__(self, id, width, index, direction):
+        self.id = id
+        self.body = RingBody(width)
+        self.body.push_head_index(index)
+        self.direction = direction
+        self.step = direction[0] * width + direction[1]
+        self.alive = True
+        self.score = 0
+        self.death = None  # DEATH_* cause once it has crashed
+        self.ticks = 0  # Moves survived
+
+    def __len__(self):
+        return len(self.body)
+
+
+class Arena(Board):
+    """A board shared by many snakes that all move on the same tick.
+
+    `owner` is the board's spatial hash: one int per cell holding the id of
+    the snake whose body covers it, FREE, or WALL around the edge. A head's
+    collision check is a single lookup however many snakes there are, so a
+    tick costs O(snakes) rather than O(snakes x length).
+
+    Every head is checked against the board as it stood before the tick,
+    so the outcome does not depend on the order snakes are processed in:
+    entering any body cell (a tail that is about to move included, as in
+    SnakeEngine) is a crash, and heads that reach the same free cell all
+    die. Random draws happen in snake id order, so an arena is fully
+    determined by its seed and the actions given to it.
+
+    Cells are packed indices throughout, bombs and bonus food included;
+    Board keeps them and the items' rules the same as in a single game.
+    """
+    def __init__(self, height, width, snakes, seed=None, food=None):
+        self.height = height
+        self.width = width
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.tick = 0
+        self.grid = bytearray(height * width)  # CELL_* flags, as in SnakeEngine
+        self.free = FreeCells(height, width)
+        self.owner = array('i', [FREE]) * (height * width)
+        self.owner[:width] = self.owner[-width:] = array('i', [WALL]) * width
+        for y in range(1, height - 1):
+            self.owner[y * width] = self.owner[y * width + width - 1] = WALL
+        self.dirty = None  # Set of changed cell indices, when a front end tracks them
+        self.game_over = False
+        self.paused = False
+        self.speed = 0.1  # seconds between moves
+
+        # Shared items; there are more bombs and food to go round the more
+        # snakes there are
+        self.food = {}  # Food positions as packed indices (an ordered set)
+        self.food_count = max(1, snakes // 4) if food is None else food
+        self.timers = TimerWheel()
+        self.bombs = {}  # Packed bomb indices in the order they were placed
+        self.max_bombs = max(Board.max_bombs, snakes // 10)
+        self.bonus_food = None  # Packed index of the bonus food
+
+        # Snakes start one cell long on random cells, heading for the
+        # far side of the board
+        self.snakes = []
+        self.live = []  # Snakes still playing, in id order
+        for _ in range(snakes):
+            index = self.free.sample(self.rng)
+            if index is None:
+                raise ValueError(f"no room for {snakes} snakes on a {height}x{width} board")
+            self.add_snake([index], DIRECTIONS[1] if index % width < width // 2 else DIRECTIONS[3])
+        self.refill_food()
+
+    def add_snake(self, cells, direction):
+        """Put a snake on free cells (packed indices, head first) and return it"""
+        snake = ArenaSnake(len(self.snakes), self.width, cells[0], direction)
+        for index in cells[1:]:
+            snake.body.append(divmod(index, self.width))
+        for index in cells:
+            self.owner[index] = snake.id
+            self.occupy(index, CELL_SNAKE)
+        self.snakes.append(snake)
+        self.live.append(snake)
+        return snake
+
+    def cell_index(self, index):
+        return index
+
+    def random_free_cell(self):
+        """Return a random free cell index, or None if the board is full"""
+        return self.free.sample(self.rng)
+
+    def refill_food(self):
+        """Put down food until there are food_count pieces or the board is full"""
+        while len(self.food) < self.food_count:
+            index = self.free.sample(self.rng)
+            if index is None:
+                return
+            self.food[index] = None
+            self.occupy(index, CELL_FOOD)
+
+    def turn(self, id, action):
+        """Change a snake's direction unless it would reverse into itself"""
+        snake = self.snakes[id]
+        direction = DIRECTIONS[action]
+        if direction[0] + snake.direction[0] != 0 or direction[1] + snake.direction[1] != 0:
+            snake.direction = direction
+            snake.step = direction[0] * self.width + direction[1]
+
+    def step(self, actions=()):
+        """Apply actions (indexed by snake id; None keeps going) and move every
+        live snake once. Returns the number of snakes still alive."""
+        for id, action in enumerate(actions):
+            if action is not None:
+                self.turn(id, action)
+        self.move_snakes()
+        return len(self.live)
+
+    def move_snakes(self):
+        """Move every live snake one cell at the same time"""
+        if self.paused or self.game_over:
+            return
+        self.tick += 1
+        grid, owner = self.grid, self.owner
+
+        # Decide every head against the board before the tick
+        crashed = []  # (snake, cause)
+        moving = []  # (snake, target)
+        claims = {}  # target -> the first snake heading there
+        contested = set()
+        for snake in self.live:
+            target = snake.body.head_index() + snake.step
+            who = owner[target]
+            if who != FREE:
+                crashed.append((snake, DEATH_WALL if who == WALL else
+                                DEATH_SELF if who == snake.id else DEATH_SNAKE))
+            elif grid[target] & CELL_BOMB:
+                crashed.append((snake, DEATH_BOMB))
+            else:
+                if claims.setdefault(target, snake) is not snake:
+                    contested.add(target)
+                moving.append((snake, target))
+        if contested:
+            crashed += [(snake, DEATH_HEAD) for snake, target in moving if target in contested]
+            moving = [(snake, target) for snake, target in moving if target not in contested]
+
+        # Crashed snakes leave the board, then the rest move in id order
+        for snake, cause in crashed:
+            snake.alive = False
+            snake.death = cause
+            for index in snake.body.indices():
+                owner[index] = FREE
+                self.vacate(index, CELL_SNAKE)
+        if crashed:
+            self.live = [snake for snake in self.live if snake.alive]
+        for snake, target in moving:
+            body = snake.body
+            body.push_head_index(target)
+            owner[target] = snake.id
+            self.occupy(target, CELL_SNAKE)
+            snake.ticks += 1
+            flags = grid[target]
+            if flags & CELL_FOOD:
+                snake.score += 10
+                del self.food[target]
+                self.vacate(target, CELL_FOOD)
+            elif flags & CELL_BONUS:
+                snake.score += 50
+                self.set_bonus_food(None)
+            else:
+                tail = body.pop_tail_index()
+                owner[tail] = FREE
+                self.vacate(tail, CELL_SNAKE)
+        self.refill_food()
+        if not self.live:
+            self.game_over = True
+        self.update_items()
+
+
+class Bots:
+    """Cheap arena AI: each bot picks a piece of food and takes the safe move
+    that gets closest to it, avoiding cells another head could also reach
+    when it can. Deciding for every bot is O(snakes) too."""
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.targets = {}  # snake id -> food index it is heading for
+
+    def decide(self, arena, snake):
+        width, owner, grid = arena.width, arena.owner, arena.grid
+        target = self.targets.get(snake.id)
+        if target not in arena.food and arena.food:
+            target = next(islice(arena.food, self.rng.randrange(len(arena.food)), None))
+            self.targets[snake.id] = target
+        head = snake.body.head_index()
+        back = (-snake.direction[0], -snake.direction[1])
+        offsets = [dy * width + dx for dy, dx in DIRECTIONS]
+        best = best_distance = None
+        for action, (dy, dx) in enumerate(DIRECTIONS):
+            index = head + offsets[action]
+            if (dy, dx) == back or owner[index] != FREE or grid[index] & CELL_BOMB:
+                continue
+            distance = 0 if target is None else (abs(index // width - target // width) +
+                                                 abs(index % width - target % width))
+            for offset in offsets:
+                # Another head next to the cell could move there too
+                who = owner[index + offset] if 0 <= index + offset < len(owner) else FREE
+                if (who >= 0 and who != snake.id and
+                        arena.snakes[who].body.head_index() == index + offset):
+                    distance += arena.height + arena.width
+                    break
+            if best is None or distance < best_distance:
+                best, best_distance = action, distance
+        return best
+
+    def actions(self, arena, players=0):
+        """Return the actions for one tick, leaving the first `players` snakes alone"""
+        actions = [None] * len(arena.snakes)
+        for snake in arena.live:
+            if snake.id >= players:
+                actions[snake.id] = self.decide(arena, snake)
+        return actions
+
+
+PLAYER_KEYS = (
+    {'KEY_UP': 0, 'KEY_RIGHT': 1, 'KEY_DOWN': 2, 'KEY_LEFT': 3},
+    {'w': 0, 'd': 1, 's': 2, 'a': 3},
+)
+SNAKE_COLORS = (1, 4, 5, 6, 7)  # Curses color pairs from setup_screen, by snake id
+
+
+def play(stdscr, snakes, players, board, seed):
+    """Run an arena in the terminal with bots and up to two local players"""
+    import curses
+    from snake_game import setup_screen
+
+    setup_screen(stdscr)
+    rows, cols = stdscr.getmaxyx()
+    height, width = board or (rows - 2, cols - 1)
+    arena = Arena(height, width, snakes, seed)
+    bots = Bots(arena.seed)
+    arena.dirty = set(range(height * width))
+    turns = [TurnQueue() for _ in range(players)]  # Each player's keys, one turn per tick
+
+    def draw_cell(index):
+        y, x = divmod(index, width)
+        if y >= rows - 2 or x >= cols - 1:
+            return  # Off screen
+        flags = arena.grid[index]
+        who = arena.owner[index]
+        if who == WALL:
+            stdscr.addch(y, x, '#')
+        elif flags & CELL_BOMB:
+            stdscr.addch(y, x, 'X', curses.color_pair(2) | curses.A_BOLD)
+        elif flags & CELL_BONUS:
+            stdscr.addch(y, x, '◆', curses.color_pair(3) | curses.A_BOLD)
+        elif flags & CELL_FOOD:
+            stdscr.addch(y, x, '★', curses.color_pair(2))
+        elif who >= 0:
+            attr = curses.color_pair(SNAKE_COLORS[who % len(SNAKE_COLORS)])
+            if who < players:
+                attr |= curses.A_BOLD
+            head = arena.snakes[who].body.head_index() == index
+            stdscr.addch(y, x, '●' if head else '○', attr)
+        else:
+            stdscr.addch(y, x, ' ')
+
+    next_tick = time.monotonic()
+    while True:
+        for index in arena.dirty:
+            draw_cell(index)
+        arena.dirty.clear()
+        # Heads drawn last tick are body segments now
+        for snake in arena.live:
+            if len(snake) > 1:
+                y, x = snake.body[1]
+                draw_cell(y * width + x)
+        scores = "  ".join(f"P{id + 1} {arena.snakes[id].score}"
+                           f"{'' if arena.snakes[id].alive else ' (out)'}"
+                           for id in range(players))
+        status = f"Tick {arena.tick}  {len(arena.live)}/{snakes} alive  {scores}"
+        if arena.paused:
+            status += "  PAUSED"
+        if arena.game_over:
+            status += "  GAME OVER - q to quit"
+        stdscr.addstr(min(height, rows - 2), 0, status[:cols - 1].ljust(cols - 1))
+        stdscr.refresh()
+
+        stdscr.timeout(max(0, int((next_tick - time.monotonic()) * 1000)))
+        key = stdscr.getch()
+        stdscr.timeout(0)
+        quit_game = False
+        while key != -1:
+            if key == ord('q'):
+                quit_game = True
+                break
+            if key == ord(' '):
+                arena.paused = not arena.paused
+            else:
+                name = curses.keyname(key).decode()
+                for player, keys in enumerate(PLAYER_KEYS[:players]):
+                    if name in keys and arena.snakes[player].alive:
+                        turns[player].push(keys[name], arena.snakes[player].direction)
+            key = stdscr.getch()
+        if quit_game:
+            break
+        if time.monotonic() >= next_tick:
+            if not arena.paused:
+                actions = bots.actions(arena, players)
+                for player, queue in enumerate(turns):
+                    turn = queue.pop()
+                    if turn is not None:
+                        actions[player] = turn[0]
+                arena.step(actions)
+            next_tick = time.monotonic() + arena.speed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Many snakes on one board")
+    parser.add_argument('--snakes', type=int, default=20, help="snakes in the arena")
+    parser.add_argument('--players', type=int, default=1, choices=[0, 1, 2],
+                        help="local players; they steer the first snakes")
+    parser.add_argument('--board', help="board size HEIGHTxWIDTH (default: the terminal)")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--headless', action='store_true',
+                        help="let bots play at full speed and print the result")
+    parser.add_argument('--ticks', type=int, default=1000, help="moves to play headless")
+    args = parser.parse_args()
+    if not args.headless and args.players > args.snakes:
+        parser.error(f"--players {args.players} needs at least that many --snakes")
+    board = tuple(int(n) for n in args.board.lower().split('x')) if args.board else None
+
+    if args.headless:
+        arena = Arena(*(board or (100, 200)), args.snakes, args.seed)
+        bots = Bots(arena.seed)
+        moving = 0.0
+        while arena.tick < args.ticks and not arena.game_over:
+            actions = bots.actions(arena)
+            start = time.perf_counter()
+            arena.step(actions)
+            moving += time.perf_counter() - start
+        deaths = {}
+        for snake in arena.snakes:
+            deaths[snake.death] = deaths.get(snake.death, 0) + 1
+        best = max(arena.snakes, key=lambda snake: snake.score)
+        print(f"{arena.tick} ticks, {len(arena.live)}/{args.snakes} alive, "
+              f"{moving / max(1, arena.tick) * 1e6:.0f} us per tick")
+        print(f"best: snake {best.id}, score {best.score}, length {len(best)}")
+        print("deaths: " + ", ".join(f"{cause} {count}" for cause, count in deaths.items()
+                                     if cause is not None))
+    else:
+        import curses
+        curses.wrapper(play, args.snakes, args.players, board, args.seed)
+
+
+if __name__ == "__main__":
+    main()
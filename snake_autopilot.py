@@ -0,0 +1,482 @@
+"""
+Snake Game Autopilot
+Plays a SnakeEngine: A* to the food with a tail-chasing safety check, and a
+Hamiltonian cycle with shortcuts once the snake gets long
+"""
+
+import heapq
+import time
+from array import array
+from collections import deque
+
+from snake_engine import DIRECTIONS, CELL_SNAKE, CELL_BOMB, CELL_FOOD, CELL_BONUS
+
+
+def hamiltonian_cycle(height, width):
+    """Return a closed path visiting every playable cell once.
+
+    The playable area is the board without its border. The number of
+    playable rows must be even so the serpentine can return to the start.
+    """
+    rows = list(range(1, height - 1))
+    cols = list(range(1, width - 1))
+    if len(rows) % 2:
+        raise ValueError("hamiltonian_cycle needs an even number of playable rows")
+    path = [(rows[0], x) for x in cols]
+    # Serpentine down through every column except the first
+    for i, y in enumerate(rows[1:]):
+        row = cols[1:] if i % 2 else cols[:0:-1]
+        path.extend((y, x) for x in row)
+    # Return to the start along the first column
+    path.extend((y, cols[0]) for y in reversed(rows[1:]))
+    return path
+
+
+def board_cycle(height, width):
+    """Return a Hamiltonian cycle for the board, or None if it has none this way.
+
+    Works along rows when there is an even number of playable rows, and
+    along columns when there is an even number of playable columns.
+    """
+    if (height - 2) % 2 == 0:
+        return hamiltonian_cycle(height, width)
+    if (width - 2) % 2 == 0:
+        return [(y, x) for x, y in hamiltonian_cycle(width, height)]
+    return None
+
+
+class Neighbors:
+    """Playable neighbours of a cell, worked out on demand.
+
+    Stands in for the precomputed table on boards too large to hold a
+    tuple per cell.
+    """
+    def __init__(self, border, steps):
+        self.border = border
+        self.steps = steps
+
+    def __getitem__(self, cell):
+        border = self.border
+        return [cell + step for step in self.steps if not border[cell + step]]
+
+
+class BudgetExceeded(Exception):
+    """Raised inside a search when the decision time budget runs out"""
+
+
+class Autopilot:
+    """Chooses an action for a SnakeEngine every tick.
+
+    Work is reused between ticks: the distance field to each target
+    (ignoring the snake) is kept until the target or the bombs change, and
+    the planned path is followed until food, bombs or an occupied cell on
+    it make it stale. Each decision gets `budget` seconds; a search that
+    runs over falls back to a move chosen by a short look-ahead.
+    """
+    enabled = True
+    PANEL_Y = 24  # Panel row, level with the LEGEND box
+    PANEL_WIDTH = 19
+    RETRY_TICKS = 5  # Wait after a failed search before trying that target again
+    FALLBACK_CELLS = 64  # Room checked per move once the budget has run out
+    TABLE_CELLS = 1 << 16  # Larger boards skip the per-cell tables and distance fields
+
+    def __init__(self, budget=0.005, cycle_threshold=0.4, clock=time.perf_counter):
+        self.budget = budget
+        self.cycle_threshold = cycle_threshold  # Board share where the cycle takes over
+        self.clock = clock
+        self.board = None  # (height, width) the caches were built for
+        self.fields = {}  # target cell -> [distances, frontier, level] of a BFS ignoring the snake
+        self.bombs = None  # Bomb cells the fields were built with
+        self.path = deque()  # Planned cells from the head onwards
+        self.path_target = None
+        self.cycle_tick = None  # Tick at which the body is known to lie along the cycle
+        self.retry = {}  # target cell -> tick before which a failed search is not repeated
+        self.searching = None
+        self.deadline = 0.0
+        # Metrics
+        self.decisions = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.replans = 0
+        self.timeouts = 0
+        self.window = None
+        self.shown_at = 0.0
+
+    @property
+    def average_latency(self):
+        """Mean decision time in seconds"""
+        return self.total_time / self.decisions if self.decisions else 0.0
+
+    def reset_board(self, game):
+        """Build the lookup tables for the game's board size"""
+        height, width = game.height, game.width
+        self.board = (height, width)
+        self.width = width
+        self.steps = (-width, 1, width, -1)  # Index offset per action
+        self.border = border = bytearray(height * width)
+        border[:width] = border[-width:] = b'\x01' * width
+        border[::width] = border[width - 1::width] = b'\x01' * height
+        self.large = (height - 2) * (width - 2) > self.TABLE_CELLS
+        if self.large:
+            self.neighbors = Neighbors(border, self.steps)
+        else:
+            # Playable neighbours of every playable cell
+            self.neighbors = [()] * (height * width)
+            for cell in range(height * width):
+                if not border[cell]:
+                    self.neighbors[cell] = tuple(cell + step for step in self.steps
+                                                 if not border[cell + step])
+        self.cycle_order = None  # Built when the snake first gets long enough
+        self.fields = {}
+        self.path.clear()
+
+    def build_cycle(self, game):
+        """Number the cells along the board's Hamiltonian cycle, if it has one"""
+        cycle = board_cycle(game.height, game.width)
+        if cycle is None:
+            self.cycle_order = False
+            return
+        width = self.width
+        self.cycle_order = array('i', [-1]) * (game.height * width)
+        for position, (y, x) in enumerate(cycle):
+            self.cycle_order[y * width + x] = position
+        self.cycle_length = len(cycle)
+
+    def decide(self, game):
+        """Return the action to take before the next move"""
+        start = self.clock()
+        if self.board != (game.height, game.width):
+            self.reset_board(game)
+        self.deadline = self.clock() + self.budget
+        self.searching = None
+        try:
+            action = self.choose(game)
+        except BudgetExceeded:
+            self.timeouts += 1
+            self.path.clear()
+            if self.searching is not None:
+                self.retry[self.searching] = game.tick + self.RETRY_TICKS
+            # Out of time: look only a bounded distance ahead
+            self.deadline = float('inf')
+            action = self.safest_move(game, self.FALLBACK_CELLS)
+        elapsed = self.clock() - start
+        self.decisions += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        return action
+
+    def check_time(self):
+        """Abort the current search once the decision budget is spent"""
+        if self.clock() > self.deadline:
+            raise BudgetExceeded()
+
+    # --- Strategy ---------------------------------------------------------
+
+    def choose(self, game):
+        """Cycle when long, else follow or plan a safe path to a target, else survive"""
+        width = self.width
+        head = game.snake[0][0] * width + game.snake[0][1]
+        bombs = frozenset(pos[0] * width + pos[1] for pos in game.bombs)
+        if bombs != self.bombs:
+            # Bombs block paths, so every cached field is stale
+            self.bombs = bombs
+            self.fields = {}
+            self.path.clear()
+
+        playable = (game.height - 2) * (game.width - 2)
+        long = len(game.snake) >= playable * self.cycle_threshold
+        if long and self.cycle_order is None:
+            self.build_cycle(game)
+        if long and self.cycle_order and self.on_cycle(game, head):
+            action = self.cycle_move(game, head)
+            if action is not None:
+                self.cycle_tick = game.tick + 1
+                self.path.clear()
+                return action
+
+        targets = []
+        if game.bonus_food is not None:
+            targets.append((game.bonus_food[0] * width + game.bonus_food[1], game.bonus_food_timer))
+        if game.food is not None:
+            targets.append((game.food[0] * width + game.food[1], None))
+        # Only the targets on the board now can need a retry wait, which
+        # keeps the waits to two entries however long the game runs
+        self.retry = {target: self.retry[target] for target, _ in targets if target in self.retry}
+
+        # Keep following the planned path while it still leads to the best target
+        if self.path and targets and self.path_target == targets[0][0] and self.path_valid(game, head):
+            return self.step_along(head)
+
+        for target, time_left in targets:
+            if self.retry.get(target, 0) > game.tick:
+                continue
+            field = None if self.large else self.distance_field(game, target)
+            self.searching = target
+            path = self.astar(game, head, target, field, self.behind(game, head))
+            self.searching = None
+            if path is None:
+                self.retry[target] = game.tick + self.RETRY_TICKS
+                continue
+            if time_left is not None and len(path) >= time_left:
+                continue
+            if self.path_safe(game, path):
+                self.replans += 1
+                self.path = deque(path)
+                self.path_target = target
+                return self.step_along(head)
+
+        self.path.clear()
+        return self.safest_move(game)
+
+    def behind(self, game, head):
+        """Cell behind the head; the engine ignores turns back into it"""
+        return head - self.steps[DIRECTIONS.index(game.direction)]
+
+    def free(self, game, cell):
+        """True if the head could move into cell"""
+        return not self.border[cell] and not game.grid[cell] & (CELL_SNAKE | CELL_BOMB)
+
+    def open_moves(self, game, head):
+        """Yield (action, cell) for every move that does not crash this tick"""
+        behind = self.behind(game, head)
+        for action, step in enumerate(self.steps):
+            cell = head + step
+            if cell != behind and self.free(game, cell):
+                yield action, cell
+
+    def step_along(self, head):
+        cell = self.path.popleft()
+        return self.steps.index(cell - head)
+
+    def path_valid(self, game, head):
+        """Check that the next planned cell is adjacent and nothing now blocks the path"""
+        if self.path[0] - head not in self.steps:
+            return False
+        grid = game.grid
+        return not any(grid[cell] & (CELL_SNAKE | CELL_BOMB) for cell in self.path)
+
+    # --- Searches ---------------------------------------------------------
+
+    def distance_field(self, game, target):
+        """BFS distances to target around walls and bombs, ignoring the snake (cached).
+
+        The field grows one BFS level at a time, so on a large board a build
+        that runs out of budget carries on from its frontier next tick.
+        """
+        grid, neighbors = game.grid, self.neighbors
+        state = self.fields.get(target)
+        if state is None:
+            # Forget targets that have been eaten or expired
+            self.fields = {t: s for t, s in self.fields.items() if grid[t] & (CELL_FOOD | CELL_BONUS)}
+            field = array('i', [-1]) * len(grid)
+            field[target] = 0
+            state = self.fields[target] = [field, [target], 0]
+        field, frontier, distance = state
+        while frontier:
+            self.check_time()
+            distance += 1
+            reached = []
+            for cell in frontier:
+                for neighbor in neighbors[cell]:
+                    if field[neighbor] < 0 and not grid[neighbor] & CELL_BOMB:
+                        field[neighbor] = distance
+                        reached.append(neighbor)
+            frontier = state[1] = reached
+            state[2] = distance
+        return field
+
+    def astar(self, game, head, target, field, behind):
+        """Shortest path from head to target avoiding the snake, or None.
+
+        The distance field is an exact heuristic whenever the snake is not
+        in the way, so A* usually expands little more than the path. Without
+        a field (large boards) the Manhattan distance is used instead. Ties
+        go to the deepest node so equally short paths are not all explored.
+        """
+        if field is not None and field[head] < 0:
+            return None
+        width = self.width
+        target_y, target_x = divmod(target, width)
+        grid, neighbors = game.grid, self.neighbors
+        came_from = {head: None}
+        cost = {head: 0}
+        frontier = [(0, 0, head)]
+        expanded = 0
+        while frontier:
+            _, depth, cell = heapq.heappop(frontier)
+            g = -depth
+            if cell == target:
+                path = []
+                while cell != head:
+                    path.append(cell)
+                    cell = came_from[cell]
+                return path[::-1]
+            if g > cost[cell]:
+                continue
+            expanded += 1
+            if expanded % 64 == 0:
+                self.check_time()
+            g += 1
+            for neighbor in neighbors[cell]:
+                if grid[neighbor] & (CELL_SNAKE | CELL_BOMB) or neighbor == behind:
+                    continue
+                if neighbor in cost and cost[neighbor] <= g:
+                    continue
+                if field is None:
+                    h = abs(neighbor // width - target_y) + abs(neighbor % width - target_x)
+                else:
+                    h = field[neighbor]
+                    if h < 0:
+                        continue  # Walled off by bombs
+                cost[neighbor] = g
+                came_from[neighbor] = cell
+                heapq.heappush(frontier, (g + h, -g, neighbor))
+        return None
+
+    def simulate(self, game, path):
+        """Return (occupied cells, body) after the snake follows path, eating at its end"""
+        body = deque(game.snake.indices())
+        occupied = set(body)
+        last = len(path) - 1
+        for i, cell in enumerate(path):
+            body.appendleft(cell)
+            occupied.add(cell)
+            eats = i == last and game.grid[cell] & (CELL_FOOD | CELL_BONUS)
+            if not eats:
+                occupied.discard(body.pop())
+        return occupied, body
+
+    def flood(self, game, occupied, start, goal=None, enough=0):
+        """Count free cells reachable from start; also report whether goal is reachable.
+
+        Stops once the goal is found and `enough` cells were counted, or
+        after twice that many without it. The goal counts only when reached
+        in two moves or more: the engine checks collisions before the tail
+        moves, so stepping straight onto the tail is fatal.
+        """
+        grid, neighbors = game.grid, self.neighbors
+        seen = {start}
+        queue = deque([start])
+        area = 0
+        found = False
+        while queue:
+            if area >= enough and (found or enough and area >= 2 * enough):
+                break
+            cell = queue.popleft()
+            area += 1
+            if area % 256 == 0:
+                self.check_time()
+            for neighbor in neighbors[cell]:
+                if neighbor in seen:
+                    continue
+                if neighbor == goal and cell != start:
+                    found = True
+                if neighbor in occupied or grid[neighbor] & CELL_BOMB:
+                    continue
+                seen.add(neighbor)
+                queue.append(neighbor)
+        return area, found
+
+    def path_safe(self, game, path):
+        """Tail-chasing check: after eating, can the head still reach the tail?"""
+        occupied, body = self.simulate(game, path)
+        if len(body) < 3:
+            return True
+        _, found = self.flood(game, occupied, body[0], goal=body[-1])
+        return found
+
+    def safest_move(self, game, limit=None):
+        """Pick the non-fatal move that keeps the tail reachable and the most room.
+
+        Room for twice the body (or twice `limit` cells) is taken to be as
+        good as reaching the tail. Ties go to the move closest to the food,
+        so a search that ran out of time still makes progress.
+        """
+        width = self.width
+        head = game.snake[0][0] * width + game.snake[0][1]
+        food_y, food_x = game.food if game.food is not None else divmod(head, width)
+        best, best_score = None, None
+        for action, cell in self.open_moves(game, head):
+            occupied, body = self.simulate(game, [cell])
+            enough = len(body) if limit is None else min(limit, len(body))
+            area, found = self.flood(game, occupied, cell, goal=body[-1], enough=enough)
+            y, x = divmod(cell, width)
+            score = (found or area >= 2 * enough or len(body) < 3, area,
+                     -abs(y - food_y) - abs(x - food_x))
+            if best_score is None or score > best_score:
+                best, best_score = action, score
+        return best
+
+    def on_cycle(self, game, head):
+        """Check that the body runs forward along the cycle from the tail to the head.
+
+        A move made by cycle_move keeps this true, so it is only checked
+        again after some other move.
+        """
+        if self.cycle_tick == game.tick:
+            return True
+        order, size, width = self.cycle_order, self.cycle_length, self.width
+        tail = order[game.snake[-1][0] * width + game.snake[-1][1]]
+        previous = size
+        for y, x in game.snake:
+            position = (order[y * width + x] - tail) % size
+            if position >= previous:
+                return False
+            previous = position
+        return True
+
+    def cycle_move(self, game, head):
+        """Follow the Hamiltonian cycle, taking shortcuts that stay ahead of the tail"""
+        order, size = self.cycle_order, self.cycle_length
+        tail = game.snake[-1][0] * self.width + game.snake[-1][1]
+        head_position = order[head]
+        to_tail = (order[tail] - head_position) % size
+        to_food = None
+        if game.food is not None:
+            food = game.food[0] * self.width + game.food[1]
+            to_food = (order[food] - head_position) % size
+        # Leave room for the snake to grow by one before the tail moves again
+        slack = size - len(game.snake) - 2
+
+        best, best_jump = None, None
+        for action, cell in self.open_moves(game, head):
+            jump = (order[cell] - head_position) % size
+            if jump == 0 or jump >= to_tail:
+                continue
+            if jump > 1 and (jump > slack or (to_food is not None and jump > to_food)):
+                continue
+            if best_jump is None or jump > best_jump:
+                best, best_jump = action, jump
+        return best
+
+    # --- Display ----------------------------------------------------------
+
+    def draw(self, renderer, game, full):
+        """Side panel hook called by the renderer each frame"""
+        import curses
+
+        x = renderer.view_width + 2 + renderer.PANEL_WIDTH + 1
+        max_y, max_x = renderer.stdscr.getmaxyx()
+        if x + self.PANEL_WIDTH > max_x or self.PANEL_Y + 5 > max_y:
+            return  # No room next to the LEGEND box
+        if self.window is None:
+            self.window = renderer.newwin(4, self.PANEL_WIDTH, self.PANEL_Y + 1, x)
+            full = True
+        elif full:
+            self.window.mvwin(self.PANEL_Y + 1, x)
+
+        # Latencies change every tick; refresh them once per second
+        now = self.clock()
+        if full or now - self.shown_at >= 1.0:
+            self.shown_at = now
+            lines = [
+                "╔══ AUTOPILOT ═══╗",
+                f"║ avg: {self.average_latency * 1000:6.2f} ms ║",
+                f"║ max: {self.max_time * 1000:6.2f} ms ║",
+                "╚════════════════╝",
+            ]
+            for y, text in enumerate(lines):
+                self.window.addstr(y, 0, text, curses.color_pair(3))
+        # The board may have been copied over our area on the virtual screen
+        self.window.touchwin()
+        self.window.noutrefresh()
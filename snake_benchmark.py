@@ -0,0 +1,1791 @@
+#!/usr/bin/env python3
+"""
+Snake Game Benchmarks
+Measures the cost of the game's hot paths without opening a terminal
+Run: python snake_benchmark.py [--only GROUP ...] [--output FILE] [--compare BASELINE]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+import snake_game
+from snake_arena import Arena, Bots, DEATH_HEAD, DEATH_SNAKE
+from snake_autopilot import Autopilot, hamiltonian_cycle
+from snake_engine import (SnakeEngine, EngineState, RingBody, ObservationBatch, TurnQueue,
+                          CELL_SNAKE, CELL_BOMB, DIRECTIONS, DEATH_WALL, DEATH_SELF, OBS_CHANNELS,
+                          UP, RIGHT, DOWN, LEFT)
+from snake_rewind import RewindBuffer
+import snake_analytics
+import snake_ansi
+import snake_replay
+import snake_rewind
+import snake_scores
+import snake_server
+import snake_tournament
+from snake_profiler import RollingStats
+
+try:
+    import numpy
+    import snake_vector
+except ImportError:
+    numpy = snake_vector = None  # NumPy is not installed
+
+REPEATS = 3  # Each timing is the best of this many runs
+
+
+class CheckFailed(AssertionError):
+    """A correctness check found the game misbehaving"""
+
+
+def expect(condition, message, *args):
+    """Raise CheckFailed unless condition holds; unlike assert, this also
+    runs under python -O. The message is formatted with args only on failure."""
+    if not condition:
+        raise CheckFailed(message.format(*args) if args else message)
+
+
+def make_game_on_cycle(length, height=20, width=40, cls=SnakeEngine, cycle=None):
+    """Create a game whose snake of the given length lies along a Hamiltonian cycle"""
+    game = cls(height, width)
+    game.bomb_spawn_chance = 0
+    game.bonus_spawn_chance = 0
+    if cycle is None:
+        cycle = hamiltonian_cycle(height, width)
+    if length >= len(cycle):
+        raise ValueError("snake must leave at least one free cell")
+
+    game.vacate(game.snake[0][0] * width + game.snake[0][1], CELL_SNAKE)
+    # Head first, so the body trails behind along the cycle
+    game.snake.clear()
+    for i in range(length - 1, -1, -1):
+        y, x = cycle[i]
+        game.snake.append((y, x))
+        game.occupy(y * width + x, CELL_SNAKE)
+    return game, cycle
+
+
+def cycle_actions(cycle, start, ticks):
+    """Return the actions that follow the cycle for ticks moves from position start"""
+    steps = []
+    for i, (y, x) in enumerate(cycle):
+        ny, nx = cycle[(i + 1) % len(cycle)]
+        steps.append(DIRECTIONS.index((ny - y, nx - x)))
+    return [steps[(start + i) % len(cycle)] for i in range(ticks)]
+
+
+def safe_action(game, rng):
+    """Pick a random action that does not crash on the next move, if there is one"""
+    head_y, head_x = game.snake[0]
+    safe = []
+    for action, (dy, dx) in enumerate(DIRECTIONS):
+        y, x = head_y + dy, head_x + dx
+        if (0 < y < game.height - 1 and 0 < x < game.width - 1 and
+                not game.grid[y * game.width + x] & (CELL_SNAKE | CELL_BOMB)):
+            safe.append(action)
+    return rng.choice(safe) if safe else None
+
+
+def best_of(run):
+    """Call run() REPEATS times and return the smallest result"""
+    return min(run() for _ in range(REPEATS))
+
+
+# --- Simulation -----------------------------------------------------------
+
+def time_ticks(game, actions):
+    """Return the mean cost in microseconds of step() over actions"""
+    game.direction = DIRECTIONS[actions[0]]
+    step = game.step
+    start = time.perf_counter()
+    for action in actions:
+        step(action)
+    elapsed = time.perf_counter() - start
+    expect(not game.game_over, "benchmark snake crashed")
+    return elapsed / len(actions) * 1e6
+
+
+def bench_tick(length, ticks=20000, height=40, width=80):
+    """Return the mean cost of a move in microseconds for a snake of length"""
+    def run():
+        game, cycle = make_game_on_cycle(length, height, width)
+        return time_ticks(game, cycle_actions(cycle, length - 1, ticks))
+    return best_of(run)
+
+
+def bench_step_many(length=100, ticks=200000, height=20, width=40):
+    """Return headless throughput of step_many in ticks per second"""
+    def run():
+        game, cycle = make_game_on_cycle(length, height, width)
+        actions = cycle_actions(cycle, length - 1, ticks)
+        game.direction = DIRECTIONS[actions[0]]
+        start = time.perf_counter()
+        played = game.step_many(actions)
+        elapsed = time.perf_counter() - start
+        expect(played == ticks, "benchmark snake crashed")
+        return elapsed / played
+    return 1 / best_of(run)
+
+
+def bench_spawn(fill, spawns=20000, height=20, width=40):
+    """Return the mean cost of generate_food in microseconds at a given board fill ratio"""
+    playable = (height - 2) * (width - 2)
+    length = max(1, min(playable - 2, int(playable * fill)))
+
+    def run():
+        game, _ = make_game_on_cycle(length, height, width)
+        start = time.perf_counter()
+        for _ in range(spawns):
+            game.generate_food()
+        elapsed = time.perf_counter() - start
+        expect(game.food is not None, "board unexpectedly full")
+        return elapsed / spawns * 1e6
+    return best_of(run)
+
+
+def bench_timers(items, ticks=5000, height=60, width=200):
+    """Return the mean cost of a move in microseconds with many live bombs and a bonus.
+
+    The snake circles the top two rows while the timed items sit below it,
+    far from expiry, so every tick pays for the timer updates alone.
+    """
+    track = hamiltonian_cycle(4, width)
+
+    def run():
+        game, _ = make_game_on_cycle(1, height, width, cycle=track)
+        game.early_removal_chance = 0
+        game.max_bombs = items
+        rng = random.Random(0)
+        cells = [(y, x) for y in range(4, height - 1) for x in range(1, width - 1)]
+        for pos in rng.sample(cells, items + 1):
+            if game.bonus_food is None:
+                game.set_bonus_food(pos)
+                game.bonus_food_timer = ticks * 10
+            else:
+                game.place_bomb(pos, ticks * 10)
+        return time_ticks(game, cycle_actions(track, 0, ticks))
+    return best_of(run)
+
+
+# --- Input ----------------------------------------------------------------
+
+def check_turn_queue():
+    """Check that two turns pressed within one tick are both made, on
+    consecutive moves, where turning straight away runs into the body"""
+    # Two U-turns each way, with the second turn of each pressed in the
+    # same tick as the first
+    presses = [(DOWN, LEFT), (), (), (DOWN, RIGHT), (), ()] * 2
+
+    def serpentine(queued):
+        game = SnakeEngine(20, 40, 0)
+        game.bomb_spawn_chance = game.bonus_spawn_chance = 0
+        for x in (19, 18, 17):
+            game.snake.append((10, x))
+            game.occupy(10 * 40 + x, CELL_SNAKE)
+        now = [0]
+        turns = TurnQueue(clock=lambda: now[0])
+        waits = []
+        for keys in presses:
+            for action in keys:
+                if queued:
+                    turns.push(action, game.direction)
+                else:
+                    game.turn(action)
+            wait = turns.apply(game)
+            if wait is not None:
+                waits.append(wait)
+            game.move_snake()
+            now[0] += 1
+        return game, waits
+
+    game, waits = serpentine(queued=False)
+    expect(game.death == DEATH_SELF, "turning straight away should reverse into the body")
+    game, waits = serpentine(queued=True)
+    expect(not game.game_over and game.snake[0] == (14, 20), f"snake ended at {game.snake[0]}")
+    expect(waits == [0, 1] * 4, f"unexpected waits {waits}")
+
+    # Reversals and repeats of the last queued direction, and turns past
+    # the limit, are dropped
+    turns = TurnQueue()
+    for action in (LEFT, RIGHT, UP, DOWN, UP, LEFT, DOWN, RIGHT):
+        turns.push(action, DIRECTIONS[RIGHT])
+    expect([action for action, _ in turns.turns] == [UP, LEFT, DOWN] and turns.dropped == 1,
+           "queue kept the wrong turns")
+
+
+def bench_turn_queue(ticks=100000):
+    """Return microseconds per tick to queue two turns and make one"""
+    def run():
+        game, _ = make_game_on_cycle(1, 40, 80)
+        turns = TurnQueue()
+        push, apply = turns.push, turns.apply
+        start = time.perf_counter()
+        for i in range(ticks):
+            push(UP if i % 2 else DOWN, DIRECTIONS[RIGHT])
+            push(LEFT, DIRECTIONS[UP])
+            apply(game)
+            turns.clear()
+        return (time.perf_counter() - start) / ticks * 1e6
+    return best_of(run)
+
+
+# --- Rendering ------------------------------------------------------------
+
+class FakeWindow:
+    """In-memory stand-in for a curses window that counts cell writes"""
+    def __init__(self, lines=0, cols=0, y=0, x=0):
+        self.size = (lines, cols)
+        self.cells = {}
+        self.writes = 0
+
+    def getmaxyx(self):
+        return self.size
+
+    def addch(self, y, x, ch, attr=0):
+        self.cells[y, x] = (ch, attr)
+        self.writes += 1
+
+    def addstr(self, y, x, text, attr=0):
+        for i, ch in enumerate(text):
+            self.cells[y, x + i] = (ch, attr)
+        self.writes += len(text)
+
+    def erase(self):
+        self.cells.clear()
+
+    def noutrefresh(self):
+        pass
+
+    def touchwin(self):
+        pass
+
+    def mvwin(self, y, x):
+        pass
+
+
+class FakeCurses:
+    """The parts of the curses module used by the renderer, without a terminal"""
+    A_BOLD = 1 << 21
+    windows = []
+
+    @staticmethod
+    def color_pair(number):
+        return number << 8
+
+    @classmethod
+    def newwin(cls, *args):
+        window = FakeWindow(*args)
+        cls.windows.append(window)
+        return window
+
+    @staticmethod
+    def doupdate():
+        pass
+
+
+def bench_draw(length=100, frames=2000, full=False, height=20, width=40, cycle=None):
+    """Return (microseconds per frame, cell writes per frame) for SnakeGame.draw"""
+    def run():
+        game, track = make_game_on_cycle(length, height, width, cls=snake_game.SnakeGame,
+                                         cycle=cycle)
+        game.generate_food()
+        actions = cycle_actions(track, length - 1, frames)
+        game.direction = DIRECTIONS[actions[0]]
+        screen = FakeWindow(45, 120)  # A roomy terminal
+        real_curses = snake_game.curses
+        snake_game.curses = FakeCurses
+        FakeCurses.windows = []
+        try:
+            game.draw(screen)
+            windows = [screen] + FakeCurses.windows
+            writes = sum(window.writes for window in windows)
+            elapsed = 0.0
+            for action in actions:
+                game.step(action)
+                if full:
+                    game.redraw_all()
+                start = time.perf_counter()
+                game.draw(screen)
+                elapsed += time.perf_counter() - start
+            writes = sum(window.writes for window in windows) - writes
+        finally:
+            snake_game.curses = real_curses
+        expect(not game.game_over, "benchmark snake crashed")
+        return elapsed / frames * 1e6, writes / frames
+    return min(run() for _ in range(REPEATS))
+
+
+class FakeTerminal:
+    """Just enough of a terminal to follow AnsiScreen output: cursor moves,
+    clears, attributes and one- or two-column characters"""
+    TOKEN = re.compile(r'\x1b\[([0-9;]*)([HJm])|(.)', re.S)
+
+    def __init__(self):
+        self.cells = {}  # (y, x) -> (character, attribute sequence)
+        self.blank = (' ', '')
+        self.y = self.x = 0
+        self.sgr = ''
+
+    def feed(self, data):
+        for params, command, ch in self.TOKEN.findall(data.decode()):
+            if ch:
+                self.cells[self.y, self.x] = (ch, self.sgr)
+                if snake_ansi.char_width(ch) == 2:
+                    self.cells[self.y, self.x + 1] = (snake_ansi.WIDE, self.sgr)
+                self.x += snake_ansi.char_width(ch)
+            elif command == 'H':
+                row, col = params.split(';') if params else (1, 1)
+                self.y, self.x = int(row) - 1, int(col) - 1
+            elif command == 'J':
+                self.cells = {}
+                self.blank = (' ', self.sgr)
+            else:
+                self.sgr = f'\x1b[{params}m'
+
+    def cell(self, y, x):
+        return self.cells.get((y, x), self.blank)
+
+
+def ansi_game(seed=5):
+    """A seeded game with plenty of bombs for an autopilot to dodge"""
+    game = snake_game.SnakeGame(20, 40, 20, 40, seed=seed)
+    game.bomb_spawn_chance = 0.2
+    game.bomb_cooldown_time = 3
+    game.generate_food()
+    return game
+
+
+def check_ansi(frames=600, budget=64):
+    """Check that the terminal ends up showing exactly the AnsiScreen's back
+    buffer after every frame, that the board matches what the renderer
+    draws through curses, and that a byte budget only delays the panels"""
+    real_curses = snake_game.curses
+    read, write = os.pipe()
+    try:
+        for frame_budget in (None, budget):
+            snake_game.curses = real_curses
+            curses_game, game = ansi_game(), ansi_game()
+            snake_game.curses = FakeCurses
+            window = FakeWindow(45, 120)
+            screen = snake_ansi.AnsiScreen(45, 120, snake_game.COLOR_PAIRS, write, frame_budget)
+            terminal = FakeTerminal()
+            autopilot = Autopilot(budget=1.0)
+            for frame in range(frames):
+                action = autopilot.decide(game)
+                for each in (curses_game, game):
+                    if action is not None:
+                        each.turn(action)
+                    each.move_snake()
+                    if frame % 150 == 149:
+                        each.paused = not each.paused  # Overlays and full repaints
+                curses_game.draw(window)
+                game.draw(screen.stdscr)
+                data = b''
+                while len(data) < screen.last_bytes:
+                    data += os.read(read, screen.last_bytes - len(data))
+                terminal.feed(data)
+                renderer = game.renderer
+                for y in range(45):
+                    for x in range(120):
+                        ch, attr = screen.back[y * 120 + x]
+                        board = y < renderer.view_height and x < renderer.view_width
+                        if frame_budget is None or board:
+                            expect(terminal.cell(y, x) == (ch, screen.sgr(attr)),
+                                   "terminal differs from the frame at {},{}", y, x)
+                        if board and not any(screen.back[y * 120 + x + dx][0] == snake_ansi.WIDE
+                                             for dx in (0, 1)):
+                            expected = window.cells.get((y, x), snake_ansi.BLANK)
+                            if snake_ansi.char_width(expected[0]) == 1:
+                                expect((ch, attr) == expected,
+                                       "board differs from curses at {},{}", y, x)
+            if frame_budget is not None:
+                expect(screen.max_bytes > 5 * frame_budget, "the first frame was held back")
+                # Quiet frames let the held back panel rows catch up
+                for _ in range(100):
+                    game.draw(screen.stdscr)
+                    terminal.feed(os.read(read, screen.last_bytes) if screen.last_bytes else b'')
+                expect(not screen.pending, "panels never caught up")
+                expect(all(terminal.cell(y, x) == (ch, screen.sgr(attr))
+                           for y in range(45) for x in range(120)
+                           for ch, attr in [screen.back[y * 120 + x]]),
+                       "terminal differs from the caught up frame")
+    finally:
+        snake_game.curses = real_curses
+        os.close(read)
+        os.close(write)
+
+
+def bench_ansi(frames=2000, full=False, budget=None):
+    """Return (microseconds, bytes, writes) per frame drawing through an
+    AnsiScreen, and the largest frame in bytes after the first"""
+    real_curses = snake_game.curses
+    try:
+        with open(os.devnull, 'wb') as null:
+            def run():
+                snake_game.curses = real_curses
+                game, track = make_game_on_cycle(100, cls=snake_game.SnakeGame)
+                snake_game.curses = FakeCurses
+                game.generate_food()
+                actions = cycle_actions(track, 99, frames)
+                game.direction = DIRECTIONS[actions[0]]
+                screen = snake_ansi.AnsiScreen(45, 120, snake_game.COLOR_PAIRS,
+                                               null.fileno(), budget)
+                game.draw(screen.stdscr)
+                start_bytes, start_writes = screen.bytes, screen.writes
+                screen.max_bytes = 0
+                elapsed = 0.0
+                for action in actions:
+                    game.step(action)
+                    if full:
+                        game.redraw_all()
+                    start = time.perf_counter()
+                    game.draw(screen.stdscr)
+                    elapsed += time.perf_counter() - start
+                return (elapsed / frames * 1e6, (screen.bytes - start_bytes) / frames,
+                        (screen.writes - start_writes) / frames, screen.max_bytes)
+            return min(run() for _ in range(REPEATS))
+    finally:
+        snake_game.curses = real_curses
+
+
+# --- Large boards ---------------------------------------------------------
+
+# A loop in the top left corner that fits every board measured, so the cost
+# of a tick can be compared across board sizes
+LARGE_TRACK = hamiltonian_cycle(22, 78)
+
+
+def bench_large_tick(length, height, width, ticks=20000):
+    """Return the mean cost of a move in microseconds on a board of any size"""
+    def run():
+        game, _ = make_game_on_cycle(length, height, width, cycle=LARGE_TRACK)
+        return time_ticks(game, cycle_actions(LARGE_TRACK, length - 1, ticks))
+    return best_of(run)
+
+
+def bench_memory(build):
+    """Return the bytes allocated by build() and still held by its result"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return used
+
+
+def bench_body_memory(length=100000, width=1000):
+    """Return the bytes per segment held by a snake body of length"""
+    cells = [divmod(index, width) for index in range(length)]
+    return bench_memory(lambda: RingBody(width, cells)) / length
+
+
+# --- Snapshots ------------------------------------------------------------
+
+def busy_game(seed=0, ticks=300, height=20, width=40):
+    """Return a game some way in, with bombs and bonus food about"""
+    game = SnakeEngine(height, width, seed)
+    game.bomb_spawn_chance = 0.2
+    game.bonus_spawn_chance = 0.1
+    game.max_bombs = 10
+    game.generate_food()
+    rng = random.Random(seed)
+    for _ in range(ticks):
+        if not game.step(safe_action(game, rng)):
+            break
+    return game
+
+
+def check_snapshots(games=10, ticks=500):
+    """Check that restoring a snapshot, in memory or from bytes, replays identically"""
+    def play(game, seed):
+        rng = random.Random(seed)
+        states = []
+        for _ in range(ticks):
+            game.step(safe_action(game, rng))
+            states.append((game.tick, game.score, list(game.snake), game.food,
+                           game.bonus_food, game.bonus_food_timer,
+                           [(pos, game.bomb_timer(pos)) for pos in game.bombs],
+                           game.bomb_cooldown, game.bonus_cooldown, bytes(game.grid)))
+            if game.game_over:
+                break
+        return states
+
+    for seed in range(games):
+        game = busy_game(seed)
+        state = game.snapshot()
+        expected = play(game, seed)
+        game.restore(state)
+        expect(play(game, seed) == expected, "restored game differs")
+        game.restore(EngineState.from_bytes(state.to_bytes()))
+        expect(play(game, seed) == expected, "game loaded from bytes differs")
+    return games
+
+
+def bench_snapshot(calls=2000):
+    """Return microseconds per snapshot, restore, to_bytes and from_bytes, and the blob size"""
+    game = busy_game()
+    state = game.snapshot()
+    data = state.to_bytes()
+
+    def per_call(run):
+        def timed():
+            start = time.perf_counter()
+            for _ in range(calls):
+                run()
+            return (time.perf_counter() - start) / calls * 1e6
+        return best_of(timed)
+    return (per_call(game.snapshot), per_call(lambda: game.restore(state)),
+            per_call(state.to_bytes), per_call(lambda: EngineState.from_bytes(data)),
+            len(data))
+
+
+def bench_resize(calls=500):
+    """Return microseconds per mid-game resize, alternating between two sizes"""
+    game = busy_game()
+    sizes = [(18, 36), (20, 40)]
+
+    def run():
+        start = time.perf_counter()
+        for i in range(calls):
+            game.resize(*sizes[i % 2])
+        return (time.perf_counter() - start) / calls * 1e6
+    return best_of(run)
+
+
+# --- Observations ---------------------------------------------------------
+
+def observation_planes(game):
+    """Return a game's observation planes built from scratch, as bytes"""
+    cells, width = game.height * game.width, game.width
+    planes = array('f', bytes(4 * OBS_CHANNELS * cells))
+    for index in game.snake.indices():
+        planes[index] = 1
+    planes[cells + game.snake.head_index()] = 1
+    if game.food is not None:
+        planes[2 * cells + game.food[0] * width + game.food[1]] = 1
+    if game.bonus_food is not None:
+        planes[3 * cells + game.bonus_food[0] * width + game.bonus_food[1]] = game.bonus_food_timer
+    for y, x in game.bombs:
+        planes[4 * cells + y * width + x] = game.bomb_timer((y, x))
+    return planes.tobytes()
+
+
+def check_observation(games=10, ticks=500):
+    """Check that the planes kept by the engine match planes built from
+    scratch after every move, a restore and a resize, alone and batched"""
+    for seed in range(games):
+        game = busy_game(seed, ticks=0)
+        view = game.observe()
+        expect(view.readonly and view.shape == (OBS_CHANNELS, game.height, game.width),
+               "planes are writable or the wrong shape")
+        rng = random.Random(seed)
+        state = None
+        for tick in range(ticks):
+            game.step(safe_action(game, rng))
+            expect(bytes(game.observe()) == observation_planes(game),
+                   "planes differ at tick {}", tick)
+            if game.game_over:
+                break
+            if tick == ticks // 4:
+                state = game.snapshot()
+            elif tick == ticks // 2:
+                game.restore(state)
+            elif tick == 3 * ticks // 4:
+                game.resize(game.height - 2, game.width - 4)
+        expect(bytes(game.observe()) == observation_planes(game), "planes differ at the end")
+
+    games = [busy_game(seed, ticks=0) for seed in range(4)]
+    batch = ObservationBatch(games)
+    rng = random.Random(0)
+    for _ in range(ticks):
+        for slot, game in enumerate(games):
+            if not game.step(safe_action(game, rng)):
+                games[slot] = busy_game(slot + len(games), ticks=0)
+                batch.attach(slot, games[slot])
+        expected = b''.join(observation_planes(game) for game in games)
+        expect(bytes(batch.view()) == expected, "batched planes differ")
+    if numpy is not None:
+        stacked = numpy.asarray(batch.view())
+        expect(stacked.shape == (len(games), OBS_CHANNELS, 20, 40) and not stacked.flags.writeable,
+               "batched ndarray is writable or the wrong shape")
+        before = stacked.sum()
+        games[0].step(safe_action(games[0], rng))
+        games[0].step(safe_action(games[0], rng))
+        expect(stacked.tobytes() == bytes(batch.view()), "ndarray does not share the planes")
+        expect(stacked.sum() != before or games[0].game_over, "ndarray did not see the move")
+
+
+def bench_observation(height, width, length=100, ticks=20000):
+    """Return microseconds per move without and with observation planes, and
+    per planes built from scratch, on a board of any size"""
+    def run(observe):
+        game, _ = make_game_on_cycle(length, height, width, cycle=LARGE_TRACK)
+        if observe:
+            game.observe()
+        return time_ticks(game, cycle_actions(LARGE_TRACK, length - 1, ticks))
+    game, _ = make_game_on_cycle(length, height, width, cycle=LARGE_TRACK)
+    builds = max(10, ticks // (height * width))
+
+    def rebuild():
+        start = time.perf_counter()
+        for _ in range(builds):
+            observation_planes(game)
+        return (time.perf_counter() - start) / builds * 1e6
+    return best_of(lambda: run(False)), best_of(lambda: run(True)), best_of(rebuild)
+
+
+def rewound_game(seed=0, ticks=600, height=20, width=40, recording=False, **buffer_options):
+    """Return a busy game and a RewindBuffer that recorded every tick of it,
+    plus the state seen before each tick"""
+    game = SnakeEngine(height, width, seed)
+    game.bomb_spawn_chance = 0.2
+    game.bonus_spawn_chance = 0.1
+    game.generate_food()
+    if recording:
+        game.inputs = []  # A log the buffer does not own
+    rewind = RewindBuffer(**buffer_options)
+    rewind.attach(game)
+    rng = random.Random(seed)
+    seen = {}
+    for _ in range(ticks):
+        seen[game.tick] = (list(game.snake), game.food, game.bonus_food, dict(game.timers.expiry),
+                           game.score, bytes(game.grid), game.rng.getstate())
+        rewind.record(game)
+        if not game.step(safe_action(game, rng)):
+            break
+    return game, rewind, seen
+
+
+def check_rewind(games=10):
+    """Check that rewinding lands on exactly the state the game was in then,
+    and that only the buffer's own input log is trimmed to its window"""
+    for seed in range(games):
+        game, rewind, seen = rewound_game(seed)
+        expect(all(tick >= rewind.oldest_tick for tick, _, _ in game.inputs),
+               "inputs from before the oldest keyframe were kept")
+        expect(rewind.input_bytes == len(game.inputs) * snake_rewind.INPUT_BYTES,
+               "input log not counted")
+        for seconds in (0.1, 0.7, 3, 100):
+            tick = rewind.rewind(game, seconds)
+            expect(seen[tick] == (list(game.snake), game.food, game.bonus_food,
+                                  dict(game.timers.expiry), game.score, bytes(game.grid),
+                                  game.rng.getstate()), "rewound game differs")
+    game, rewind, _ = rewound_game(seed=2, recording=True)  # Plays past the window
+    expect(game.inputs[0][0] < rewind.oldest_tick, "inputs of a recording were dropped")
+    expect(rewind.input_bytes == (len(game.inputs) - rewind.first_input) * snake_rewind.INPUT_BYTES,
+           "recording's inputs since the oldest keyframe not counted")
+    return games
+
+
+def bench_rewind_record(ticks=20000):
+    """Return microseconds per tick spent recording keyframes"""
+    game, rewind, _ = rewound_game(ticks=0)
+    game.max_bombs = 0
+
+    def run():
+        start = time.perf_counter()
+        for _ in range(ticks):
+            rewind.record(game)
+            # Keep the game going without moving, so only recording is timed
+            game.tick += 1
+        return (time.perf_counter() - start) / ticks * 1e6
+    return best_of(run)
+
+
+def bench_rewind(seconds, calls=200):
+    """Return microseconds per rewind of `seconds` at the default speed"""
+    game, rewind, _ = rewound_game(ticks=400)
+    state = game.snapshot()
+    keyframes = list(rewind.keyframes)
+
+    def run():
+        elapsed = 0.0
+        for _ in range(calls):
+            game.restore(state)
+            rewind.keyframes.clear()
+            rewind.keyframes.extend(keyframes)
+            start = time.perf_counter()
+            rewind.rewind(game, seconds)
+            elapsed += time.perf_counter() - start
+        return elapsed / calls * 1e6
+    return best_of(run)
+
+
+def bench_rewind_memory(height, width, ticks=600):
+    """Return the KiB held by a 30 second rewind window, and the ticks it covers"""
+    cycle = LARGE_TRACK if height > 100 else None
+    game, cycle = make_game_on_cycle(100, height, width, cycle=cycle)
+    rewind = RewindBuffer()
+    rewind.attach(game)
+    actions = cycle_actions(cycle, 99, ticks)
+    game.direction = DIRECTIONS[actions[0]]
+    for action in actions:
+        rewind.record(game)
+        game.step(action)
+    expect(not game.game_over, "benchmark snake crashed")
+    return rewind.nbytes / 1024, game.tick - rewind.oldest_tick
+
+
+# --- Server ---------------------------------------------------------------
+
+def check_server(seed=7, turn_at=3):
+    """Play a game through a Unix socket and check every state against a local engine"""
+    async def play(path):
+        server = snake_server.GameServer()
+        listener = await asyncio.start_unix_server(server.handle_client, path)
+        timer_loop = asyncio.ensure_future(server.run())
+        client = await snake_server.Client.connect(path=path)
+        client.start(20, 40, seed)
+        local = SnakeEngine(20, 40, seed)
+        local.generate_food()
+        states = 0
+        while True:
+            state = await client.state()
+            if state['tick'] == turn_at:
+                client.turn(DIRECTIONS.index((-1, 0)))
+            if state['tick'] > local.tick:
+                # The turn took effect before this move
+                local.turn(state['direction'])
+                local.move_snake()
+            expected = snake_server.decode_state(snake_server.encode_state(local))
+            expect(state == expected, "server state differs from the local game")
+            states += 1
+            if state['game_over']:
+                break
+        await client.close()
+        timer_loop.cancel()
+        listener.close()
+        return states
+
+    with tempfile.TemporaryDirectory() as directory:
+        return asyncio.run(play(directory + '/snake.sock'))
+
+
+def cycle_policy(height=20, width=40):
+    """Return a bot policy that follows a Hamiltonian cycle, with a table lookup per move"""
+    # Run the cycle backwards so it heads right through the centre, like a new snake
+    cycle = hamiltonian_cycle(height, width)[::-1]
+    table = [None] * (height * width)
+    for (y, x), (ny, nx) in zip(cycle, cycle[1:] + cycle[:1]):
+        table[y * width + x] = DIRECTIONS.index((ny - y, nx - x))
+    return lambda engine: table[engine.snake.head_index()]
+
+
+def bench_server(sessions, seconds=1.0, warmup=0.3):
+    """Return the p99 tick lateness in milliseconds with this many bot sessions.
+
+    Every session writes its states to one real socket, drained by a reader
+    task, so the cost of the writes is included. Scheduling noise from the
+    machine lands in the tail, so this is the best of REPEATS runs.
+    """
+    async def run():
+        server = snake_server.GameServer()
+        ours, theirs = socket.socketpair()
+        reader, writer = await asyncio.open_connection(sock=ours)
+        drain_reader, _ = await asyncio.open_connection(sock=theirs)
+
+        async def drain():
+            while await drain_reader.read(1 << 16):
+                pass
+        drainer = asyncio.ensure_future(drain())
+        timer_loop = asyncio.ensure_future(server.run())
+        policy = cycle_policy()
+        rng = random.Random(0)
+        for seed in range(sessions):
+            # Spread the first ticks over one interval, as players join at random times
+            server.add_session(writer.write, policy, seed=seed, delay=rng.uniform(0, 0.1))
+        await asyncio.sleep(warmup)
+        server.jitter = RollingStats(1 << 20)
+        await asyncio.sleep(seconds)
+        timer_loop.cancel()
+        drainer.cancel()
+        writer.close()
+        return server.jitter.percentiles(99)[0] * 1000
+    return best_of(lambda: asyncio.run(run()))
+
+
+class NullWriter:
+    """Stand-in for a spectator's StreamWriter that keeps (or just counts) what it is sent"""
+    def __init__(self, keep=False):
+        self.data = bytearray() if keep else None
+        self.sent = 0
+        self.transport = self
+
+    def write(self, data):
+        self.sent += len(data)
+        if self.data is not None:
+            self.data += data
+
+    def get_write_buffer_size(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+def spectated_session(spectators, seed=0):
+    """Return a bot session with busy rules watched by spectators (NullWriters)"""
+    session = snake_server.Session(lambda data: None, cycle_policy())
+    session.new_game(20, 40, seed)
+    session.engine.bomb_spawn_chance = 0.2
+    session.engine.bonus_spawn_chance = 0.1
+    for writer in spectators:
+        session.watch(snake_server.Spectator(writer))
+    return session
+
+
+def check_spectators(ticks=1000):
+    """Check that a spectator rebuilding the board from frames sees every tick exactly"""
+    writer = NullWriter(keep=True)
+    session = spectated_session([writer])
+    server = snake_server.GameServer()
+    boards = []
+    for _ in range(ticks):
+        server.tick(session)
+        engine = session.engine
+        boards.append((engine.tick, bytes(engine.grid), engine.snake.head_index()))
+        if engine.game_over:
+            break
+
+    async def replay():
+        reader = asyncio.StreamReader()
+        reader.feed_data(bytes(writer.data))
+        reader.feed_eof()
+        mirror = snake_server.BoardMirror()
+        mirror.apply(await snake_server.read_frame(reader))  # The keyframe sent on joining
+        for tick, grid, head in boards:
+            frame = await snake_server.read_frame(reader)
+            mirror.apply(frame)
+            expect((frame['tick'], bytes(mirror.grid), mirror.head) == (tick, grid, head),
+                   "spectator board differs")
+    asyncio.run(replay())
+    return len(boards)
+
+
+def bench_broadcast(spectators, ticks=5000):
+    """Return microseconds per tick for a session watched by this many spectators"""
+    writers = [NullWriter() for _ in range(spectators)]
+    session = spectated_session(writers)
+    server = snake_server.GameServer()
+
+    def run():
+        start = time.perf_counter()
+        for _ in range(ticks):
+            server.tick(session)
+            if session.engine.game_over:
+                session.new_game(20, 40)
+        return (time.perf_counter() - start) / ticks * 1e6
+    return best_of(run)
+
+
+def bench_timer_floor(samples=1000):
+    """Return the p99 lateness in milliseconds of bare asyncio sleeps, the
+    scheduling noise of the machine that any server tick inherits"""
+    async def run():
+        loop = asyncio.get_running_loop()
+        rng = random.Random(0)
+        lateness = RollingStats(samples)
+        for _ in range(samples):
+            deadline = loop.time() + rng.uniform(0, 0.002)
+            await asyncio.sleep(deadline - loop.time())
+            lateness.add(loop.time() - deadline)
+        return lateness.percentiles(99)[0] * 1000
+    return best_of(lambda: asyncio.run(run()))
+
+
+def bench_server_capacity(limit_ms=5.0, start=250, most=64000, refine=2):
+    """Return the most bot sessions the loop hosts within limit_ms of p99 tick
+    lateness, and that lateness: double from start, then bisect `refine` times"""
+    best, best_p99 = 0, 0.0
+    failed = None
+    sessions = start
+    while sessions <= most:
+        p99 = bench_server(sessions)
+        if p99 > limit_ms:
+            failed = sessions
+            break
+        best, best_p99 = sessions, p99
+        sessions *= 2
+    for _ in range(refine if failed else 0):
+        sessions = (best + failed) // 2
+        p99 = bench_server(sessions)
+        if p99 > limit_ms:
+            failed = sessions
+        else:
+            best, best_p99 = sessions, p99
+    return best, best_p99
+
+
+# --- Scores ---------------------------------------------------------------
+
+def wait_idle(store, timeout=10.0):
+    """Wait for a ScoreStore's writer to finish what has been queued"""
+    deadline = time.monotonic() + timeout
+    while store.busy():
+        expect(time.monotonic() < deadline, "score writer did not finish")
+        time.sleep(0.001)
+
+
+def check_scores(games=30):
+    """Check saved games against the leaderboard cache and daily totals,
+    that top scores are read straight off the index, and that a database
+    that cannot be opened leaves the game running"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'scores.db')
+        store = snake_scores.ScoreStore(path)
+        expect(store.leaderboard(20, 40, 1.0) is None, "leaderboard known before it was read")
+        wait_idle(store)
+        expect(store.leaderboard(20, 40, 1.0) == (), "new database has scores")
+        played = []
+        for seed in range(games):
+            game = busy_game(seed, ticks=2000)
+            store.record(game)
+            played.append(game.score)
+        wait_idle(store)
+        expect(store.saved == games and store.error is None, f"saved {store.saved}: {store.error}")
+        # Shown boards are read again after every save
+        expected = sorted(played, reverse=True)[:snake_scores.LEADERBOARD_SIZE]
+        expect([row[0] for row in store.leaderboard(20, 40, 1.0)] == expected,
+               "cached leaderboard is stale")
+        store.close()
+
+        db = snake_scores.connect(path)
+        [(day, count, mean, best, ticks)] = snake_scores.daily_totals(db, '0000-00-00')
+        expect(count == games and best == max(played) and abs(mean - sum(played) / games) < 1e-9,
+               "daily totals differ")
+        plan = ' '.join(row[-1] for row in db.execute(
+            "EXPLAIN QUERY PLAN SELECT score FROM games WHERE height = 20 AND width = 40 "
+            "AND speed = 10 ORDER BY score DESC LIMIT 5"))
+        expect('games_top' in plan and 'TEMP B-TREE' not in plan, plan)
+        db.close()
+
+        broken = snake_scores.ScoreStore(os.path.join(directory, 'missing', 'scores.db'))
+        broken.record(busy_game(0, ticks=0))
+        broken.thread.join(5)
+        expect(broken.error is not None and not broken.busy(), "unwritable database not reported")
+
+
+def score_rows(count, seed=0):
+    """Return count rows of made-up games spread over boards, speeds and days"""
+    rng = random.Random(seed)
+    start = time.mktime((2026, 1, 1, 12, 0, 0, 0, 0, -1))
+    rows = []
+    for i in range(count):
+        played_at = start + i * 30
+        rows.append({'played_at': played_at, 'day': time.strftime('%Y-%m-%d', time.localtime(played_at)),
+                     'height': rng.choice((15, 20, 25)), 'width': rng.choice((30, 40, 60)),
+                     'speed': rng.choice((5, 10, 15, 20)), 'auto_speed': 1,
+                     'score': rng.randrange(500) * 10, 'length': rng.randrange(1, 200),
+                     'ticks': rng.randrange(10, 5000), 'seed': i, 'death': 'wall', 'won': 0})
+    return rows
+
+
+def bench_scores(count, queries=2000):
+    """Return games saved per second through a ScoreStore, microseconds per
+    record() call on the caller's side, and microseconds per top-5 and
+    three-day totals query, with count games in the database"""
+    rows = score_rows(count)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'scores.db')
+        store = snake_scores.ScoreStore(path)
+        game = busy_game(0, ticks=0)
+        wait_idle(store)
+        save = store.save
+        start = time.perf_counter()
+        for row in rows:
+            save(row)
+        wait_idle(store, timeout=600)
+        rate = count / (time.perf_counter() - start)
+        calls = 1000
+        start = time.perf_counter()
+        for _ in range(calls):
+            store.record(game)
+        record = (time.perf_counter() - start) / calls * 1e6
+        store.close()
+
+        db = snake_scores.connect(path)
+
+        def per_query(query):
+            def timed():
+                start = time.perf_counter()
+                for _ in range(queries):
+                    query()
+                return (time.perf_counter() - start) / queries * 1e6
+            return best_of(timed)
+        top = per_query(lambda: snake_scores.top_scores(db, 20, 40, 10))
+        first_day = time.strftime('%Y-%m-%d', time.localtime(rows[-1]['played_at'] - 2 * 86400))
+        days = per_query(lambda: snake_scores.daily_totals(db, first_day, rows[-1]['day']))
+        db.close()
+    return rate, record, top, days
+
+
+# --- Tournaments ----------------------------------------------------------
+
+def check_tournament(seeds=range(40)):
+    """Check that a tournament cut short and resumed writes the same results
+    as one played through, and that deaths carry their cause"""
+    with tempfile.TemporaryDirectory() as tmp:
+        whole, resumed = f"{tmp}/whole.jsonl", f"{tmp}/resumed.jsonl"
+        snake_tournament.run_tournament(['greedy', 'random'], ['', 'bomb_spawn_chance=0.05'],
+                                        seeds, whole, workers=2, chunk=7)
+        with open(whole, 'rb') as f:
+            data = f.read()
+        with open(resumed, 'wb') as f:
+            f.write(data[:len(data) // 3])  # Ends part way through a line
+        played = snake_tournament.run_tournament(['greedy', 'random'],
+                                                 ['', 'bomb_spawn_chance=0.05'],
+                                                 seeds, resumed, workers=2, chunk=7)
+        with open(resumed, 'rb') as f:
+            resumed_lines = f.read().splitlines()
+        expect(played < 4 * len(seeds), "resuming replayed finished games")
+        expect(sorted(resumed_lines) == sorted(data.splitlines()), "resumed tournament differs")
+        results = [json.loads(line) for line in resumed_lines]
+        expect(all(result['death'] in ('wall', 'self', 'bomb') for result in results),
+               "death without a cause")
+        expect(any(result['death'] == 'bomb' for result in results), "no bomb deaths")
+
+
+def bench_tournament(workers, games=400, chunk=20):
+    """Return greedy games per second played by a tournament on `workers` processes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        def run():
+            path = f"{tmp}/results.jsonl"
+            if os.path.exists(path):
+                os.remove(path)
+            start = time.perf_counter()
+            snake_tournament.run_tournament(['greedy'], [''], range(games), path,
+                                            workers=workers, chunk=chunk)
+            return time.perf_counter() - start
+        return games / best_of(run)
+
+
+# --- Replay analytics -----------------------------------------------------
+
+def record_games(directory, games, copies=1, max_ticks=5000):
+    """Play greedy games with plenty of bombs and bonus food and save each
+    one's recording `copies` times; return {path: finished engine}"""
+    os.makedirs(directory, exist_ok=True)
+    played = {}
+    for seed in range(games):
+        engine = SnakeEngine(20, 40, seed)
+        engine.bomb_spawn_chance = 0.05
+        engine.bonus_spawn_chance = 0.05
+        engine.generate_food()
+        recorder = snake_replay.Recorder(engine)
+        decide = snake_tournament.greedy_policy(seed)
+        while not engine.game_over and engine.tick < max_ticks:
+            action = decide(engine)
+            if action is not None:
+                engine.turn(action)
+            engine.move_snake()
+        data = snake_replay.encode(recorder.recording())
+        for copy in range(copies):
+            path = os.path.join(directory, f"game-{seed}-{copy}.snkr")
+            with open(path, 'wb') as f:
+                f.write(data)
+            played[path] = engine
+    return played
+
+
+def check_analytics(games=30):
+    """Check that analytics agree with the games as they were played, that
+    every point scored is accounted for as food or bonus food, and that a
+    process pool gives the same results in the same order"""
+    with tempfile.TemporaryDirectory() as tmp:
+        played = record_games(tmp, games // 2)
+        played.update(record_games(f"{tmp}/more", games - games // 2))
+        with open(f"{tmp}/broken.snkr", 'wb') as f:
+            f.write(b'SNKR\x02')
+        try:
+            os.symlink(tmp, f"{tmp}/more/loop", target_is_directory=True)  # Must not be walked
+        except OSError:
+            pass  # No symlinks here (e.g. Windows without the privilege)
+        serial = list(snake_analytics.analyze_all(
+            snake_analytics.find_recordings([tmp]), workers=1))
+        parallel = list(snake_analytics.analyze_all(
+            snake_analytics.find_recordings([tmp]), workers=2, chunk=4))
+    expect(serial == parallel, "process pool results differ")
+    summary = snake_analytics.Summary()
+    for result in serial:
+        summary.add(result)
+        if 'error' in result:
+            continue
+        engine = played[result['file']]
+        expect(result['matches'] and result['ticks'] == engine.tick, "replayed game differs")
+        expect(result['death'] == engine.death, "cause of death differs")
+        if engine.death:
+            expect(result['death_cell'] == [engine.snake[0][0] + engine.direction[0],
+                                            engine.snake[0][1] + engine.direction[1]],
+                   "death cell differs")
+        picked = [left for _, left in result['bonuses'] if left is not None]
+        expect(result['score'] == 10 * len(result['food_latency']) + 50 * len(picked),
+               "a food or bonus pickup was missed")
+        expect(all(latency > 0 for latency in result['food_latency']), "food eaten in no time")
+        expect(all(left is None or 0 < left < lifetime for lifetime, left in result['bonuses']),
+               "bonus food picked up outside its lifetime")
+        expect(all(engine.bonus_food_min_duration <= lifetime <= engine.bonus_food_max_duration
+                   for lifetime, _ in result['bonuses']), "bonus lifetime is not the duration given")
+    expect(summary.games == games and summary.errors == 1, "recordings missed or misread")
+    totals = summary.to_dict()
+    expect(sum(count for cells in totals['death_heatmaps'].values() for _, _, count in cells) ==
+           sum(count for cause, count in totals['deaths'].items() if cause != 'None'),
+           "heatmaps do not add up to the deaths")
+    expect(totals['near_misses'] > 0, "no bomb near misses")
+    expect(any(0 < row['picked'] < row['spawned'] for row in totals['bonus_pickup']),
+           "bonus pickups not counted")
+
+    # Bonus food still on the board at the end counts as spawned, whether
+    # the game was cut short or the snake crashed
+    engine = SnakeEngine(20, 40, 0)
+    engine.bonus_spawn_chance = 1.0
+    engine.bomb_spawn_chance = engine.early_removal_chance = 0.0
+    engine.generate_food()
+    recorder = snake_replay.Recorder(engine)
+    for moves in (5, 100):
+        for _ in range(moves):
+            engine.move_snake()
+        expect(engine.bonus_food is not None, "bonus food gone before the game ended")
+        result = snake_analytics.analyze(recorder.recording())
+        expect(len(result['bonuses']) == 1 and result['bonuses'][0][1] is None,
+               "bonus food left on the board not counted")
+    expect(engine.death == DEATH_WALL, "snake did not crash")
+
+
+def bench_analytics(workers, games=20, copies=10, chunk=20):
+    """Return recordings per second analyzed on `workers` processes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        record_games(tmp, games, copies)
+
+        def run():
+            start = time.perf_counter()
+            for _ in snake_analytics.analyze_all(snake_analytics.find_recordings([tmp]),
+                                                 workers, chunk):
+                pass
+            return time.perf_counter() - start
+        return games * copies / best_of(run)
+
+
+def bench_analytics_memory(count, games=10):
+    """Return the peak KiB allocated while streaming `count` recordings
+    into a summary"""
+    with tempfile.TemporaryDirectory() as tmp:
+        record_games(tmp, games, count // games)
+        summary = snake_analytics.Summary()
+        tracemalloc.start()
+        try:
+            for result in snake_analytics.analyze_all(snake_analytics.find_recordings([tmp]),
+                                                      workers=1):
+                summary.add(result)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return peak / 1024
+
+
+# --- Arena ----------------------------------------------------------------
+
+def check_arena(snakes=100, ticks=500):
+    """Check simultaneous collisions, determinism, that the owner grid
+    matches the snakes' bodies and that items last as long as in a game"""
+    def duel(first, second):
+        arena = Arena(10, 10, 0, seed=0, food=0)
+        arena.bomb_spawn_chance = arena.bonus_spawn_chance = 0
+        for cells, direction in (first, second):
+            arena.add_snake([y * 10 + x for y, x in cells], direction)
+        arena.step()
+        return [snake.death for snake in arena.snakes]
+    right, left = DIRECTIONS[1], DIRECTIONS[3]
+    # Two heads entering one cell both die, whichever was added first
+    expect(duel(([(5, 3)], right), ([(5, 5)], left)) == [DEATH_HEAD, DEATH_HEAD],
+           "heads meeting head on")
+    expect(duel(([(5, 5)], left), ([(5, 3)], right)) == [DEATH_HEAD, DEATH_HEAD],
+           "heads meeting head on, other order")
+    # Heads swapping cells hit each other's bodies
+    expect(duel(([(5, 3)], right), ([(5, 4)], left)) == [DEATH_SNAKE, DEATH_SNAKE],
+           "heads swapping cells")
+    # A tail counts until it has moved, as it does in a single game
+    expect(duel(([(5, 3)], right), ([(5, 5), (5, 4)], right)) == [DEATH_SNAKE, None],
+           "tail that has not moved yet")
+
+    def lifetimes(game, step, moves=12):
+        """Moves a bomb and a bonus food spawned on the first move stay on the board"""
+        game.bomb_spawn_chance = game.bonus_spawn_chance = 1.0
+        game.bomb_min_duration = game.bomb_max_duration = 5
+        game.bonus_food_min_duration = game.bonus_food_max_duration = 8
+        game.bomb_cooldown_time = game.bonus_cooldown_time = 1000
+        game.early_removal_chance = 0.0
+        bomb = bonus = 0
+        for _ in range(moves):
+            step()
+            bomb += bool(game.bombs)
+            bonus += game.bonus_food is not None
+        expect(not game.game_over, "snake crashed while timing items")
+        return bomb, bonus
+    engine = SnakeEngine(20, 40, 0)
+    engine.generate_food()
+    alone = Arena(20, 40, 1, seed=0, food=0)
+    expect(lifetimes(alone, alone.step) == lifetimes(engine, engine.move_snake),
+           "bombs or bonus food last longer in the arena than in a single game")
+
+    def play():
+        arena = Arena(60, 120, snakes, seed=3)
+        bots = Bots(3)
+        for _ in range(ticks):
+            arena.step(bots.actions(arena))
+        return arena
+    arena = play()
+    owned = [index for index, who in enumerate(arena.owner) if who >= 0]
+    expect(sorted(owned) == sorted(index for snake in arena.live for index in snake.body.indices()),
+           "owner grid differs from the bodies")
+    expect(all(arena.owner[index] == snake.id for snake in arena.live
+               for index in snake.body.indices()), "owner grid names the wrong snake")
+    again = play()
+    expect(again.owner == arena.owner and again.grid == arena.grid, "arena is not deterministic")
+    expect([snake.score for snake in again.snakes] == [snake.score for snake in arena.snakes],
+           "arena scores are not deterministic")
+
+
+def bench_arena(snakes, height=200, width=400, ticks=300):
+    """Return the mean cost in microseconds of one arena tick with bots
+    steering every snake, and the snakes still alive at the end. Only the
+    tick is timed, not the bots' decisions."""
+    def run():
+        arena = Arena(height, width, snakes, seed=1)
+        bots = Bots(1)
+        elapsed = 0.0
+        for _ in range(ticks):
+            actions = bots.actions(arena)
+            start = time.perf_counter()
+            arena.step(actions)
+            elapsed += time.perf_counter() - start
+        return elapsed / ticks * 1e6, len(arena.live)
+    return min(run() for _ in range(REPEATS))
+
+
+# --- Startup --------------------------------------------------------------
+
+def bench_startup(runs=7):
+    """Return the median time in milliseconds to start Python and import snake_game"""
+    def median(code):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True)
+            times.append(time.perf_counter() - start)
+        return sorted(times)[len(times) // 2] * 1000
+    return median('import snake_game'), median('pass')
+
+
+def bench_first_frame(runs=5):
+    """Return the median time-to-first-frame in milliseconds the game logs
+    when snake_game_launcher.py runs it in a pseudo-terminal, or None
+    where there are no pseudo-terminals"""
+    try:
+        import pty
+    except ImportError:
+        return None
+    import fcntl
+    import struct
+    import termios
+    times = []
+    with tempfile.TemporaryDirectory() as directory:
+        log = os.path.join(directory, 'startup.jsonl')
+        launcher = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snake_game_launcher.py')
+        for _ in range(runs):
+            pid, fd = pty.fork()
+            if pid == 0:
+                os.environ['TERM'] = 'xterm'
+                os.execv(sys.executable, [sys.executable, launcher, '--here', '--scores', '',
+                                          '--startup-log', log])
+            fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack('HHHH', 45, 120, 0, 0))
+            deadline = time.monotonic() + 10
+            count = len(times)
+            # Keep the terminal drained until the frame is logged
+            while len(times) == count and time.monotonic() < deadline:
+                try:
+                    os.read(fd, 1 << 16)
+                except OSError:
+                    break
+                if os.path.exists(log):
+                    with open(log) as f:
+                        lines = f.read().splitlines()
+                    if len(lines) > count:
+                        times.append(json.loads(lines[-1])['first_frame_ms'])
+            os.write(fd, b'q')
+            while True:
+                try:
+                    if not os.read(fd, 1 << 16):
+                        break
+                except OSError:
+                    break
+            os.waitpid(pid, 0)
+            os.close(fd)
+    return sorted(times)[len(times) // 2] if times else None
+
+
+# --- Vector engine --------------------------------------------------------
+
+def check_vector_parity(ticks=20000, seed=0, height=12, width=20):
+    """Step the scalar and vector engines side by side and compare them each tick.
+
+    Spawning is made certain and early removal impossible so both engines
+    make the same decisions; the cells and durations the vector engine picks
+    at random are then copied into the scalar engine before comparing.
+    """
+    def configure(engine):
+        engine.bomb_spawn_chance = 1.0
+        engine.bonus_spawn_chance = 1.0
+        engine.bomb_cooldown_time = 7
+        engine.bonus_cooldown_time = 11
+        engine.early_removal_chance = 0.0
+
+    vec = snake_vector.VectorSnakeEngine(1, height, width, seed=seed, auto_reset=False)
+    configure(vec)
+
+    def new_game():
+        game = SnakeEngine(height, width)
+        configure(game)
+        game.set_food(divmod(int(vec.food[0]), width))
+        return game
+
+    game = new_game()
+    rng = random.Random(seed)
+    games = 1
+    for _ in range(ticks):
+        action = safe_action(game, rng)
+        game.step(action)
+        vec.step([-1 if action is None else action])
+
+        # Copy the random placements of this tick
+        if vec.food[0] >= 0 and game.food != divmod(int(vec.food[0]), width):
+            game.set_food(divmod(int(vec.food[0]), width))
+        bombs = sorted((divmod(int(cell), width), int(timer))
+                       for cell, timer in zip(vec.bombs[0], vec.bomb_timers[0]) if cell >= 0)
+        expect(len(game.bombs) == len(bombs), "bomb count differs")
+        for pos in list(game.bombs):
+            game.remove_bomb(pos)
+        for pos, timer in bombs:
+            game.place_bomb(pos, timer)
+        bonus = int(vec.bonus_food[0])
+        expect((game.bonus_food is None) == (bonus < 0), "bonus food differs")
+        if bonus >= 0:
+            game.set_bonus_food(divmod(bonus, width))
+            game.bonus_food_timer = int(vec.bonus_food_timer[0])
+
+        expect(game.game_over == bool(vec.game_over[0]), "game over differs")
+        expect(game.score == vec.score[0], "score differs")
+        expect(list(game.snake) == vec.snake_cells(0), "snake differs")
+        expect(game.bomb_cooldown == vec.bomb_cooldown[0], "bomb cooldown differs")
+        expect(game.bonus_cooldown == vec.bonus_cooldown[0], "bonus cooldown differs")
+        expect(abs(game.base_speed - vec.base_speed[0]) < 1e-9, "speed differs")
+        expect(bytes(game.grid) == vec.grid[0].tobytes(), "occupancy differs")
+
+        if game.game_over:
+            vec.reset_envs(vec.env_ids)
+            game = new_game()
+            games += 1
+    return games
+
+
+def check_vector_timers(ticks=20000, seed=1, height=12, width=20):
+    """Step the scalar and vector engines side by side with early removal on
+    and each engine counting down its own bomb and bonus food timers.
+
+    The check decides on every tick whether bombs and bonus food spawn and
+    whether early removal happens, by setting those chances to 0 or 1 on
+    both engines; early removal only happens with at most one bomb to pick
+    from. Only the cells and durations of newly placed items are copied
+    into the scalar engine. Returns the number of early removals and timer
+    expiries compared.
+    """
+    def configure(engine):
+        engine.bomb_cooldown_time = 40
+        engine.bonus_cooldown_time = 11
+
+    vec = snake_vector.VectorSnakeEngine(1, height, width, seed=seed, auto_reset=False)
+    configure(vec)
+
+    def new_game():
+        game = SnakeEngine(height, width)
+        configure(game)
+        game.set_food(divmod(int(vec.food[0]), width))
+        return game
+
+    def vec_bombs():
+        return {divmod(int(cell), width): int(timer)
+                for cell, timer in zip(vec.bombs[0], vec.bomb_timers[0]) if cell >= 0}
+
+    game = new_game()
+    rng = random.Random(seed)
+    removals = expiries = 0
+    for _ in range(ticks):
+        early = len(game.bombs) <= 1 and rng.random() < 0.05
+        chances = {'bomb_spawn_chance': float(rng.random() < 0.3 and not (early and game.bombs)),
+                   'bonus_spawn_chance': float(rng.random() < 0.3),
+                   'early_removal_chance': float(early)}
+        for engine in (game, vec):
+            for name, chance in chances.items():
+                setattr(engine, name, chance)
+        # Countdowns left before the move, to tell expiries from early removals
+        bombs = {pos: game.bomb_timer(pos) for pos in game.bombs}
+        bonus, bonus_left = game.bonus_food, game.bonus_food_timer
+        action = safe_action(game, rng)
+        game.step(action)
+        vec.step([-1 if action is None else action])
+
+        # Copy the random placements of this tick, and nothing else
+        if vec.food[0] >= 0 and game.food != divmod(int(vec.food[0]), width):
+            game.set_food(divmod(int(vec.food[0]), width))
+        placed = [pos for pos in game.bombs if pos not in bombs]
+        vec_placed = [(pos, timer) for pos, timer in vec_bombs().items() if pos not in bombs]
+        expect(len(placed) == len(vec_placed), "bomb spawns differ")
+        for pos in placed:
+            game.remove_bomb(pos)
+        for pos, timer in vec_placed:
+            game.place_bomb(pos, timer)
+        if game.bonus_food is not None and game.bonus_food != bonus:
+            expect(vec.bonus_food[0] >= 0, "bonus food spawns differ")
+            game.set_bonus_food(divmod(int(vec.bonus_food[0]), width))
+            game.bonus_food_timer = int(vec.bonus_food_timer[0])
+
+        if not game.game_over:
+            gone = [left for pos, left in bombs.items() if pos not in game.bombs]
+            if bonus is not None and game.bonus_food != bonus and game.snake[0] != bonus:
+                gone.append(bonus_left)
+            expiries += sum(left == 1 for left in gone)
+            removals += sum(left > 1 for left in gone)
+
+        expect(vec_bombs() == {pos: game.bomb_timer(pos) for pos in game.bombs},
+               "bombs or their timers differ")
+        expect((game.bonus_food, game.bonus_food_timer) ==
+               ((None, 0) if vec.bonus_food[0] < 0 else
+                (divmod(int(vec.bonus_food[0]), width), int(vec.bonus_food_timer[0]))),
+               "bonus food or its timer differs")
+        expect(game.game_over == bool(vec.game_over[0]), "game over differs")
+        expect(game.score == vec.score[0], "score differs")
+        expect(list(game.snake) == vec.snake_cells(0), "snake differs")
+        expect(game.bomb_cooldown == vec.bomb_cooldown[0], "bomb cooldown differs")
+        expect(game.bonus_cooldown == vec.bonus_cooldown[0], "bonus cooldown differs")
+        expect(bytes(game.grid) == vec.grid[0].tobytes(), "occupancy differs")
+
+        if game.game_over:
+            vec.reset_envs(vec.env_ids)
+            game = new_game()
+    expect(removals and expiries, "early removal or timer expiry never happened")
+    return removals, expiries
+
+
+def bench_vector(num_envs=1024, ticks=300, height=20, width=40):
+    """Return vector engine throughput in env-steps per second"""
+    def run():
+        vec = snake_vector.VectorSnakeEngine(num_envs, height, width, seed=0)
+        rng = snake_vector.np.random.default_rng(0)
+        actions = rng.integers(-1, 4, size=(ticks, num_envs))
+        start = time.perf_counter()
+        for tick_actions in actions:
+            vec.step(tick_actions)
+        return (time.perf_counter() - start) / (num_envs * ticks)
+    return 1 / best_of(run)
+
+
+def bench_autopilot(games=3, ticks=5000, height=20, width=40):
+    """Play seeded games with the autopilot.
+
+    Returns the mean and worst decision time in microseconds and the mean
+    score reached within ticks.
+    """
+    total = worst = 0.0
+    decisions = score = 0
+    for seed in range(games):
+        autopilot = Autopilot()
+        game = SnakeEngine(height, width, seed)
+        game.generate_food()
+        while not game.game_over and game.tick < ticks:
+            action = autopilot.decide(game)
+            if action is not None:
+                game.turn(action)
+            game.move_snake()
+        total += autopilot.total_time
+        decisions += autopilot.decisions
+        worst = max(worst, autopilot.max_time)
+        score += game.score
+    return total / decisions * 1e6, worst * 1e6, score / games
+
+
+# --- Runner ---------------------------------------------------------------
+
+# Which way a result should move, yielded by the groups after its unit
+HIGHER = 'higher'  # Rates, scores and how much fits
+LOWER = 'lower'  # Times, sizes and work done
+
+def group_tick():
+    for length in (1, 100, 1000):
+        yield f"tick/length={length}", bench_tick(length), "us", LOWER
+    yield "tick/step_many", bench_step_many(), "ticks/s", HIGHER
+
+
+def group_input():
+    check_turn_queue()
+    yield "input/turn_queue", bench_turn_queue(), "us", LOWER
+
+
+def group_spawn():
+    for fill in (0.1, 0.5, 0.95, 0.99):
+        yield f"spawn/fill={fill:.0%}", bench_spawn(fill), "us", LOWER
+
+
+def group_draw():
+    cost, writes = bench_draw()
+    yield "draw/frame", cost, "us", LOWER
+    yield "draw/frame_writes", writes, "cells", LOWER
+    cost, writes = bench_draw(frames=200, full=True)
+    yield "draw/full_repaint", cost, "us", LOWER
+    yield "draw/full_repaint_writes", writes, "cells", LOWER
+
+
+def group_ansi():
+    check_ansi()
+    cost, size, writes, _ = bench_ansi()
+    yield "ansi/frame", cost, "us", LOWER
+    yield "ansi/frame_bytes", size, "bytes", LOWER
+    yield "ansi/frame_writes", writes, "writes", LOWER
+    cost, size, _, _ = bench_ansi(frames=200, full=True)
+    yield "ansi/full_repaint", cost, "us", LOWER
+    yield "ansi/full_repaint_bytes", size, "bytes", LOWER
+    # Score and length updates wait for a frame with room to spare
+    yield "ansi/budget=64/largest_frame", bench_ansi(budget=64)[3], "bytes", LOWER
+
+
+def group_timers():
+    for items in (3, 30, 300, 3000):
+        yield f"timers/items={items}", bench_timers(items), "us", LOWER
+
+
+def group_startup():
+    total, interpreter = bench_startup()
+    yield "startup/import_snake_game", total, "ms", LOWER
+    yield "startup/import_only", total - interpreter, "ms", LOWER
+    first_frame = bench_first_frame()
+    if first_frame is not None:
+        yield "startup/first_frame", first_frame, "ms", LOWER
+
+
+def group_vector():
+    if snake_vector is None:
+        print("  skipped: NumPy is not installed")
+        return
+    check_vector_parity()
+    check_vector_timers()
+    for num_envs in (1, 1024, 8192):
+        yield f"vector/envs={num_envs}", bench_vector(num_envs), "env-steps/s", HIGHER
+
+
+def group_large():
+    for height, width in ((40, 80), (1000, 1000)):
+        yield f"large/tick/{height}x{width}", bench_large_tick(1000, height, width), "us", LOWER
+    yield "large/body_memory", bench_body_memory(), "B/segment", LOWER
+    engine_bytes = bench_memory(lambda: SnakeEngine(1000, 1000))
+    yield "large/engine_memory/1000x1000", engine_bytes / 2 ** 20, "MiB", LOWER
+    cost, writes = bench_draw(1000, height=1000, width=1000, cycle=LARGE_TRACK)
+    yield "large/draw/frame", cost, "us", LOWER
+    yield "large/draw/frame_writes", writes, "cells", LOWER
+
+
+def group_state():
+    check_snapshots()
+    snapshot, restore, to_bytes, from_bytes, size = bench_snapshot()
+    yield "state/snapshot", snapshot, "us", LOWER
+    yield "state/restore", restore, "us", LOWER
+    yield "state/to_bytes", to_bytes, "us", LOWER
+    yield "state/from_bytes", from_bytes, "us", LOWER
+    yield "state/blob_size", size, "bytes", LOWER
+    yield "state/resize", bench_resize(), "us", LOWER
+
+
+def group_observation():
+    check_observation()
+    for height, width in ((40, 80), (1000, 1000)):
+        plain, observed, rebuilt = bench_observation(height, width)
+        # The extra cost of a move stays flat as the board grows
+        yield f"observation/overhead/{height}x{width}", observed - plain, "us", LOWER
+        yield f"observation/rebuild/{height}x{width}", rebuilt, "us", LOWER
+
+
+def group_rewind():
+    check_rewind()
+    yield "rewind/record", bench_rewind_record(), "us/tick", LOWER
+    for seconds in (0.5, 30):
+        yield f"rewind/back_{seconds}s", bench_rewind(seconds), "us", LOWER
+    for height, width in ((20, 40), (1000, 1000)):
+        memory, window = bench_rewind_memory(height, width)
+        yield f"rewind/memory/{height}x{width}", memory, "KiB", LOWER
+        yield f"rewind/window/{height}x{width}", window, "ticks", HIGHER
+
+
+def group_server():
+    check_server()
+    # The server runs on one event loop, so this is the count for one core
+    sessions, p99 = bench_server_capacity()
+    yield "server/sessions_per_core", sessions, "sessions", HIGHER
+    yield "server/p99_jitter", p99, "ms", LOWER
+    yield "server/p99_jitter/1000", bench_server(1000), "ms", LOWER
+    yield "server/p99_jitter/timer_floor", bench_timer_floor(), "ms", LOWER
+    check_spectators()
+    # Encoding happens once per tick; each extra spectator only adds its write
+    for spectators in (0, 1, 1000):
+        yield f"server/tick/spectators={spectators}", bench_broadcast(spectators), "us", LOWER
+
+
+def group_scores():
+    check_scores()
+    for count in (10000, 200000):
+        rate, record, top, days = bench_scores(count)
+        yield f"scores/saved/{count}_games", rate, "games/s", HIGHER
+        # Flat as the table grows when the queries stay on their indexes
+        yield f"scores/top5/{count}_games", top, "us", LOWER
+        yield f"scores/daily/{count}_games", days, "us", LOWER
+    yield "scores/record_call", record, "us", LOWER
+
+
+def group_tournament():
+    check_tournament()
+    serial = bench_tournament(1)
+    yield "tournament/games/1_worker", serial, "games/s", HIGHER
+    cores = os.cpu_count()
+    if cores > 1:
+        # Close to `cores` when work units are large enough to hide the IPC
+        parallel = bench_tournament(cores)
+        yield f"tournament/games/{cores}_workers", parallel, "games/s", HIGHER
+        yield "tournament/scaling", parallel / serial, "x", HIGHER
+    yield "tournament/games/chunk=1", bench_tournament(1, chunk=1), "games/s", HIGHER
+
+
+def group_analytics():
+    check_analytics()
+    serial = bench_analytics(1)
+    yield "analytics/games/1_worker", serial, "games/s", HIGHER
+    cores = os.cpu_count()
+    if cores > 1:
+        yield f"analytics/games/{cores}_workers", bench_analytics(cores), "games/s", HIGHER
+    # Flat as the number of recordings grows when nothing is held per game
+    for count in (100, 1000):
+        yield (f"analytics/peak_memory/{count}_recordings", bench_analytics_memory(count),
+               "KiB", LOWER)
+
+
+def group_arena():
+    check_arena()
+    for snakes in (50, 500):
+        cost, alive = bench_arena(snakes)
+        yield f"arena/tick/snakes={snakes}", cost, "us", LOWER
+        # Flat when collisions are O(1) per snake
+        yield f"arena/per_snake/snakes={snakes}", cost / snakes, "us", LOWER
+    yield "arena/alive/snakes=500", alive, "snakes", HIGHER
+
+
+def group_autopilot():
+    for height, width in ((20, 40), (30, 80)):
+        mean, worst, score = bench_autopilot(height=height, width=width)
+        yield f"autopilot/{height}x{width}/decision", mean, "us", LOWER
+        yield f"autopilot/{height}x{width}/worst", worst, "us", LOWER
+        yield f"autopilot/{height}x{width}/score", score, "points", HIGHER
+
+
+GROUPS = {
+    'tick': group_tick,
+    'input': group_input,
+    'spawn': group_spawn,
+    'draw': group_draw,
+    'ansi': group_ansi,
+    'timers': group_timers,
+    'startup': group_startup,
+    'vector': group_vector,
+    'autopilot': group_autopilot,
+    'large': group_large,
+    'state': group_state,
+    'observation': group_observation,
+    'rewind': group_rewind,
+    'server': group_server,
+    'scores': group_scores,
+    'tournament': group_tournament,
+    'analytics': group_analytics,
+    'arena': group_arena,
+}
+
+
+def run(groups):
+    """Run the selected benchmark groups and return {name: {value, unit, better}}"""
+    results = {}
+    for group in groups:
+        print(f"{group}:")
+        for name, value, unit, better in GROUPS[group]():
+            results[name] = {'value': value, 'unit': unit, 'better': better}
+            print(f"  {name:28} {value:14,.2f} {unit}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change against a baseline and return the names that regressed"""
+    regressions = []
+    print(f"compared with baseline (threshold {threshold:.0%}):")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]['value'], result['value']
+        if old == 0:
+            continue
+        change = (new - old) / old
+        worse = -change if result['better'] == HIGHER else change
+        flag = ""
+        if worse > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:28} {old:14,.2f} -> {new:14,.2f} {result['unit']:12} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snake game benchmarks")
+    parser.add_argument('--only', nargs='+', choices=list(GROUPS), metavar='GROUP',
+                        help=f"groups to run ({', '.join(GROUPS)})")
+    parser.add_argument('--output', metavar='FILE', help="write results as JSON")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="compare with a JSON file written by --output")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default 0.2)")
+    args = parser.parse_args()
+
+    results = run(args.only or list(GROUPS))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results,
+            }, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
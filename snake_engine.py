@@ -0,0 +1,1014 @@
+"""
+Snake Game Engine
+Headless simulation core shared by the terminal game, bots and benchmarks
+"""
+
+import math
+import random
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+from itertools import islice
+
+# Abstract direction actions
+UP = 0
+RIGHT = 1
+DOWN = 2
+LEFT = 3
+DIRECTIONS = ((-1, 0), (0, 1), (1, 0), (0, -1))  # (y, x) offset per action
+
+# Input codes logged in SnakeEngine.inputs; turns use their action value
+INPUT_AUTO_SPEED = 4
+INPUT_SPEED = 5
+INPUT_RESIZE = 6  # Value is height << 16 | width
+
+# Occupancy flags stored per cell in SnakeEngine.grid
+CELL_SNAKE = 1
+CELL_FOOD = 2
+CELL_BONUS = 4
+CELL_BOMB = 8
+
+# What ended a game, in SnakeEngine.death
+DEATH_WALL = 'wall'
+DEATH_SELF = 'self'
+DEATH_BOMB = 'bomb'
+
+class FreeCells:
+    """Pool of free cell indices with O(1) uniform sampling.
+
+    Cells live in a dense array; `where` maps each cell index to its slot in
+    that array (or -1), so taking a cell is a swap-remove with the last slot.
+    Both are arrays of 4-byte ints, built a row at a time.
+    """
+    def __init__(self, height, width):
+        self.cells = array('i')
+        self.where = array('i', [-1]) * (height * width)
+        row = width - 2
+        for y in range(1, height - 1):
+            start = y * width + 1
+            self.where[start:start + row] = array('i', range(len(self.cells), len(self.cells) + row))
+            self.cells.extend(range(start, start + row))
+    
+    def __len__(self):
+        return len(self.cells)
+    
+    def __contains__(self, index):
+        return self.where[index] >= 0
+    
+    def take(self, index):
+        """Remove a cell from the pool"""
+        slot = self.where[index]
+        last = self.cells.pop()
+        if last != index:
+            self.cells[slot] = last
+            self.where[last] = slot
+        self.where[index] = -1
+    
+    def put(self, index):
+        """Return a cell to the pool"""
+        self.where[index] = len(self.cells)
+        self.cells.append(index)
+    
+    def copy(self):
+        free = FreeCells.__new__(FreeCells)
+        free.cells = self.cells[:]
+        free.where = self.where[:]
+        return free
+    
+    @classmethod
+    def from_cells(cls, cells, size):
+        """Rebuild a pool holding cells, in that slot order, on a board of size cells"""
+        free = FreeCells.__new__(FreeCells)
+        free.cells = array('i', cells)
+        free.where = array('i', [-1]) * size
+        for slot, index in enumerate(free.cells):
+            free.where[index] = slot
+        return free
+    
+    def sample(self, rng):
+        """Return a uniformly random free cell index, or None if the board is full"""
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+class RingBody:
+    """Snake body stored as packed cell indices (y * width + x), head first.
+
+    A ring buffer in an array of 4-byte ints that doubles when full, so each
+    segment costs 4 bytes. Indexing and iteration still give (y, x) tuples,
+    and the *_index methods work on packed indices directly.
+    """
+    def __init__(self, width, cells=(), capacity=16):
+        self.width = width
+        self.slots = array('i', [0]) * capacity
+        self.head = 0  # Slot of the head segment
+        self.length = 0
+        for pos in cells:
+            self.append(pos)
+    
+    def __len__(self):
+        return self.length
+    
+    def __iter__(self):
+        for index in self.indices():
+            yield divmod(index, self.width)
+    
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError("snake index out of range")
+        return divmod(self.slots[(self.head + i) % len(self.slots)], self.width)
+    
+    def indices(self):
+        """Iterate over the packed cell indices from head to tail"""
+        slots, head = self.slots, self.head
+        end = head + self.length
+        if end <= len(slots):
+            return iter(slots[head:end])
+        return iter(slots[head:] + slots[:end - len(slots)])
+    
+    def head_index(self):
+        return self.slots[self.head]
+    
+    def tail_index(self):
+        return self.slots[(self.head + self.length - 1) % len(self.slots)]
+    
+    def push_head_index(self, index):
+        """Add a new head segment"""
+        if self.length == len(self.slots):
+            self.grow()
+        self.head = (self.head - 1) % len(self.slots)
+        self.slots[self.head] = index
+        self.length += 1
+    
+    def pop_tail_index(self):
+        """Remove the tail segment and return its index"""
+        index = self.tail_index()
+        self.length -= 1
+        return index
+    
+    def appendleft(self, pos):
+        self.push_head_index(pos[0] * self.width + pos[1])
+    
+    def append(self, pos):
+        """Add a segment after the tail"""
+        if self.length == len(self.slots):
+            self.grow()
+        self.slots[(self.head + self.length) % len(self.slots)] = pos[0] * self.width + pos[1]
+        self.length += 1
+    
+    def pop(self):
+        """Remove the tail segment and return it as (y, x)"""
+        return divmod(self.pop_tail_index(), self.width)
+    
+    def clear(self):
+        self.head = self.length = 0
+    
+    def copy(self):
+        body = RingBody(self.width, capacity=0)
+        body.slots = self.slots[:]
+        body.head = self.head
+        body.length = self.length
+        return body
+    
+    def grow(self):
+        """Double the capacity, unrolling the ring so the head is in slot 0"""
+        slots = array('i', self.indices())
+        slots += array('i', [0]) * (2 * len(self.slots) - len(slots))
+        self.slots = slots
+        self.head = 0
+
+# Timer keys besides bomb positions
+BONUS_TIMER = 'bonus'
+BOMB_COOLDOWN = 'bomb_cooldown'
+BONUS_COOLDOWN = 'bonus_cooldown'
+
+class TimerWheel:
+    """Absolute expiry ticks for bombs, bonus food and cooldowns.
+    
+    Keys are bucketed by the tick they expire on, so advancing a tick only
+    touches the keys due then, however many are pending. Rescheduling or
+    cancelling a key leaves its old bucket entry behind, to be skipped
+    when that tick comes.
+    """
+    def __init__(self):
+        self.now = 0  # Last tick whose expiries were collected
+        self.expiry = {}  # key -> tick
+        self.buckets = {}  # tick -> keys, in the order they were scheduled
+    
+    def __contains__(self, key):
+        return key in self.expiry
+    
+    def get(self, key, default=None):
+        """Return the tick key expires on"""
+        return self.expiry.get(key, default)
+    
+    def schedule(self, key, tick):
+        """Expire key on tick (which must be after now), replacing any earlier expiry"""
+        # Re-insert so the mapping stays in scheduling order
+        self.expiry.pop(key, None)
+        self.expiry[key] = tick
+        self.buckets.setdefault(tick, []).append(key)
+    
+    def cancel(self, key):
+        self.expiry.pop(key, None)
+    
+    def advance(self, tick):
+        """Move to tick and return the keys expiring on it, oldest schedule first"""
+        self.now = tick
+        due = []
+        for key in self.buckets.pop(tick, ()):
+            if self.expiry.get(key) == tick:
+                del self.expiry[key]
+                due.append(key)
+        return due
+    
+    def copy(self):
+        """Return an independent wheel with the same live timers"""
+        return TimerWheel.from_expiry(self.now, self.expiry)
+    
+    @classmethod
+    def from_expiry(cls, now, expiry):
+        """Build a wheel from a key -> tick mapping, keeping its order within each tick"""
+        wheel = cls()
+        wheel.now = now
+        for key, tick in expiry.items():
+            wheel.schedule(key, tick)
+        return wheel
+    
+    def due_within(self, ticks):
+        """Return the keys expiring in the next `ticks` ticks"""
+        expiry = self.expiry
+        return [key for tick in range(self.now + 1, self.now + ticks + 1)
+                for key in self.buckets.get(tick, ()) if expiry.get(key) == tick]
+
+# Saved game format: header, RNG state, then the variable-length parts
+STATE_MAGIC = b'SNKS'
+STATE_VERSION = 1
+STATE_HEADER = struct.Struct('<4sBHHIIBBiidddI')
+STATE_RNG = struct.Struct('<625Id')
+STATE_COUNT = struct.Struct('<I')
+STATE_TIMER = struct.Struct('<BiI')  # kind, bomb cell or -1, expiry tick
+TIMER_KINDS = (BONUS_TIMER, BOMB_COOLDOWN, BONUS_COOLDOWN)  # Kinds 1-3; 0 is a bomb
+STATE_FLAGS = ('game_over', 'won', 'paused', 'auto_speed_increase')
+DEATHS = (None, DEATH_WALL, DEATH_SELF, DEATH_BOMB)  # Stored in bits 4-5 of the flags
+
+class EngineState:
+    """Everything a game changes while it is played, copied out of a SnakeEngine.
+    
+    The board arrays, snake ring and timers are copied with slice copies,
+    so snapshot() and restore() cost microseconds on a normal board. Rules
+    such as spawn chances are not included. to_bytes() gives a compact
+    blob for saving to disk; the grid is rebuilt from the items on load.
+    """
+    __slots__ = ('height', 'width', 'tick', 'rng_state', 'snake', 'grid', 'free',
+                 'direction', 'food', 'bonus_food', 'bombs', 'timers', 'score',
+                 'game_over', 'won', 'death', 'paused', 'speed', 'base_speed',
+                 'speed_multiplier', 'auto_speed_increase', 'inputs')
+    
+    def to_bytes(self):
+        """Encode the state as bytes"""
+        width = self.width
+        food = -1 if self.food is None else self.food[0] * width + self.food[1]
+        bonus = -1 if self.bonus_food is None else self.bonus_food[0] * width + self.bonus_food[1]
+        flags = sum(1 << bit for bit, name in enumerate(STATE_FLAGS) if getattr(self, name))
+        flags |= DEATHS.index(self.death) << 4
+        out = bytearray(STATE_HEADER.pack(
+            STATE_MAGIC, STATE_VERSION, self.height, width, self.tick, self.score,
+            flags, DIRECTIONS.index(self.direction), food, bonus,
+            self.speed, self.base_speed, self.speed_multiplier, self.timers.now))
+        _, words, gauss = self.rng_state
+        out += STATE_RNG.pack(*words, math.nan if gauss is None else gauss)
+        for cells in (array('i', self.snake.indices()), self.free.cells,
+                      array('i', (y * width + x for y, x in self.bombs))):
+            out += STATE_COUNT.pack(len(cells))
+            out += cells.tobytes()
+        out += STATE_COUNT.pack(len(self.timers.expiry))
+        for key, tick in self.timers.expiry.items():
+            if key in TIMER_KINDS:
+                out += STATE_TIMER.pack(TIMER_KINDS.index(key) + 1, -1, tick)
+            else:
+                out += STATE_TIMER.pack(0, key[0] * width + key[1], tick)
+        return bytes(out)
+    
+    def nbytes(self):
+        """Approximate memory held by the state, in bytes"""
+        words = self.rng_state[1]
+        return (sum(map(sys.getsizeof, (self.grid, self.free.cells, self.free.where,
+                                        self.snake.slots, self.bombs, self.timers.expiry,
+                                        self.timers.buckets, words)))
+                + len(words) * sys.getsizeof(1 << 31))  # The RNG words are 32-bit ints
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """Decode bytes written by to_bytes"""
+        (magic, version, height, width, tick, score, flags, action, food, bonus,
+         speed, base_speed, speed_multiplier, now) = STATE_HEADER.unpack_from(data)
+        if magic != STATE_MAGIC:
+            raise ValueError("not a saved snake game")
+        if version != STATE_VERSION:
+            raise ValueError(f"unsupported saved game version {version}")
+        state = cls()
+        state.height, state.width = height, width
+        state.tick, state.score = tick, score
+        for bit, name in enumerate(STATE_FLAGS):
+            setattr(state, name, bool(flags >> bit & 1))
+        state.death = DEATHS[flags >> 4 & 3]
+        state.direction = DIRECTIONS[action]
+        state.food = None if food < 0 else divmod(food, width)
+        state.bonus_food = None if bonus < 0 else divmod(bonus, width)
+        state.speed, state.base_speed, state.speed_multiplier = speed, base_speed, speed_multiplier
+        pos = STATE_HEADER.size
+        *words, gauss = STATE_RNG.unpack_from(data, pos)
+        state.rng_state = (3, tuple(words), None if math.isnan(gauss) else gauss)
+        pos += STATE_RNG.size
+        
+        parts = []
+        for _ in range(3):
+            count, = STATE_COUNT.unpack_from(data, pos)
+            pos += STATE_COUNT.size
+            cells = array('i')
+            cells.frombytes(data[pos:pos + 4 * count])
+            parts.append(cells)
+            pos += 4 * count
+        snake, free, bombs = parts
+        state.snake = RingBody(width, capacity=max(16, len(snake)))
+        for index in snake:
+            state.snake.append(divmod(index, width))
+        state.free = FreeCells.from_cells(free, height * width)
+        state.bombs = dict.fromkeys(divmod(index, width) for index in bombs)
+        
+        count, = STATE_COUNT.unpack_from(data, pos)
+        pos += STATE_COUNT.size
+        expiry = {}
+        for kind, index, expires in STATE_TIMER.iter_unpack(data[pos:pos + count * STATE_TIMER.size]):
+            expiry[TIMER_KINDS[kind - 1] if kind else divmod(index, width)] = expires
+        state.timers = TimerWheel.from_expiry(now, expiry)
+        
+        # The grid follows from the items
+        grid = state.grid = bytearray(height * width)
+        for index in snake:
+            grid[index] |= CELL_SNAKE
+        for index in bombs:
+            grid[index] |= CELL_BOMB
+        if food >= 0:
+            grid[food] |= CELL_FOOD
+        if bonus >= 0:
+            grid[bonus] |= CELL_BONUS
+        state.inputs = None
+        return state
+
+# Observation planes, in channel order
+OBS_BODY = 0
+OBS_HEAD = 1
+OBS_FOOD = 2
+OBS_BONUS = 3  # Countdowns left on the bonus food
+OBS_BOMB = 4  # Countdowns left on each bomb
+OBS_CHANNELS = 5
+OBS_PLANES = {CELL_SNAKE: OBS_BODY, CELL_FOOD: OBS_FOOD, CELL_BONUS: OBS_BONUS, CELL_BOMB: OBS_BOMB}
+
+def read_only_view(data, offset, shape):
+    """Read-only memoryview of part of an array('f') starting at offset, shaped like shape"""
+    size = math.prod(shape)
+    return memoryview(data).cast('B')[4 * offset:4 * (offset + size)].cast('f', shape).toreadonly()
+
+class Observation:
+    """Channel planes of one game for learning agents, kept current in place.
+    
+    OBS_CHANNELS planes of height x width 4-byte floats, channel first, in
+    `data` (an array('f'), possibly shared with other games) from `offset`
+    on. Body, head and food cells hold 1.0; bonus food and bomb cells hold
+    the countdowns they have left. The engine writes only the cells a move
+    changes, plus the few timed items once per move, so keeping the planes
+    up to date costs O(cells changed) rather than O(board).
+    
+    view() is a read-only memoryview over the same memory, and
+    numpy.asarray() of it a read-only ndarray sharing it too.
+    """
+    def __init__(self, engine, data=None, offset=0):
+        self.height, self.width = engine.height, engine.width
+        self.cells = engine.height * engine.width
+        if data is None:
+            data = array('f', bytes(4 * OBS_CHANNELS * self.cells))
+        self.data = data
+        self.offset = offset
+        self.rebuild(engine)
+    
+    def rebuild(self, engine):
+        """Write the planes from scratch, after the engine's state was swapped out"""
+        data, offset, cells = self.data, self.offset, self.cells
+        data[offset:offset + OBS_CHANNELS * cells] = array('f', bytes(4 * OBS_CHANNELS * cells))
+        for index in engine.snake.indices():
+            data[offset + index] = 1.0
+        if engine.snake:
+            data[offset + OBS_HEAD * cells + engine.snake.head_index()] = 1.0
+        if engine.food is not None:
+            data[offset + OBS_FOOD * cells + engine.food[0] * self.width + engine.food[1]] = 1.0
+        self.update_timers(engine)
+    
+    def mark(self, index, flag, value):
+        """Set a cell in the plane of a CELL_* flag"""
+        self.data[self.offset + OBS_PLANES[flag] * self.cells + index] = value
+    
+    def move_head(self, old, new):
+        head = self.offset + OBS_HEAD * self.cells
+        self.data[head + old] = 0.0
+        self.data[head + new] = 1.0
+    
+    def update_timers(self, engine):
+        """Write the countdowns left on the bonus food and bombs"""
+        data, width = self.data, self.width
+        if engine.bonus_food is not None:
+            y, x = engine.bonus_food
+            data[self.offset + OBS_BONUS * self.cells + y * width + x] = engine.remaining(BONUS_TIMER)
+        bombs = self.offset + OBS_BOMB * self.cells
+        for pos in engine.bombs:
+            data[bombs + pos[0] * width + pos[1]] = engine.remaining(pos)
+    
+    def view(self):
+        """Read-only (channels, height, width) view of the planes"""
+        return read_only_view(self.data, self.offset, (OBS_CHANNELS, self.height, self.width))
+
+class ObservationBatch:
+    """Observations of many games on boards of one size, stacked in one buffer.
+    
+    Each game's planes are a slice of a shared (games, channels, height,
+    width) array, so the stacked batch is always current and never copied.
+    attach() puts a new engine in a slot, e.g. when an environment resets.
+    A game resized to another board size gets planes of its own and drops
+    out of the batch.
+    """
+    def __init__(self, engines):
+        self.engines = list(engines)
+        self.height, self.width = self.engines[0].height, self.engines[0].width
+        self.size = OBS_CHANNELS * self.height * self.width  # Floats per game
+        self.data = array('f', bytes(4 * self.size * len(self.engines)))
+        for slot, engine in enumerate(self.engines):
+            self.attach(slot, engine)
+    
+    def attach(self, slot, engine):
+        """Observe engine in a slot, in place of the engine there before"""
+        if (engine.height, engine.width) != (self.height, self.width):
+            raise ValueError(f"a {engine.height}x{engine.width} board does not fit a batch "
+                             f"of {self.height}x{self.width} boards")
+        old = self.engines[slot]
+        observation = old.observation
+        if (old is not engine and observation is not None and observation.data is self.data
+                and observation.offset == slot * self.size):
+            old.observation = None  # Stop it writing into the slot
+        self.engines[slot] = engine
+        engine.observation = Observation(engine, self.data, slot * self.size)
+    
+    def view(self):
+        """Read-only (games, channels, height, width) view of every game's planes"""
+        return read_only_view(self.data, 0, (len(self.engines), OBS_CHANNELS, self.height, self.width))
+
+class TurnQueue:
+    """Turns that arrive faster than the snake moves, applied one per move.
+    
+    Front ends push() every turn as it arrives and call apply() just before
+    each move, so two quick turns within one tick land on consecutive moves
+    instead of the second overwriting the first. A turn is checked against
+    the direction the snake will have when its move comes - that of the
+    last turn queued - so up then left while moving right is a corner, not
+    a reversal into the body. Turns that would reverse or repeat that
+    direction are dropped, as are turns past MAX_TURNS waiting.
+    
+    apply() and pop() also return how long the turn waited, in seconds of
+    `clock`.
+    """
+    MAX_TURNS = 3
+    
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.turns = deque()  # (action, time pushed)
+        self.dropped = 0  # Turns refused because the queue was full
+    
+    def __len__(self):
+        return len(self.turns)
+    
+    def push(self, action, direction):
+        """Queue an action for a snake moving in direction (y, x) now"""
+        if self.turns:
+            direction = DIRECTIONS[self.turns[-1][0]]
+        new_direction = DIRECTIONS[action]
+        if new_direction == direction or (new_direction[0] + direction[0] == 0 and
+                                          new_direction[1] + direction[1] == 0):
+            return
+        if len(self.turns) >= self.MAX_TURNS:
+            self.dropped += 1
+            return
+        self.turns.append((action, self.clock()))
+    
+    def pop(self):
+        """Return the oldest queued action and its wait, or None"""
+        if not self.turns:
+            return None
+        action, pushed = self.turns.popleft()
+        return action, self.clock() - pushed
+    
+    def apply(self, engine):
+        """Turn the engine by the oldest queued action; return its wait, or None"""
+        turn = self.pop()
+        if turn is None:
+            return None
+        engine.turn(turn[0])
+        return turn[1]
+    
+    def clear(self):
+        self.turns.clear()
+
+class Board:
+    """Cell bookkeeping and the bomb and bonus food rules, shared by
+    SnakeEngine and snake_arena.Arena so both play items the same way.
+    
+    Subclasses provide grid, free, dirty, rng, tick, timers, bombs (an
+    ordered set of positions) and bonus_food, plus cell_index() to turn one
+    of their positions into a packed cell index and random_free_cell() to
+    draw one. The tuning below can be overridden per instance.
+    """
+    max_bombs = 3  # Maximum number of bombs on screen
+    bomb_spawn_chance = 0.005  # Reduced chance to spawn a bomb each move
+    bomb_min_duration = 30  # Minimum time bomb stays
+    bomb_max_duration = 100  # Maximum time bomb stays
+    bomb_cooldown_time = 30  # Minimum moves between bomb spawns
+    bonus_food_min_duration = 40  # Minimum time bonus stays
+    bonus_food_max_duration = 80  # Maximum time bonus stays
+    bonus_spawn_chance = 0.003  # Reduced chance to spawn bonus food
+    bonus_cooldown_time = 50  # Minimum moves between bonus spawns
+    early_removal_chance = 0.005  # Chance per move for a bomb or bonus to vanish early
+    
+    observation = None  # Observation planes, when an agent reads them
+    
+    def occupy(self, index, flag):
+        """Set a flag on a cell, taking it out of the free pool if it was empty"""
+        if not self.grid[index]:
+            self.free.take(index)
+        self.grid[index] |= flag
+        if self.dirty is not None:
+            self.dirty.add(index)
+        if self.observation is not None:
+            self.observation.mark(index, flag, 1.0)
+    
+    def vacate(self, index, flag):
+        """Clear a flag on a cell, returning it to the free pool once it is empty"""
+        self.grid[index] &= ~flag
+        if not self.grid[index]:
+            self.free.put(index)
+        if self.dirty is not None:
+            self.dirty.add(index)
+        if self.observation is not None:
+            self.observation.mark(index, flag, 0.0)
+    
+    # Timers count down once at the end of every move; a duration set
+    # during a move includes the countdown at the end of that move
+    
+    def remaining(self, key):
+        """Countdowns left before a timed item expires"""
+        return self.timers.get(key, self.timers.now) - self.timers.now
+    
+    def bomb_timer(self, pos):
+        """Countdowns left before the bomb at pos disappears"""
+        return self.remaining(pos)
+    
+    @property
+    def bonus_food_timer(self):
+        """Countdowns left before the bonus food disappears, 0 if there is none"""
+        return self.remaining(BONUS_TIMER)
+    
+    @bonus_food_timer.setter
+    def bonus_food_timer(self, duration):
+        self.timers.cancel(BONUS_TIMER)
+        if self.bonus_food is not None:
+            self.timers.schedule(BONUS_TIMER, self.timers.now + max(1, duration))
+    
+    # Cooldowns count down at the start of every move instead, so they
+    # are set relative to the move in progress
+    
+    @property
+    def bomb_cooldown(self):
+        """Moves before another bomb may spawn"""
+        return max(0, self.timers.get(BOMB_COOLDOWN, 0) - self.timers.now)
+    
+    @bomb_cooldown.setter
+    def bomb_cooldown(self, moves):
+        self.set_cooldown(BOMB_COOLDOWN, moves)
+    
+    @property
+    def bonus_cooldown(self):
+        """Moves before another bonus food may spawn"""
+        return max(0, self.timers.get(BONUS_COOLDOWN, 0) - self.timers.now)
+    
+    @bonus_cooldown.setter
+    def bonus_cooldown(self, moves):
+        self.set_cooldown(BONUS_COOLDOWN, moves)
+    
+    def set_cooldown(self, key, moves):
+        if moves > 0:
+            self.timers.schedule(key, self.tick + moves)
+        else:
+            self.timers.cancel(key)
+    
+    def generate_bomb(self):
+        """Generate a bomb at a random position with random duration"""
+        if len(self.bombs) >= self.max_bombs:
+            return
+        
+        pos = self.random_free_cell()
+        if pos is not None:
+            # Random duration for this bomb
+            duration = self.rng.randint(self.bomb_min_duration, self.bomb_max_duration)
+            self.place_bomb(pos, duration)
+    
+    def place_bomb(self, pos, duration):
+        """Put a bomb on a free cell for duration moves"""
+        self.bombs[pos] = None
+        self.timers.schedule(pos, self.timers.now + max(1, duration))
+        self.occupy(self.cell_index(pos), CELL_BOMB)
+    
+    def remove_bomb(self, pos):
+        """Take the bomb at pos off the board"""
+        del self.bombs[pos]
+        self.timers.cancel(pos)
+        self.vacate(self.cell_index(pos), CELL_BOMB)
+    
+    def generate_bonus_food(self):
+        """Generate bonus food worth extra points with random duration"""
+        if self.bonus_food is not None:
+            return
+        
+        pos = self.random_free_cell()
+        if pos is not None:
+            self.set_bonus_food(pos)
+            # Random duration for bonus food
+            self.bonus_food_timer = self.rng.randint(self.bonus_food_min_duration, 
+                                                  self.bonus_food_max_duration)
+    
+    def set_bonus_food(self, pos):
+        """Place bonus food at pos (or clear it with None), keeping the grid in sync"""
+        if self.bonus_food is not None:
+            self.vacate(self.cell_index(self.bonus_food), CELL_BONUS)
+            self.timers.cancel(BONUS_TIMER)
+        self.bonus_food = pos
+        if pos is not None:
+            self.occupy(self.cell_index(pos), CELL_BONUS)
+    
+    def update_items(self):
+        """Spawn, expire and randomly remove bombs and bonus food at the end of a move"""
+        # Randomly spawn bombs (with cooldown check)
+        timers = self.timers
+        if (self.tick >= timers.get(BOMB_COOLDOWN, 0) and 
+            len(self.bombs) < self.max_bombs and 
+            self.rng.random() < self.bomb_spawn_chance):
+            self.generate_bomb()
+            self.bomb_cooldown = self.bomb_cooldown_time
+            
+        # Randomly spawn bonus food (with cooldown check)
+        if (self.bonus_food is None and 
+            self.tick >= timers.get(BONUS_COOLDOWN, 0) and 
+            self.rng.random() < self.bonus_spawn_chance):
+            self.generate_bonus_food()
+            self.bonus_cooldown = self.bonus_cooldown_time
+            
+        # Count down: remove the bonus food and bombs whose time is up
+        expired = timers.advance(self.tick)
+        if expired:
+            if BONUS_TIMER in expired:
+                self.set_bonus_food(None)
+            for key in expired:
+                if key in self.bombs:
+                    del self.bombs[key]
+                    self.vacate(self.cell_index(key), CELL_BOMB)
+        
+        # Add some randomness to disappearance
+        # Small chance for bombs to disappear early
+        if self.bombs and self.rng.random() < self.early_removal_chance:
+            # Remove a random bomb
+            index = self.rng.randint(0, len(self.bombs) - 1)
+            self.remove_bomb(next(islice(self.bombs, index, None)))
+            
+        # Small chance for bonus food to disappear early
+        if self.bonus_food is not None and self.rng.random() < self.early_removal_chance:
+            self.set_bonus_food(None)
+
+class SnakeEngine(Board):
+    """Snake simulation rules with no terminal or curses dependency.
+
+    Drive it with step(action) or step_many(actions), where each action is
+    one of UP, RIGHT, DOWN, LEFT or None to keep the current direction.
+    """
+    def __init__(self, height=20, width=40, seed=None):
+        self.height = height
+        self.width = width
+        # Every random decision comes from this generator, so a game is
+        # fully determined by its seed, its rules and its inputs
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.tick = 0  # Number of moves made so far
+        self.inputs = None  # List of (tick, code, value) inputs, when recording
+        self.snake = RingBody(width, [(height//2, width//2)])
+        # Flat occupancy bitmap indexed by y * width + x, kept in sync with
+        # the snake, food, bonus food and bombs for O(1) cell lookups; one
+        # byte of CELL_* flags per cell
+        self.grid = bytearray(height * width)
+        self.free = FreeCells(height, width)
+        self.dirty = None  # Set of changed cell indices, when a front end tracks them
+        self.observation = None  # Observation planes, when an agent reads them
+        self.occupy((height//2) * width + width//2, CELL_SNAKE)
+        self.direction = (0, 1)  # (y, x) - start moving right
+        self.food = None
+        self.score = 0
+        self.game_over = False
+        self.won = False  # Set when the snake fills the whole board
+        self.death = None  # DEATH_WALL, DEATH_SELF or DEATH_BOMB once the snake has crashed
+        self.paused = False
+        self.speed = 0.1  # seconds between moves
+        self.base_speed = 0.1  # base speed for manual adjustment
+        self.speed_multiplier = 1.0  # for manual speed control
+        self.auto_speed_increase = True  # toggle for automatic speed increase
+        
+        # Bombs and bonus food; their expiry ticks and the spawn cooldowns
+        # live in the timer wheel
+        self.timers = TimerWheel()
+        self.bombs = {}  # Bomb positions in the order they were placed (an ordered set)
+        self.bonus_food = None  # Position of bonus food
+    
+    def cell_index(self, pos):
+        return pos[0] * self.width + pos[1]
+    
+    def random_free_cell(self):
+        """Return a random (y, x) cell that is not occupied, or None if the board is full"""
+        index = self.free.sample(self.rng)
+        if index is None:
+            return None
+        return divmod(index, self.width)
+    
+    def generate_food(self):
+        """Generate food at a random free position.
+        
+        Returns the new position, or None when there is no free cell left,
+        in which case the game is over and the player has won.
+        """
+        self.set_food(None)
+        pos = self.random_free_cell()
+        if pos is None:
+            self.won = True
+            self.game_over = True
+            return None
+        self.set_food(pos)
+        return pos
+    
+    def set_food(self, pos):
+        """Place food at pos (or clear it with None), keeping the grid in sync"""
+        if self.food is not None:
+            self.vacate(self.food[0] * self.width + self.food[1], CELL_FOOD)
+        self.food = pos
+        if pos is not None:
+            self.occupy(pos[0] * self.width + pos[1], CELL_FOOD)
+    
+    def move_snake(self):
+        """Move the snake in the current direction"""
+        if self.paused or self.game_over:
+            return
+        self.tick += 1
+            
+        head = self.snake[0]
+        new_head = (head[0] + self.direction[0], head[1] + self.direction[1])
+        
+        # Check wall collision
+        if (new_head[0] <= 0 or new_head[0] >= self.height - 1 or
+            new_head[1] <= 0 or new_head[1] >= self.width - 1):
+            self.game_over = True
+            self.death = DEATH_WALL
+            return
+        
+        # Check self and bomb collision with a single grid lookup
+        grid = self.grid
+        index = new_head[0] * self.width + new_head[1]
+        if grid[index] & (CELL_SNAKE | CELL_BOMB):
+            self.game_over = True
+            self.death = DEATH_BOMB if grid[index] & CELL_BOMB else DEATH_SELF
+            return
+        
+        # Add new head
+        observation = self.observation
+        if observation is not None:
+            observation.move_head(self.snake.head_index(), index)
+        self.snake.push_head_index(index)
+        self.occupy(index, CELL_SNAKE)
+        
+        # Check if food is eaten
+        if new_head == self.food:
+            self.score += 10
+            self.generate_food()
+            # Increase speed slightly if auto speed is enabled
+            if self.auto_speed_increase:
+                self.base_speed = max(0.05, self.base_speed - 0.005)
+                self.update_speed()
+        # Check if bonus food is eaten
+        elif new_head == self.bonus_food:
+            self.score += 50  # Bonus food worth 5x normal food
+            self.set_bonus_food(None)
+            # Bonus food also grows the snake
+        else:
+            # Remove tail if no food eaten
+            self.vacate(self.snake.pop_tail_index(), CELL_SNAKE)
+            
+        self.update_items()
+        
+        if observation is not None:
+            observation.update_timers(self)
+    
+    def turn(self, action):
+        """Change direction to an action unless it would reverse into the snake"""
+        new_direction = DIRECTIONS[action]
+        # Prevent snake from going back into itself
+        if (new_direction[0] + self.direction[0] != 0 or
+            new_direction[1] + self.direction[1] != 0):
+            if self.inputs is not None and new_direction != self.direction:
+                self.inputs.append((self.tick, action, 0))
+            self.direction = new_direction
+    
+    def set_auto_speed(self, enabled):
+        """Turn the automatic speed increase on food on or off"""
+        if self.inputs is not None:
+            self.inputs.append((self.tick, INPUT_AUTO_SPEED, int(enabled)))
+        self.auto_speed_increase = enabled
+    
+    def set_speed_multiplier(self, multiplier):
+        """Set the manual speed multiplier"""
+        if self.inputs is not None:
+            self.inputs.append((self.tick, INPUT_SPEED, round(multiplier * 10)))
+        self.speed_multiplier = multiplier
+        self.update_speed()
+    
+    def apply_input(self, code, value):
+        """Apply an input logged in inputs, e.g. while replaying a recording"""
+        if code == INPUT_AUTO_SPEED:
+            self.set_auto_speed(bool(value))
+        elif code == INPUT_SPEED:
+            self.set_speed_multiplier(value / 10)
+        elif code == INPUT_RESIZE:
+            self.resize(value >> 16, value & 0xFFFF)
+        else:
+            self.turn(code)
+    
+    def step(self, action=None):
+        """Apply an optional action and advance one tick.
+        
+        Returns True while the game is still running.
+        """
+        if action is not None:
+            self.turn(action)
+        self.move_snake()
+        return not self.game_over
+    
+    def step_many(self, actions):
+        """Advance one tick per action, stopping early at game over.
+        
+        Returns the number of ticks that were played.
+        """
+        turn = self.turn
+        move_snake = self.move_snake
+        ticks = 0
+        for action in actions:
+            if self.game_over:
+                break
+            if action is not None:
+                turn(action)
+            move_snake()
+            ticks += 1
+        return ticks
+    
+    def snapshot(self):
+        """Return an EngineState copy of the game so far"""
+        state = EngineState()
+        state.height, state.width = self.height, self.width
+        state.tick = self.tick
+        state.rng_state = self.rng.getstate()
+        state.snake = self.snake.copy()
+        state.grid = self.grid[:]
+        state.free = self.free.copy()
+        state.direction = self.direction
+        state.food = self.food
+        state.bonus_food = self.bonus_food
+        state.bombs = self.bombs.copy()
+        state.timers = self.timers.copy()
+        state.score = self.score
+        state.game_over = self.game_over
+        state.won = self.won
+        state.death = self.death
+        state.paused = self.paused
+        state.speed = self.speed
+        state.base_speed = self.base_speed
+        state.speed_multiplier = self.speed_multiplier
+        state.auto_speed_increase = self.auto_speed_increase
+        state.inputs = None if self.inputs is None else len(self.inputs)
+        return state
+    
+    def restore(self, state):
+        """Return to an EngineState; the state itself is left untouched.
+        
+        When recording, inputs logged after the snapshot are dropped.
+        """
+        self.height, self.width = state.height, state.width
+        self.tick = state.tick
+        self.rng.setstate(state.rng_state)
+        self.snake = state.snake.copy()
+        self.grid = state.grid[:]
+        self.free = state.free.copy()
+        self.direction = state.direction
+        self.food = state.food
+        self.bonus_food = state.bonus_food
+        self.bombs = state.bombs.copy()
+        self.timers = state.timers.copy()
+        self.score = state.score
+        self.game_over = state.game_over
+        self.won = state.won
+        self.death = state.death
+        self.paused = state.paused
+        self.speed = state.speed
+        self.base_speed = state.base_speed
+        self.speed_multiplier = state.speed_multiplier
+        self.auto_speed_increase = state.auto_speed_increase
+        if self.inputs is not None and state.inputs is not None:
+            del self.inputs[state.inputs:]
+        if self.dirty is not None:
+            self.dirty.clear()
+        if self.observation is not None:
+            if (self.observation.height, self.observation.width) == (self.height, self.width):
+                self.observation.rebuild(self)
+            else:
+                self.observation = Observation(self)
+    
+    def observe(self):
+        """Keep Observation planes of the game from now on and return a read-only view of them"""
+        if self.observation is None:
+            self.observation = Observation(self)
+        return self.observation.view()
+    
+    def resize(self, height, width):
+        """Change the board size mid-game, keeping the snake and items that still fit.
+        
+        If the head would be off the new board everything is shifted back
+        towards the top left to bring it inside. Snake segments past the
+        edge are cut off, bombs and bonus food past it are dropped and food
+        past it is placed again.
+        """
+        if self.inputs is not None:
+            self.inputs.append((self.tick, INPUT_RESIZE, height << 16 | width))
+        head_y, head_x = self.snake[0]
+        dy = min(0, height - 2 - head_y)
+        dx = min(0, width - 2 - head_x)
+        
+        def moved(pos):
+            y, x = pos[0] + dy, pos[1] + dx
+            return (y, x) if 0 < y < height - 1 and 0 < x < width - 1 else None
+        
+        snake, food, bonus_food = list(self.snake), self.food, self.bonus_food
+        bombs = [(pos, self.timers.get(pos)) for pos in self.bombs]
+        bonus_expiry = self.timers.get(BONUS_TIMER)
+        for pos, _ in bombs:
+            self.timers.cancel(pos)
+        self.timers.cancel(BONUS_TIMER)
+        
+        observed, self.observation = self.observation is not None, None
+        self.height, self.width = height, width
+        self.grid = bytearray(height * width)
+        self.free = FreeCells(height, width)
+        self.snake = RingBody(width)
+        self.food = self.bonus_food = None
+        self.bombs = {}
+        if self.dirty is not None:
+            self.dirty.clear()
+        for pos in snake:
+            pos = moved(pos)
+            if pos is None:
+                break
+            self.snake.append(pos)
+            self.occupy(pos[0] * width + pos[1], CELL_SNAKE)
+        for pos, expiry in bombs:
+            pos = moved(pos)
+            if pos is not None and not self.grid[pos[0] * width + pos[1]]:
+                self.bombs[pos] = None
+                self.timers.schedule(pos, expiry)
+                self.occupy(pos[0] * width + pos[1], CELL_BOMB)
+        if bonus_food is not None:
+            pos = moved(bonus_food)
+            if pos is not None and not self.grid[pos[0] * width + pos[1]]:
+                self.set_bonus_food(pos)
+                self.timers.schedule(BONUS_TIMER, bonus_expiry)
+        pos = None if food is None else moved(food)
+        if pos is not None and not self.grid[pos[0] * width + pos[1]]:
+            self.set_food(pos)
+        elif not self.game_over:
+            self.generate_food()
+        if observed:
+            self.observation = Observation(self)
+    
+    def update_speed(self):
+        """Update the actual game speed based on base speed and multiplier"""
+        self.speed = self.base_speed / self.speed_multiplier
@@ -5,45 +5,48 @@ Use arrow keys to control the snake
 Press 'q' to quit, 'space' to pause/unpause
 """
 
+import argparse
 import curses
-import random
+import json
+import math
+import os
+import sys
 import time
-from collections import deque
 
-class SnakeGame:
-    def __init__(self, height=20, width=40, max_height=25, max_width=60):
-        self.height = height
-        self.width = width
+from snake_engine import (SnakeEngine, TurnQueue, UP, RIGHT, DOWN, LEFT,
+                          CELL_SNAKE, CELL_FOOD, CELL_BONUS, CELL_BOMB)
+import snake_replay
+from snake_profiler import FrameProfiler, NullProfiler
+from snake_autopilot import Autopilot
+from snake_rewind import RewindBuffer, STEP_SECONDS
+from snake_ansi import AnsiScreen
+from snake_scores import ScoreStore, DEFAULT_PATH as SCORES_PATH
+
+# Curses color pairs: number -> (foreground, background)
+COLOR_PAIRS = {
+    1: (curses.COLOR_GREEN, curses.COLOR_BLACK),    # Green Snake
+    2: (curses.COLOR_RED, curses.COLOR_BLACK),      # Food
+    3: (curses.COLOR_YELLOW, curses.COLOR_BLACK),   # Messages
+    4: (curses.COLOR_BLUE, curses.COLOR_BLACK),     # Blue Snake
+    5: (curses.COLOR_CYAN, curses.COLOR_BLACK),     # Cyan Snake
+    6: (curses.COLOR_MAGENTA, curses.COLOR_BLACK),  # Magenta Snake
+    7: (curses.COLOR_WHITE, curses.COLOR_BLACK),    # White Snake
+}
+
+SCORES_POLL_MS = 50  # Wait between checks for a leaderboard still being read
+
+class SnakeGame(SnakeEngine):
+    """Curses front end: key mapping, display preferences and drawing"""
+    def __init__(self, height=20, width=40, max_height=25, max_width=60, seed=None):
+        super().__init__(height, width, seed)
         self.max_height = max_height
         self.max_width = max_width
-        self.snake = deque([(height//2, width//2)])
-        self.direction = (0, 1)  # (y, x) - start moving right
-        self.food = None
-        self.score = 0
-        self.game_over = False
-        self.paused = False
-        self.speed = 0.1  # seconds between moves
-        self.base_speed = 0.1  # base speed for manual adjustment
-        self.speed_multiplier = 1.0  # for manual speed control
-        self.auto_speed_increase = True  # toggle for automatic speed increase
         self.snake_color = 1  # Default green
         self.current_color_index = 0
-        
-        # Bombs and bonus food
-        self.bombs = []  # List of (position, timer) tuples
-        self.max_bombs = 3  # Maximum number of bombs on screen
-        self.bomb_spawn_chance = 0.005  # Reduced chance to spawn a bomb each move
-        self.bomb_min_duration = 30  # Minimum time bomb stays
-        self.bomb_max_duration = 100  # Maximum time bomb stays
-        self.bomb_cooldown = 0  # Cooldown before spawning next bomb
-        self.bomb_cooldown_time = 30  # Minimum moves between bomb spawns
-        self.bonus_food = None  # Position of bonus food
-        self.bonus_food_timer = 0  # Timer for bonus food expiration
-        self.bonus_food_min_duration = 40  # Minimum time bonus stays
-        self.bonus_food_max_duration = 80  # Maximum time bonus stays
-        self.bonus_spawn_chance = 0.003  # Reduced chance to spawn bonus food
-        self.bonus_cooldown = 0  # Cooldown before spawning next bonus
-        self.bonus_cooldown_time = 50  # Minimum moves between bonus spawns
+        self.dirty = set()  # Cell indices changed since the last draw
+        self.renderer = None  # Created on the first draw
+        self.turns = TurnQueue()  # Arrow keys waiting for their move
+        self.leaderboard = None  # Top scores shown on the game-over screen, when known
         
         # Available snake colors
         self.color_names = ['Green', 'Blue', 'Cyan', 'Magenta', 'Yellow', 'White']
@@ -51,462 +54,748 @@ class SnakeGame:
         
         # Direction mappings
         self.directions = {
-            curses.KEY_UP: (-1, 0),
-            curses.KEY_DOWN: (1, 0),
-            curses.KEY_LEFT: (0, -1),
-            curses.KEY_RIGHT: (0, 1)
+            curses.KEY_UP: UP,
+            curses.KEY_DOWN: DOWN,
+            curses.KEY_LEFT: LEFT,
+            curses.KEY_RIGHT: RIGHT
         }
         
-    def generate_food(self):
-        """Generate food at a random position not occupied by the snake"""
-        while True:
-            y = random.randint(1, self.height - 2)
-            x = random.randint(1, self.width - 2)
-            # Check bomb positions
-            bomb_positions = [bomb[0] for bomb in self.bombs]
-            if ((y, x) not in self.snake and 
-                (y, x) not in bomb_positions and
-                (y, x) != self.bonus_food):
-                self.food = (y, x)
-                break
+    def change_direction(self, key):
+        """Queue a change of direction for an arrow key; it is made on the next free move"""
+        if key in self.directions:
+            self.turns.push(self.directions[key], self.direction)
     
-    def generate_bomb(self):
-        """Generate a bomb at a random position with random duration"""
-        if len(self.bombs) >= self.max_bombs:
-            return
-            
-        attempts = 0
-        while attempts < 50:  # Prevent infinite loop
-            y = random.randint(1, self.height - 2)
-            x = random.randint(1, self.width - 2)
-            # Check if position is free
-            bomb_positions = [bomb[0] for bomb in self.bombs]
-            if ((y, x) not in self.snake and 
-                (y, x) != self.food and
-                (y, x) != self.bonus_food and
-                (y, x) not in bomb_positions):
-                # Random duration for this bomb
-                duration = random.randint(self.bomb_min_duration, self.bomb_max_duration)
-                self.bombs.append(((y, x), duration))
-                break
-            attempts += 1
+    def draw(self, stdscr, panels=()):
+        """Draw the game state, repainting only what changed since the last frame.
+        
+        panels are extra side panels, each with a draw(renderer, game, full) method.
+        """
+        if self.renderer is None or self.renderer.stdscr is not stdscr:
+            self.renderer = Renderer(stdscr)
+        self.renderer.draw(self, panels)
     
-    def generate_bonus_food(self):
-        """Generate bonus food worth extra points with random duration"""
-        if self.bonus_food is not None:
-            return
-            
-        attempts = 0
-        while attempts < 50:  # Prevent infinite loop
-            y = random.randint(1, self.height - 2)
-            x = random.randint(1, self.width - 2)
-            # Check if position is free
-            bomb_positions = [bomb[0] for bomb in self.bombs]
-            if ((y, x) not in self.snake and 
-                (y, x) != self.food and
-                (y, x) not in bomb_positions):
-                self.bonus_food = (y, x)
-                # Random duration for bonus food
-                self.bonus_food_timer = random.randint(self.bonus_food_min_duration, 
-                                                      self.bonus_food_max_duration)
-                break
-            attempts += 1
+    def redraw_all(self):
+        """Force a full repaint on the next draw, e.g. after a terminal resize"""
+        if self.renderer is not None:
+            self.renderer.invalidate()
     
-    def move_snake(self):
-        """Move the snake in the current direction"""
-        if self.paused or self.game_over:
-            return
-            
-        head = self.snake[0]
-        new_head = (head[0] + self.direction[0], head[1] + self.direction[1])
-        
-        # Check wall collision
-        if (new_head[0] <= 0 or new_head[0] >= self.height - 1 or
-            new_head[1] <= 0 or new_head[1] >= self.width - 1):
-            self.game_over = True
-            return
-        
-        # Check self collision
-        if new_head in self.snake:
-            self.game_over = True
-            return
-            
-        # Check bomb collision
-        bomb_positions = [bomb[0] for bomb in self.bombs]
-        if new_head in bomb_positions:
-            self.game_over = True
-            return
+    def reset(self):
+        """Start a new game on the same board, keeping the display preferences"""
+        speed_multiplier = self.speed_multiplier
+        auto_speed_increase = self.auto_speed_increase
+        SnakeEngine.__init__(self, self.height, self.width)
+        self.dirty = set()
+        self.turns.clear()
+        self.speed_multiplier = speed_multiplier
+        self.auto_speed_increase = auto_speed_increase
+        self.update_speed()
+        self.redraw_all()
+    
+    def restore(self, state):
+        """Return to an EngineState and repaint"""
+        super().restore(state)
+        self.turns.clear()
+        self.redraw_all()
+    
+    def resize(self, height, width):
+        """Change the board size mid-game and repaint"""
+        super().resize(height, width)
+        self.redraw_all()
+    
+    def change_speed(self, delta):
+        """Change game speed by delta"""
+        self.set_speed_multiplier(round(max(0.1, min(5.0, self.speed_multiplier + delta)), 1))
+        self.paused = True  # Auto-pause when changing speed
+    
+    def next_color(self):
+        """Cycle to the next snake color"""
+        self.current_color_index = (self.current_color_index + 1) % len(self.color_pairs)
+        self.snake_color = self.color_pairs[self.current_color_index]
+        self.paused = True  # Auto-pause when changing color
+    
+    def toggle_auto_speed(self):
+        """Toggle automatic speed increase"""
+        self.set_auto_speed(not self.auto_speed_increase)
+        self.paused = True  # Auto-pause when toggling auto speed
+    
+    def resize_canvas(self, height_delta=0, width_delta=0):
+        """Resize the game canvas, carrying on with the current game"""
+        new_height = self.height + height_delta
+        new_width = self.width + width_delta
         
-        # Add new head
-        self.snake.appendleft(new_head)
+        # Ensure minimum size
+        new_height = max(10, min(new_height, self.max_height))
+        new_width = max(20, min(new_width, self.max_width))
         
-        # Check if food is eaten
-        if new_head == self.food:
-            self.score += 10
-            self.generate_food()
-            # Increase speed slightly if auto speed is enabled
-            if self.auto_speed_increase:
-                self.base_speed = max(0.05, self.base_speed - 0.005)
-                self.update_speed()
-        # Check if bonus food is eaten
-        elif new_head == self.bonus_food:
-            self.score += 50  # Bonus food worth 5x normal food
-            self.bonus_food = None
-            self.bonus_food_timer = 0
-            # Bonus food also grows the snake
+        if new_height != self.height or new_width != self.width:
+            self.resize(new_height, new_width)
+            self.paused = True  # Auto-pause after resizing
+
+class Renderer:
+    """Incremental curses renderer for a SnakeGame.
+
+    The board lives on stdscr and the side panels in their own window. Static
+    text is drawn once per full repaint; after that each frame only rewrites
+    the cells in game.dirty, the previous head, flickering items and panel
+    values whose text changed, then flushes with noutrefresh/doupdate.
+    
+    Boards larger than the terminal are shown through a viewport that
+    follows the head; only cells inside it are ever drawn, and the frame
+    is dotted on sides where the board continues.
+    
+    stdscr may also be the window of an AnsiScreen, which then takes the
+    place of curses for output.
+    """
+    PANEL_HEIGHT = 34
+    PANEL_WIDTH = 19
+    
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self.screen = getattr(stdscr, 'screen', None)  # AnsiScreen, if not curses
+        self.panel = None
+        self.full = True
+        self.last_head = None
+        self.last_view = None
+        self.texts = {}  # (window, y, x) -> (text, attr) last written there
+        self.wide = set()  # Board cells showing a two-column glyph
+        # Viewport: board cell (top, left) is drawn at the screen origin
+        self.top = self.left = 0
+        self.view_height = self.view_width = 0
+    
+    def invalidate(self):
+        """Repaint everything on the next frame"""
+        self.full = True
+    
+    def newwin(self, height, width, y, x):
+        """Create a window for a side panel on the same output as the board"""
+        if self.screen is not None:
+            return self.screen.newwin(height, width, y, x)
+        return curses.newwin(height, width, y, x)
+    
+    def flush(self):
+        """Send the frame to the terminal"""
+        if self.screen is not None:
+            self.screen.flush()
         else:
-            # Remove tail if no food eaten
-            self.snake.pop()
-            
-        # Update cooldowns
-        if self.bomb_cooldown > 0:
-            self.bomb_cooldown -= 1
-        if self.bonus_cooldown > 0:
-            self.bonus_cooldown -= 1
-            
-        # Randomly spawn bombs (with cooldown check)
-        if (self.bomb_cooldown == 0 and 
-            len(self.bombs) < self.max_bombs and 
-            random.random() < self.bomb_spawn_chance):
-            self.generate_bomb()
-            self.bomb_cooldown = self.bomb_cooldown_time
-            
-        # Randomly spawn bonus food (with cooldown check)
-        if (self.bonus_food is None and 
-            self.bonus_cooldown == 0 and 
-            random.random() < self.bonus_spawn_chance):
-            self.generate_bonus_food()
-            self.bonus_cooldown = self.bonus_cooldown_time
-            
-        # Update bonus food timer
-        if self.bonus_food is not None:
-            self.bonus_food_timer -= 1
-            if self.bonus_food_timer <= 0:
-                self.bonus_food = None
-                
-        # Update bomb timers and remove expired bombs
-        self.bombs = [(pos, timer - 1) for pos, timer in self.bombs if timer > 1]
-        
-        # Add some randomness to disappearance
-        # Small chance for bombs to disappear early
-        if self.bombs and random.random() < 0.005:
-            # Remove a random bomb
-            self.bombs.pop(random.randint(0, len(self.bombs) - 1))
-            
-        # Small chance for bonus food to disappear early
-        if self.bonus_food and random.random() < 0.005:
-            self.bonus_food = None
-            self.bonus_food_timer = 0
+            curses.doupdate()
     
-    def change_direction(self, key):
-        """Change snake direction based on key press"""
-        if key in self.directions:
-            new_direction = self.directions[key]
-            # Prevent snake from going back into itself
-            if (new_direction[0] + self.direction[0] != 0 or
-                new_direction[1] + self.direction[1] != 0):
-                self.direction = new_direction
-    
-    def draw(self, stdscr):
-        """Draw the game state"""
-        stdscr.clear()
-        
-        # Draw border
-        for y in range(self.height):
-            stdscr.addch(y, 0, '│')
-            stdscr.addch(y, self.width - 1, '│')
-        for x in range(self.width):
-            stdscr.addch(0, x, '─')
-            stdscr.addch(self.height - 1, x, '─')
+    def fit(self, game):
+        """Size the viewport to the board or, if that is larger, the terminal"""
+        rows, cols = self.stdscr.getmaxyx()
+        self.view_height = min(game.height, max(10, rows - 3))
+        self.view_width = min(game.width, max(20, cols - 25))
+    
+    def follow(self, game):
+        """Scroll so the head stays away from the viewport edges.
+        
+        Returns True when the viewport moved. Each scroll recentres on the
+        head, so scrolling (and its full repaint) happens only every few
+        rows or columns of travel.
+        """
+        head_y, head_x = game.snake[0]
+        top, left = self.top, self.left
+        margin_y = (self.view_height - 2) // 4
+        margin_x = (self.view_width - 2) // 4
+        if not top + margin_y < head_y < top + self.view_height - 1 - margin_y:
+            top = head_y - self.view_height // 2
+        if not left + margin_x < head_x < left + self.view_width - 1 - margin_x:
+            left = head_x - self.view_width // 2
+        top = max(0, min(top, game.height - self.view_height))
+        left = max(0, min(left, game.width - self.view_width))
+        moved = (top, left) != (self.top, self.left)
+        self.top, self.left = top, left
+        return moved
+    
+    def visible(self, y, x):
+        """True if board cell (y, x) is inside the viewport frame"""
+        return (0 < y - self.top < self.view_height - 1 and
+                0 < x - self.left < self.view_width - 1)
+    
+    def draw(self, game, panels=()):
+        """Render one frame"""
+        # Overlay messages and snake color changes touch many cells at once
+        view = (game.paused, game.game_over, game.snake_color, game.leaderboard)
+        if view != self.last_view:
+            self.full = True
+            self.last_view = view
+        if self.full:
+            self.fit(game)
+        if self.follow(game):
+            self.full = True
+        
+        full = self.full
+        if full:
+            self.repaint(game)
+        else:
+            self.update(game)
+        game.dirty.clear()
+        self.last_head = game.snake[0]
+        
+        self.stdscr.noutrefresh()
+        # Wide glyphs like the bomb make curses copy whole board lines,
+        # blanks included, so lay the panel over them again every frame
+        self.panel.touchwin()
+        self.panel.noutrefresh()
+        for panel in panels:
+            panel.draw(self, game, full)
+        self.flush()
+    
+    def repaint(self, game):
+        """Redraw the whole screen"""
+        stdscr = self.stdscr
+        stdscr.erase()
+        self.texts = {}
+        self.wide = set()
+        self.full = False
+        height, width = self.view_height, self.view_width
+        
+        # Draw border, dotted where the board carries on past the viewport
+        top_edge = '─' if self.top == 0 else '┄'
+        bottom_edge = '─' if self.top + height == game.height else '┄'
+        left_edge = '│' if self.left == 0 else '┆'
+        right_edge = '│' if self.left + width == game.width else '┆'
+        for y in range(height):
+            stdscr.addch(y, 0, left_edge)
+            stdscr.addch(y, width - 1, right_edge)
+        for x in range(width):
+            stdscr.addch(0, x, top_edge)
+            stdscr.addch(height - 1, x, bottom_edge)
         # Corners
         stdscr.addch(0, 0, '┌')
-        stdscr.addch(0, self.width - 1, '┐')
-        stdscr.addch(self.height - 1, 0, '└')
-        stdscr.addch(self.height - 1, self.width - 1, '┘')
+        stdscr.addch(0, width - 1, '┐')
+        stdscr.addch(height - 1, 0, '└')
+        stdscr.addch(height - 1, width - 1, '┘')
+        
+        # Draw every occupied cell in the viewport
+        grid = game.grid
+        for y in range(self.top + 1, self.top + height - 1):
+            start = y * game.width + self.left + 1
+            row = grid[start:start + width - 2]
+            for x, flags in enumerate(row, self.left + 1):
+                if flags:
+                    self.draw_cell(game, y, x)
         
-        # Draw snake
-        for i, (y, x) in enumerate(self.snake):
-            if i == 0:
-                stdscr.addch(y, x, '●', curses.color_pair(self.snake_color))  # Head
-            else:
-                stdscr.addch(y, x, '○', curses.color_pair(self.snake_color))  # Body
+        # Instructions
+        stdscr.addstr(height + 1, 2, "Arrow keys: move | space: pause | q: quit | r: restart")
         
-        # Draw food
-        if self.food:
-            stdscr.addch(self.food[0], self.food[1], '★', curses.color_pair(2))
-            
-        # Draw bombs
-        for bomb_data in self.bombs:
-            pos, timer = bomb_data
+        if self.panel is None:
+            self.panel = self.newwin(self.PANEL_HEIGHT, self.PANEL_WIDTH, 1, width + 2)
+        else:
+            self.panel.mvwin(1, width + 2)
+        self.panel.erase()
+        self.draw_static_panels()
+        self.draw_values(game)
+        self.draw_overlay(game)
+    
+    def update(self, game):
+        """Redraw only the cells and values that changed"""
+        if game.paused or game.game_over:
+            # Nothing moves, and redrawing cells could cover the overlay
+            self.draw_values(game)
+            return
+        cells = set(divmod(index, game.width) for index in game.dirty)
+        # The old head is now a body segment
+        if self.last_head is not None:
+            cells.add(self.last_head)
+        # Items that flicker change appearance every tick
+        for pos in game.timers.due_within(9):
+            if pos in game.bombs:
+                cells.add(pos)
+        if game.bonus_food:
+            cells.add(game.bonus_food)
+        
+        for y, x in cells:
+            if not self.visible(y, x):
+                continue
+            covered = (y, x) in self.wide
+            self.wide.discard((y, x))
+            self.draw_cell(game, y, x)
+            if covered and (y, x) not in self.wide:
+                # The bomb glyph also covered the cell to its right
+                if x + 1 - self.left == self.view_width - 1:
+                    self.stdscr.addch(y - self.top, x + 1 - self.left,
+                                      '│' if self.left + self.view_width == game.width else '┆')
+                else:
+                    self.draw_cell(game, y, x + 1)
+        self.draw_values(game)
+    
+    def draw_cell(self, game, y, x):
+        """Draw a single board cell from the occupancy grid"""
+        stdscr = self.stdscr
+        flags = game.grid[y * game.width + x]
+        pos = (y, x)
+        # Screen position inside the viewport
+        y -= self.top
+        x -= self.left
+        if flags & CELL_BONUS:
+            # More intense flash effect when about to disappear
+            if game.bonus_food_timer < 15:
+                # Rapid flashing when time is running out
+                visible = game.bonus_food_timer % 2 == 0
+            else:
+                # Normal flash effect
+                visible = game.bonus_food_timer % 4 < 2
+            if not visible:
+                stdscr.addch(y, x, ' ')
+                return
+            try:
+                stdscr.addch(y, x, '◆', curses.color_pair(3) | curses.A_BOLD)
+            except:
+                stdscr.addch(y, x, '$', curses.color_pair(3) | curses.A_BOLD)
+        elif flags & CELL_BOMB:
+            timer = game.bomb_timer(pos)
             # Flicker effect when bomb is about to disappear
             if timer < 10 and timer % 2 == 0:
-                continue  # Skip drawing for flicker effect
+                stdscr.addch(y, x, ' ')
+                return
             try:
-                stdscr.addch(pos[0], pos[1], '💣', curses.color_pair(2))
+                stdscr.addch(y, x, '💣', curses.color_pair(2))
+                self.wide.add(pos)
             except:
                 # Fallback if emoji doesn't work
-                stdscr.addch(pos[0], pos[1], 'X', curses.color_pair(2) | curses.A_BOLD)
-                
-        # Draw bonus food
-        if self.bonus_food:
-            # More intense flash effect when about to disappear
-            if self.bonus_food_timer < 15:
-                # Rapid flashing when time is running out
-                if self.bonus_food_timer % 2 == 0:
-                    try:
-                        stdscr.addch(self.bonus_food[0], self.bonus_food[1], '◆', curses.color_pair(3) | curses.A_BOLD)
-                    except:
-                        stdscr.addch(self.bonus_food[0], self.bonus_food[1], '$', curses.color_pair(3) | curses.A_BOLD)
+                stdscr.addch(y, x, 'X', curses.color_pair(2) | curses.A_BOLD)
+        elif flags & CELL_FOOD:
+            stdscr.addch(y, x, '★', curses.color_pair(2))
+        elif flags & CELL_SNAKE:
+            if pos == game.snake[0]:
+                stdscr.addch(y, x, '●', curses.color_pair(game.snake_color))  # Head
             else:
-                # Normal flash effect
-                if self.bonus_food_timer % 4 < 2:
-                    try:
-                        stdscr.addch(self.bonus_food[0], self.bonus_food[1], '◆', curses.color_pair(3) | curses.A_BOLD)
-                    except:
-                        stdscr.addch(self.bonus_food[0], self.bonus_food[1], '$', curses.color_pair(3) | curses.A_BOLD)
+                stdscr.addch(y, x, '○', curses.color_pair(game.snake_color))  # Body
+        else:
+            stdscr.addch(y, x, ' ')
+    
+    def put(self, window, y, x, text, attr=0):
+        """Write text unless the same text is already shown at that spot"""
+        key = (window is self.panel, y, x)
+        if self.texts.get(key) != (text, attr):
+            self.texts[key] = (text, attr)
+            window.addstr(y, x, text, attr)
+    
+    def draw_static_panels(self):
+        """Draw the parts of the side panels that never change"""
+        panel = self.panel
+        yellow = curses.color_pair(3)
+        lines = {
+            0: "╔═══ CONTROLS ═══╗",
+            1: "║                ║",
+            2: "║ Speed Control: ║",
+            3: "║ [-/+] Adjust   ║",
+            4: "║ [a] Auto: ",
+            5: "║                ║",
+            6: "║ Color:         ║",
+            7: "║ [c] ",
+            8: "║                ║",
+            9: "║ Canvas Size:   ║",
+            10: "║ [w/s] Height   ║",
+            11: "║ [j/l] Width    ║",
+            12: "║ [z] Rewind     ║",
+            13: "╚════════════════╝",
+            15: "╔═══ STATS ══════╗",
+            16: "║                ║",
+            21: "║                ║",
+            22: "╚════════════════╝",
+            24: "╔═══ LEGEND ═════╗",
+            25: "║ ★ Food = 10pts ║",
+            26: "║ ◆ Bonus = 50pts║",
+            27: "║ X Bomb = Death ║",
+            28: "╚════════════════╝",
+        }
+        for y, text in lines.items():
+            panel.addstr(y, 0, text, yellow)
+        panel.addstr(4, 14, " ║", yellow)
+        panel.addstr(7, 15, " ║", yellow)
+    
+    def draw_values(self, game):
+        """Draw the score line and panel values, skipping any that are unchanged"""
+        stdscr = self.stdscr
+        panel = self.panel
+        yellow = curses.color_pair(3)
         
         # Draw score and status
-        status_y = self.height
-        stdscr.addstr(status_y, 2, f"Score: {self.score}")
-        speed_display = f"Speed: {self.speed_multiplier:.1f}x"
-        stdscr.addstr(status_y, self.width // 2 - len(speed_display) // 2, speed_display)
+        status_y = self.view_height
+        self.put(stdscr, status_y, 2, f"Score: {game.score}")
+        speed_display = f"Speed: {game.speed_multiplier:.1f}x"
+        self.put(stdscr, status_y, self.view_width // 2 - len(speed_display) // 2, speed_display)
+        
+        auto_status = "ON " if game.auto_speed_increase else "OFF"
+        self.put(panel, 4, 11, auto_status,
+                 curses.color_pair(1) if game.auto_speed_increase else curses.color_pair(2))
+        color_name = game.color_names[game.current_color_index]
+        self.put(panel, 7, 5, f"{color_name:10}", curses.color_pair(game.snake_color))
+        
+        # Current stats
+        self.put(panel, 17, 0, f"║ Length: {len(game.snake):6} ║", yellow)
+        self.put(panel, 18, 0, f"║ Speed: {game.speed_multiplier:5.1f}x  ║", yellow)
+        size = f"Size: {game.height}x{game.width}"
+        self.put(panel, 19, 0, f"║ {size:<15}║", yellow)
+        self.put(panel, 20, 0, f"║ Bombs: {len(game.bombs):<7} ║", yellow)
+        if (self.view_height, self.view_width) != (game.height, game.width):
+            # The food may be off screen, so point the way to it
+            self.put(panel, 21, 0, f"║ Food: {self.food_direction(game):<9}║", yellow)
         
-        if self.paused:
+        # Show cooldowns if active
+        if game.bomb_cooldown > 0 or game.bonus_cooldown > 0:
+            if game.bomb_cooldown > 0:
+                bomb_line = f"║ Bomb in: {game.bomb_cooldown:3}   ║"
+            else:
+                bomb_line = "║ Bomb: Ready    ║"
+            if game.bonus_cooldown > 0:
+                bonus_line = f"║ Bonus in: {game.bonus_cooldown:3}  ║"
+            else:
+                bonus_line = "║ Bonus: Ready   ║"
+            cooldowns = ["╔══ COOLDOWNS ═══╗", bomb_line, bonus_line, "╚════════════════╝"]
+        else:
+            cooldowns = [" " * 18] * 4
+        for i, text in enumerate(cooldowns):
+            self.put(panel, 30 + i, 0, text, yellow)
+    
+    def food_direction(self, game):
+        """Describe where the food is relative to the head, e.g. '↑12 →3'"""
+        if game.food is None:
+            return "-"
+        dy = game.food[0] - game.snake[0][0]
+        dx = game.food[1] - game.snake[0][1]
+        parts = []
+        if dy:
+            parts.append(('↓' if dy > 0 else '↑') + str(min(abs(dy), 999)))
+        if dx:
+            parts.append(('→' if dx > 0 else '←') + str(min(abs(dx), 999)))
+        return ' '.join(parts) or "here"
+    
+    def draw_overlay(self, game):
+        """Draw pause and game over messages over the board"""
+        stdscr = self.stdscr
+        height, width = self.view_height, self.view_width
+        if game.paused:
             pause_msg = "PAUSED - Press 'space' to continue"
             settings_msg = "(Settings changed)"
-            stdscr.addstr(self.height // 2 - 1, self.width // 2 - len(pause_msg) // 2, 
+            stdscr.addstr(height // 2 - 1, width // 2 - len(pause_msg) // 2, 
                          pause_msg, curses.color_pair(3))
-            if not self.game_over:
-                stdscr.addstr(self.height // 2, self.width // 2 - len(settings_msg) // 2,
+            if not game.game_over:
+                stdscr.addstr(height // 2, width // 2 - len(settings_msg) // 2,
                              settings_msg, curses.color_pair(3))
         
-        if self.game_over:
-            game_over_msg = "GAME OVER!"
-            final_score_msg = f"Final Score: {self.score}"
+        if game.game_over:
+            game_over_msg = "YOU WIN!" if game.won else "GAME OVER!"
+            final_score_msg = f"Final Score: {game.score}"
             restart_msg = "Press 'r' to restart or 'q' to quit"
             
-            stdscr.addstr(self.height // 2 - 1, self.width // 2 - len(game_over_msg) // 2,
+            stdscr.addstr(height // 2 - 1, width // 2 - len(game_over_msg) // 2,
                          game_over_msg, curses.color_pair(2))
-            stdscr.addstr(self.height // 2, self.width // 2 - len(final_score_msg) // 2,
+            stdscr.addstr(height // 2, width // 2 - len(final_score_msg) // 2,
                          final_score_msg, curses.color_pair(2))
-            stdscr.addstr(self.height // 2 + 1, self.width // 2 - len(restart_msg) // 2,
+            stdscr.addstr(height // 2 + 1, width // 2 - len(restart_msg) // 2,
                          restart_msg, curses.color_pair(3))
-        
-        # Instructions
-        stdscr.addstr(status_y + 1, 2, "Arrow keys: move | space: pause | q: quit | r: restart")
-        
-        # Draw control panel on the right side
-        control_x = self.width + 2
-        control_y = 1
-        
-        stdscr.addstr(control_y, control_x, "╔═══ CONTROLS ═══╗", curses.color_pair(3))
-        stdscr.addstr(control_y + 1, control_x, "║                ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 2, control_x, "║ Speed Control: ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 3, control_x, "║ [-/+] Adjust   ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 4, control_x, "║ [a] Auto: ", curses.color_pair(3))
-        auto_status = "ON " if self.auto_speed_increase else "OFF"
-        stdscr.addstr(control_y + 4, control_x + 11, auto_status, 
-                     curses.color_pair(1) if self.auto_speed_increase else curses.color_pair(2))
-        stdscr.addstr(control_y + 4, control_x + 14, " ║", curses.color_pair(3))
-        
-        stdscr.addstr(control_y + 5, control_x, "║                ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 6, control_x, "║ Color:         ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 7, control_x, "║ [c] ", curses.color_pair(3))
-        color_name = self.color_names[self.current_color_index]
-        stdscr.addstr(control_y + 7, control_x + 5, f"{color_name:10}", curses.color_pair(self.snake_color))
-        stdscr.addstr(control_y + 7, control_x + 15, " ║", curses.color_pair(3))
-        
-        stdscr.addstr(control_y + 8, control_x, "║                ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 9, control_x, "║ Canvas Size:   ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 10, control_x, "║ [w/s] Height   ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 11, control_x, "║ [j/l] Width    ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 12, control_x, "║                ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 13, control_x, "╚════════════════╝", curses.color_pair(3))
-        
-        # Current stats
-        stdscr.addstr(control_y + 15, control_x, "╔═══ STATS ══════╗", curses.color_pair(3))
-        stdscr.addstr(control_y + 16, control_x, "║                ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 17, control_x, f"║ Length: {len(self.snake):6} ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 18, control_x, f"║ Speed: {self.speed_multiplier:5.1f}x  ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 19, control_x, f"║ Size: {self.height}x{self.width:<5} ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 20, control_x, f"║ Bombs: {len(self.bombs):<7} ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 21, control_x, "║                ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 22, control_x, "╚════════════════╝", curses.color_pair(3))
-        
-        # Legend
-        stdscr.addstr(control_y + 24, control_x, "╔═══ LEGEND ═════╗", curses.color_pair(3))
-        stdscr.addstr(control_y + 25, control_x, "║ ★ Food = 10pts ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 26, control_x, "║ ◆ Bonus = 50pts║", curses.color_pair(3))
-        stdscr.addstr(control_y + 27, control_x, "║ X Bomb = Death ║", curses.color_pair(3))
-        stdscr.addstr(control_y + 28, control_x, "╚════════════════╝", curses.color_pair(3))
-        
-        # Show cooldowns if active
-        if self.bomb_cooldown > 0 or self.bonus_cooldown > 0:
-            stdscr.addstr(control_y + 30, control_x, "╔══ COOLDOWNS ═══╗", curses.color_pair(3))
-            if self.bomb_cooldown > 0:
-                stdscr.addstr(control_y + 31, control_x, f"║ Bomb in: {self.bomb_cooldown:3}   ║", curses.color_pair(3))
-            else:
-                stdscr.addstr(control_y + 31, control_x, "║ Bomb: Ready    ║", curses.color_pair(3))
-            if self.bonus_cooldown > 0:
-                stdscr.addstr(control_y + 32, control_x, f"║ Bonus in: {self.bonus_cooldown:3}  ║", curses.color_pair(3))
-            else:
-                stdscr.addstr(control_y + 32, control_x, "║ Bonus: Ready   ║", curses.color_pair(3))
-            stdscr.addstr(control_y + 33, control_x, "╚════════════════╝", curses.color_pair(3))
-        
-        stdscr.refresh()
+            
+            # Best scores on this board and speed, as many as fit; this
+            # game's score is in bold if it made the list
+            if game.leaderboard:
+                rows = [(f"Best {game.height}x{game.width} {game.speed_multiplier:.1f}x", 0)]
+                rows += [(f"{rank}. {score:5}  {day[5:]}",
+                          curses.A_BOLD if score == game.score else 0)
+                         for rank, (score, _, _, day) in enumerate(game.leaderboard, 1)]
+                top = height // 2 + 3
+                for y, (text, attr) in enumerate(rows[:height - 2 - top], top):
+                    stdscr.addstr(y, width // 2 - len(text) // 2, text,
+                                  curses.color_pair(3) | attr)
+
+class TickScheduler:
+    """Fixed-timestep game clock based on time.monotonic.
     
-    def reset(self):
-        """Reset the game to initial state"""
-        # Save current preferences
-        saved_color_index = self.current_color_index
-        saved_speed_multiplier = self.speed_multiplier
-        saved_auto_speed = self.auto_speed_increase
-        saved_max_height = self.max_height
-        saved_max_width = self.max_width
-        
-        self.__init__(self.height, self.width, saved_max_height, saved_max_width)
-        
-        # Restore preferences
-        self.current_color_index = saved_color_index
-        self.snake_color = self.color_pairs[self.current_color_index]
-        self.speed_multiplier = saved_speed_multiplier
-        self.auto_speed_increase = saved_auto_speed
-        self.update_speed()
-        
-        # Clear bombs and bonus food on reset
-        self.bombs = []
-        self.bonus_food = None
-        self.bonus_food_timer = 0
-        self.bomb_cooldown = 0
-        self.bonus_cooldown = 0
+    Each tick is due one tick interval after the previous deadline rather
+    than after the previous wake-up, so timing does not drift. When stopped
+    (paused or game over) there is no deadline and the loop can sleep until
+    the next key press.
+    """
+    MAX_CATCH_UP = 5  # Ticks played at once before giving up and resyncing
     
-    def update_speed(self):
-        """Update the actual game speed based on base speed and multiplier"""
-        self.speed = self.base_speed / self.speed_multiplier
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.next_tick = None  # Deadline of the next tick, None when stopped
+        self.lateness = 0.0  # How late the last tick fired, in seconds
     
-    def change_speed(self, delta):
-        """Change game speed by delta"""
-        self.speed_multiplier = max(0.1, min(5.0, self.speed_multiplier + delta))
-        self.update_speed()
-        self.paused = True  # Auto-pause when changing speed
+    def start(self, interval):
+        """Schedule the first tick one interval from now, unless already running"""
+        if self.next_tick is None:
+            self.next_tick = self.clock() + interval
     
-    def next_color(self):
-        """Cycle to the next snake color"""
-        self.current_color_index = (self.current_color_index + 1) % len(self.color_pairs)
-        self.snake_color = self.color_pairs[self.current_color_index]
-        self.paused = True  # Auto-pause when changing color
+    def stop(self):
+        """Drop the pending deadline"""
+        self.next_tick = None
     
-    def toggle_auto_speed(self):
-        """Toggle automatic speed increase"""
-        self.auto_speed_increase = not self.auto_speed_increase
-        self.paused = True  # Auto-pause when toggling auto speed
+    def timeout_ms(self):
+        """Milliseconds to wait for input before the next tick, or -1 to wait forever"""
+        if self.next_tick is None:
+            return -1
+        # Round down; settle() sleeps off the sub-millisecond remainder
+        return max(0, math.floor((self.next_tick - self.clock()) * 1000))
     
-    def resize_canvas(self, height_delta=0, width_delta=0):
-        """Resize the game canvas"""
-        new_height = self.height + height_delta
-        new_width = self.width + width_delta
-        
-        # Ensure minimum size
-        new_height = max(10, min(new_height, self.max_height))
-        new_width = max(20, min(new_width, self.max_width))
-        
-        if new_height != self.height or new_width != self.width:
-            # Save game state
-            saved_score = self.score
-            saved_color_index = self.current_color_index
-            saved_speed_multiplier = self.speed_multiplier
-            saved_auto_speed = self.auto_speed_increase
-            
-            # Reinitialize with new size
-            self.__init__(new_height, new_width, self.max_height, self.max_width)
-            
-            # Restore saved state
-            self.score = saved_score
-            self.current_color_index = saved_color_index
-            self.snake_color = self.color_pairs[self.current_color_index]
-            self.speed_multiplier = saved_speed_multiplier
-            self.auto_speed_increase = saved_auto_speed
-            self.update_speed()
-            self.generate_food()
-            self.paused = True  # Auto-pause after resizing
-            
-            # Clear bombs and regenerate to fit new size
-            self.bombs = []
-            self.bonus_food = None
-            self.bonus_food_timer = 0
-            self.bomb_cooldown = 0
-            self.bonus_cooldown = 0
+    def settle(self):
+        """Sleep until the deadline if it is less than a millisecond away"""
+        if self.next_tick is not None:
+            remaining = self.next_tick - self.clock()
+            if 0 < remaining < 0.001:
+                time.sleep(remaining)
+    
+    def due_ticks(self, interval):
+        """Return how many ticks are due now and advance the deadline past them"""
+        if self.next_tick is None:
+            return 0
+        now = self.clock()
+        ticks = 0
+        while self.next_tick <= now:
+            if ticks == 0:
+                self.lateness = now - self.next_tick
+            ticks += 1
+            self.next_tick += interval
+            if ticks == self.MAX_CATCH_UP:
+                # We were suspended or badly overloaded; don't try to catch up
+                self.next_tick = now + interval
+                break
+        return ticks
 
-def main(stdscr):
-    # Initialize curses
+def setup_screen(stdscr):
+    """Configure curses input mode and the color pairs used by the renderer"""
     curses.curs_set(0)  # Hide cursor
     stdscr.nodelay(1)   # Non-blocking input
-    stdscr.timeout(100) # Refresh rate in milliseconds
     
     # Initialize colors
     curses.start_color()
-    curses.init_pair(1, curses.COLOR_GREEN, curses.COLOR_BLACK)  # Green Snake
-    curses.init_pair(2, curses.COLOR_RED, curses.COLOR_BLACK)    # Food
-    curses.init_pair(3, curses.COLOR_YELLOW, curses.COLOR_BLACK) # Messages
-    curses.init_pair(4, curses.COLOR_BLUE, curses.COLOR_BLACK)   # Blue Snake
-    curses.init_pair(5, curses.COLOR_CYAN, curses.COLOR_BLACK)   # Cyan Snake
-    curses.init_pair(6, curses.COLOR_MAGENTA, curses.COLOR_BLACK) # Magenta Snake
-    curses.init_pair(7, curses.COLOR_WHITE, curses.COLOR_BLACK)  # White Snake
-    
-    # Get terminal size and create game
-    height, width = stdscr.getmaxyx()
-    max_game_height = min(height - 3, 30)
-    max_game_width = min(width - 25, 80)
-    game_height = min(20, max_game_height)  # Start with reasonable size
-    game_width = min(40, max_game_width)
+    for pair, (foreground, background) in COLOR_PAIRS.items():
+        curses.init_pair(pair, foreground, background)
+
+def log_first_frame(launched_at):
+    """Append the time from launch to the first frame to the startup log
+    named by the launcher, as a JSON line"""
+    record = {'time': round(time.time(), 3),
+              'mode': os.environ.get('SNAKE_LAUNCH_MODE', ''),
+              'first_frame_ms': round((time.time() - launched_at) * 1000, 1)}
+    try:
+        with open(os.environ['SNAKE_STARTUP_LOG'], 'a') as f:
+            f.write(json.dumps(record) + '\n')
+    except (KeyError, OSError):
+        pass
+
+def main(stdscr, record_dir=None, profile=False, profile_log=None, autopilot=False,
+         board=None, rewind_seconds=30, ansi=False, frame_budget=None, scores_path=None):
+    """Play until q is pressed; returns the ANSI output metrics when ansi is set.
+    
+    Finished games are saved to the score database at scores_path, if given.
+    """
+    setup_screen(stdscr)
+    # Set when started by snake_game_launcher.py, which times the first frame
+    launched_at = os.environ.pop('SNAKE_LAUNCHED_AT', None)
+    # Curses still reads the keys; with ansi, frames are drawn by an AnsiScreen
+    screen = AnsiScreen(*stdscr.getmaxyx(), COLOR_PAIRS, sys.stdout.fileno(),
+                        frame_budget) if ansi else None
+    view = screen.stdscr if screen else stdscr
+    
+    if board:
+        # A fixed board size, shown through a scrolling viewport if needed
+        game_height, game_width = max_game_height, max_game_width = board
+    else:
+        # Get terminal size and create game
+        height, width = stdscr.getmaxyx()
+        max_game_height = min(height - 3, 30)
+        max_game_width = min(width - 25, 80)
+        game_height = min(20, max_game_height)  # Start with reasonable size
+        game_width = min(40, max_game_width)
     
     game = SnakeGame(game_height, game_width, max_game_height, max_game_width)
     game.generate_food()
     
-    last_move_time = time.time()
+    # Each game gets its own replay file when recording
+    recorder = None
+    
+    def save_recording(recording):
+        if recording is not None and recording.ticks > 0:
+            name = time.strftime("snake-%Y%m%d-%H%M%S") + f"-{recording.seed}.snkr"
+            snake_replay.save(recording, os.path.join(record_dir, name))
+    
+    scheduler = TickScheduler()
+    profiler = FrameProfiler(profile_log) if profile else NullProfiler()
+    # Profiling that was switched off with 'p' keeps its data for the log
+    profilers = [profiler]
+    autopilot = Autopilot() if autopilot else None
+    rewind = RewindBuffer(rewind_seconds) if rewind_seconds > 0 else None
+    scores = ScoreStore(scores_path) if scores_path else None
+    scored = False  # The current game has been saved
     
     while True:
-        # Handle input
+        if record_dir is not None and game.inputs is None:
+            # A new game started: initial or after a restart
+            recorder = snake_replay.Recorder(game)
+        if rewind:
+            rewind.attach(game)
+        
+        # Sleep until the next tick is due or a key arrives; with no tick
+        # pending (paused or game over) this waits for a key indefinitely
+        if game.paused or game.game_over:
+            scheduler.stop()
+        else:
+            scheduler.start(game.speed)
+        timeout = scheduler.timeout_ms()
+        if timeout < 0 and scores and scores.busy():
+            timeout = SCORES_POLL_MS  # Wake up to draw the leaderboard once it is read
+        stdscr.timeout(timeout)
         key = stdscr.getch()
-        
-        if key == ord('q'):
+        stdscr.timeout(0)
+        if key == -1:
+            scheduler.settle()
+        profiler.frame_start()
+        
+        # Handle every key that arrived
+        quit_game = False
+        while key != -1:
+            if key == ord('q'):
+                quit_game = True
+                break
+            elif key == ord(' '):  # Space bar for pause
+                game.paused = not game.paused
+            elif key == ord('r') and game.game_over:
+                if recorder:
+                    save_recording(recorder.recording())
+                game.reset()
+                scored = False
+                game.generate_food()
+            elif key == ord('-') or key == ord('_'):
+                game.change_speed(-0.1)
+            elif key == ord('+') or key == ord('='):
+                game.change_speed(0.1)
+            elif key == ord('a') and not game.game_over:
+                game.toggle_auto_speed()
+            elif key == ord('c') and not game.game_over:
+                game.next_color()
+            elif key == ord('w') and not game.game_over:
+                game.resize_canvas(height_delta=-1)
+            elif key == ord('s') and not game.game_over:
+                game.resize_canvas(height_delta=1)
+            elif key == ord('j') and not game.game_over:
+                game.resize_canvas(width_delta=-2)
+            elif key == ord('l') and not game.game_over:
+                game.resize_canvas(width_delta=2)
+            elif key == ord('p'):
+                if profiler.enabled:
+                    profiler = NullProfiler()
+                else:
+                    profiler = FrameProfiler(profile_log)
+                    profilers.append(profiler)
+                game.redraw_all()
+            elif key == ord('z') and rewind:
+                was_over = game.game_over
+                rewind.rewind(game, STEP_SECONDS)
+                if was_over and not game.game_over:
+                    # Back before the crash: the game is saved again when it really ends
+                    scored = False
+                    game.leaderboard = None
+            elif key == ord('o'):
+                autopilot = None if autopilot else Autopilot()
+                game.redraw_all()
+            elif key == curses.KEY_RESIZE:
+                if screen:
+                    stdscr.refresh()  # Let curses clear the resized terminal first
+                    screen.resize(*stdscr.getmaxyx())
+                game.redraw_all()
+            elif key in game.directions and not game.game_over:
+                game.change_direction(key)
+            key = stdscr.getch()
+        if quit_game:
             break
-        elif key == ord(' '):  # Space bar for pause
-            game.paused = not game.paused
-        elif key == ord('r') and game.game_over:
-            game.reset()
-            game.generate_food()
-        elif key == ord('-') or key == ord('_'):
-            game.change_speed(-0.1)
-        elif key == ord('+') or key == ord('='):
-            game.change_speed(0.1)
-        elif key == ord('a') and not game.game_over:
-            game.toggle_auto_speed()
-        elif key == ord('c') and not game.game_over:
-            game.next_color()
-        elif key == ord('w') and not game.game_over:
-            game.resize_canvas(height_delta=-1)
-        elif key == ord('s') and not game.game_over:
-            game.resize_canvas(height_delta=1)
-        elif key == ord('j') and not game.game_over:
-            game.resize_canvas(width_delta=-2)
-        elif key == ord('l') and not game.game_over:
-            game.resize_canvas(width_delta=2)
-        elif key in game.directions and not game.game_over:
-            game.change_direction(key)
-        
-        # Move snake at specified speed
-        current_time = time.time()
-        if current_time - last_move_time >= game.speed:
+        profiler.lap('input')
+        
+        # Move snake once per elapsed tick interval
+        if game.paused or game.game_over:
+            scheduler.stop()
+        ticks = scheduler.due_ticks(game.speed)
+        for _ in range(ticks):
+            if rewind:
+                rewind.record(game)
+            latency = game.turns.apply(game)
+            if latency is not None:
+                profiler.turned(latency)
+            if autopilot:
+                action = autopilot.decide(game)
+                if action is not None:
+                    game.turn(action)
             game.move_snake()
-            last_move_time = current_time
+        if scores and game.game_over:
+            # Saving happens on the score thread; the leaderboard is drawn
+            # from its cache and fills in once read
+            if not scored:
+                scores.record(game)
+                scored = True
+            game.leaderboard = scores.leaderboard(game.height, game.width, game.speed_multiplier)
+        profiler.ticked(ticks, scheduler.lateness)
+        profiler.lap('tick')
         
         # Draw everything
-        game.draw(stdscr)
+        panels = [panel for panel in (profiler, autopilot) if panel and panel.enabled]
+        game.draw(view, panels)
+        profiler.lap('draw')
+        profiler.frame_end()
+        if launched_at is not None:
+            log_first_frame(float(launched_at))
+            launched_at = None
+    
+    for profiler in profilers:
+        profiler.close()
+    if scores:
+        scores.close()
+
+    if recorder:
+        save_recording(recorder.recording())
+    return screen.metrics() if screen else None
+
+def board_size(text):
+    """Parse a --board argument such as 1000x1000"""
+    try:
+        height, width = (int(n) for n in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected HEIGHTxWIDTH, got {text!r}")
+    if not (10 <= height <= 65535 and 20 <= width <= 65535):
+        raise argparse.ArgumentTypeError("board must be 10x20 to 65535x65535")
+    return height, width
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Terminal Snake Game")
+    parser.add_argument('--record', metavar='DIR',
+                        help="save a replay of every game into DIR")
+    parser.add_argument('--profile', action='store_true',
+                        help="show frame timings next to the stats (toggle with 'p')")
+    parser.add_argument('--profile-log', metavar='FILE',
+                        help="append profiler metrics to FILE as JSON lines on exit")
+    parser.add_argument('--autopilot', action='store_true',
+                        help="let the computer play (toggle with 'o')")
+    parser.add_argument('--board', metavar='HxW', type=board_size,
+                        help="play on a fixed board of this size, e.g. 1000x1000; "
+                             "boards larger than the terminal scroll with the snake")
+    parser.add_argument('--rewind', metavar='SECONDS', type=float, default=30,
+                        help="keep the last SECONDS of play for rewinding with 'z' "
+                             "(default 30, 0 turns it off)")
+    parser.add_argument('--ansi', action='store_true',
+                        help="draw with buffered ANSI output instead of curses, one write "
+                             "per frame (for slow SSH links)")
+    parser.add_argument('--scores', metavar='FILE', default=SCORES_PATH,
+                        help=f"save finished games to this SQLite database for the "
+                             f"leaderboard (default {SCORES_PATH}, '' turns it off)")
+    parser.add_argument('--frame-budget', metavar='BYTES', type=int,
+                        help="with --ansi, bytes per frame before side panel updates are "
+                             "held back for later frames")
+    args = parser.parse_args()
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+    
     try:
-        curses.wrapper(main)
+        metrics = curses.wrapper(main, args.record, args.profile or bool(args.profile_log),
+                                 args.profile_log, args.autopilot, args.board, args.rewind,
+                                 args.ansi or args.frame_budget is not None, args.frame_budget,
+                                 args.scores)
+        if metrics:
+            print(f"ANSI output: {metrics['frames']} frames, "
+                  f"{metrics['bytes_per_frame']:.0f} bytes and "
+                  f"{metrics['writes_per_frame']:.2f} writes per frame, "
+                  f"largest {metrics['max_frame_bytes']} bytes, "
+                  f"{metrics['over_budget_frames']} over budget")
     except KeyboardInterrupt:
         print("\nGame interrupted!")
     except Exception as e:
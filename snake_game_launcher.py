@@ -1,100 +1,186 @@
 #!/usr/bin/env python3
 """
 Snake Game Launcher
-Automatically opens the game in a new terminal window
+Runs the game in this terminal, or opens a new terminal window for it when
+started without one (e.g. by double-clicking)
+Usage: python snake_game_launcher.py [--here | --new-window] [--forget] [--stats] [GAME OPTIONS]
+
+The terminal found on the first launch is remembered in a small config
+file, so later launches go straight to it. Options the launcher does not
+know, such as --ansi, are passed on to the game.
 """
 
+import argparse
+import json
 import os
-import sys
-import subprocess
 import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snake_game.py")
+CONFIG_PATH = os.path.join(os.path.expanduser('~'), '.snake_launcher.json')
+STARTUP_LOG = os.path.join(os.path.expanduser('~'), '.snake_startup.jsonl')
+
+
+def powershell_quote(text):
+    return "'" + text.replace("'", "''") + "'"
+
+
+# Terminal emulators in order of preference, by platform: name -> function
+# building the command line from the terminal's path, the game command,
+# its directory and the launch environment
+TERMINALS = {
+    'Windows': {
+        # Windows Terminal first (best experience), then a new console window
+        'wt': lambda path, command, directory, env: [path, '-d', directory, *command],
+        'powershell': lambda path, command, directory, env: [
+            path, '-NoExit', '-Command', '& ' + ' '.join(map(powershell_quote, command))],
+        'cmd': lambda path, command, directory, env: [path, '/k', *command],
+    },
+    'Darwin': {
+        # Terminal.app starts a login shell, so the environment goes in the script
+        'osascript': lambda path, command, directory, env: [path, '-e', (
+            'tell application "Terminal"\n'
+            '    do script "cd {} && {}"\n'
+            '    activate\n'
+            'end tell').format(*(text.replace('\\', '\\\\').replace('"', '\\"') for text in (
+                shlex.quote(directory),
+                shlex.join(['env', *(f'{key}={value}' for key, value in env.items()), *command]))))],
+    },
+    'Linux': {
+        'gnome-terminal': lambda path, command, directory, env: [path, '--', *command],
+        'konsole': lambda path, command, directory, env: [path, '-e', *command],
+        'xterm': lambda path, command, directory, env: [path, '-e', *command],
+        'xfce4-terminal': lambda path, command, directory, env: [path, '-x', *command],
+    },
+}
+
+
+def platform_terminals():
+    """The terminal table for this platform; other Unixes use the Linux one"""
+    return TERMINALS.get(platform.system(), TERMINALS['Linux'])
+
+
+def load_config():
+    try:
+        with open(CONFIG_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_config(config):
+    try:
+        with open(CONFIG_PATH, 'w') as f:
+            json.dump(config, f)
+    except OSError:
+        pass  # Detected again next time
+
+
+def candidate_terminals(config):
+    """Yield (name, path) for the terminals to try: the remembered one while
+    its program still exists, then any on PATH. Nothing is run to find them."""
+    terminals = platform_terminals()
+    name, path = config.get('terminal'), config.get('path')
+    if name in terminals and path and os.path.isfile(path):
+        yield name, path
+    for other in terminals:
+        if other != name:
+            path = shutil.which(other)
+            if path:
+                yield other, path
 
-def launch_in_new_terminal():
-    """Launch the snake game in a new terminal window"""
-    
-    # Get the path to the snake game
-    game_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snake_game.py")
-    
-    if not os.path.exists(game_path):
+
+def open_terminal(command, env):
+    """Start the game command in a new terminal window without waiting for
+    it; return the terminal's name, or None if none could be started"""
+    config = load_config()
+    terminals = platform_terminals()
+    if platform.system() == 'Windows':
+        options = {'creationflags': subprocess.CREATE_NEW_CONSOLE}
+    else:
+        options = {'start_new_session': True}  # Outlives the launcher
+    for name, path in candidate_terminals(config):
+        try:
+            subprocess.Popen(terminals[name](path, command, os.path.dirname(GAME_PATH), env),
+                             env={**os.environ, **env}, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **options)
+        except OSError:
+            continue
+        if (config.get('terminal'), config.get('path')) != (name, path):
+            save_config({'terminal': name, 'path': path})
+        return name
+    return None
+
+
+def run_here(game_args):
+    """Run the game in this process and terminal, sparing a second interpreter start"""
+    import runpy
+    sys.argv = [GAME_PATH, *game_args]
+    runpy.run_path(GAME_PATH, run_name='__main__')
+
+
+def startup_stats(path=STARTUP_LOG, last=20):
+    """Return (runs, median, p95, latest) first-frame milliseconds of the last runs, or None"""
+    try:
+        with open(path) as f:
+            times = [json.loads(line)['first_frame_ms'] for line in f][-last:]
+    except (OSError, ValueError, KeyError):
+        return None
+    if not times:
+        return None
+    ordered = sorted(times)
+    return (len(times), ordered[len(ordered) // 2],
+            ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], times[-1])
+
+
+def main():
+    launched_at = time.time()
+    parser = argparse.ArgumentParser(description="Start the snake game",
+                                     epilog="Other options are passed on to the game.")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument('--here', action='store_true', help="run in this terminal")
+    where.add_argument('--new-window', action='store_true',
+                       help="open a new terminal window even when run from one")
+    parser.add_argument('--forget', action='store_true',
+                        help="forget the remembered terminal and look for one again")
+    parser.add_argument('--startup-log', metavar='FILE', default=STARTUP_LOG,
+                        help=f"append time-to-first-frame to FILE (default {STARTUP_LOG})")
+    parser.add_argument('--stats', action='store_true',
+                        help="show recent time-to-first-frame figures and exit")
+    args, game_args = parser.parse_known_args()
+
+    if args.stats:
+        stats = startup_stats(args.startup_log)
+        if stats is None:
+            print(f"No launches logged in {args.startup_log} yet")
+        else:
+            print("Time to first frame over the last {} launches: median {:.0f} ms, "
+                  "p95 {:.0f} ms, latest {:.0f} ms".format(*stats))
+        return
+
+    if not os.path.exists(GAME_PATH):
         print("Error: snake_game.py not found in the same directory!")
         input("Press Enter to exit...")
         return
-    
-    system = platform.system()
-    
-    if system == "Windows":
-        # Check if running in a terminal already
-        try:
-            # Try to get terminal size - if this fails, we're not in a proper terminal
-            os.get_terminal_size()
-            # We're in a terminal, just run the game directly
-            subprocess.run([sys.executable, game_path])
-        except:
-            # Not in a proper terminal, open a new one
-            
-            # Try Windows Terminal first (best experience)
-            try:
-                subprocess.run([
-                    "wt.exe",
-                    "-d", os.path.dirname(game_path),
-                    "python", game_path
-                ])
-                return
-            except:
-                pass
-            
-            # Try PowerShell
-            try:
-                subprocess.run([
-                    "powershell",
-                    "-NoExit",
-                    "-Command",
-                    f"cd '{os.path.dirname(game_path)}'; python snake_game.py; Write-Host 'Press any key to exit...'; $null = $Host.UI.RawUI.ReadKey('NoEcho,IncludeKeyDown')"
-                ])
-                return
-            except:
-                pass
-            
-            # Fallback to cmd
-            try:
-                cmd_command = f'cd /d "{os.path.dirname(game_path)}" && python snake_game.py && pause'
-                subprocess.run([
-                    "cmd",
-                    "/c",
-                    f"start cmd /k {cmd_command}"
-                ])
-            except Exception as e:
-                print(f"Error launching terminal: {e}")
-                input("Press Enter to exit...")
-                
-    elif system == "Darwin":  # macOS
-        # Open in Terminal app
-        apple_script = f'''
-        tell application "Terminal"
-            do script "cd '{os.path.dirname(game_path)}' && python3 '{game_path}'"
-            activate
-        end tell
-        '''
-        subprocess.run(["osascript", "-e", apple_script])
-        
-    elif system == "Linux":
-        # Try various terminal emulators
-        terminals = [
-            ["gnome-terminal", "--", "python3", game_path],
-            ["konsole", "-e", "python3", game_path],
-            ["xterm", "-e", "python3", game_path],
-            ["xfce4-terminal", "-e", f"python3 {game_path}"]
-        ]
-        
-        for terminal_cmd in terminals:
-            try:
-                subprocess.run(terminal_cmd)
-                break
-            except:
-                continue
-        else:
-            print("No suitable terminal found. Running in current terminal...")
-            subprocess.run(["python3", game_path])
+    if args.forget:
+        save_config({})
+
+    # The game logs how long its first frame took from here
+    env = {'SNAKE_LAUNCHED_AT': repr(launched_at), 'SNAKE_STARTUP_LOG': args.startup_log}
+    if args.here or (not args.new_window and sys.stdout.isatty()):
+        os.environ.update(env, SNAKE_LAUNCH_MODE='here')
+        run_here(game_args)
+        return
+    env['SNAKE_LAUNCH_MODE'] = 'new-window'
+    if open_terminal([sys.executable, GAME_PATH, *game_args], env) is None:
+        print("No suitable terminal found. Running in current terminal...")
+        os.environ.update(env, SNAKE_LAUNCH_MODE='here')
+        run_here(game_args)
+
 
 if __name__ == "__main__":
-    launch_in_new_terminal()
+    main()
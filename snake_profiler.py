@@ -0,0 +1,180 @@
+"""
+Snake Game Profiler
+Times input, simulation and drawing in the main loop and shows the results
+in a side panel; enable with --profile or the 'p' key
+"""
+
+import json
+import time
+from array import array
+from collections import deque
+
+SECTIONS = ('input', 'tick', 'draw', 'frame')
+
+
+class RollingStats:
+    """Percentiles over the last `size` samples, kept in a fixed ring buffer"""
+    def __init__(self, size=512):
+        self.samples = array('d', bytes(8 * size))
+        self.size = size
+        self.count = 0
+
+    def add(self, value):
+        self.samples[self.count % self.size] = value
+        self.count += 1
+
+    def percentiles(self, *points):
+        """Return the requested percentiles (0-100) of the samples in the window"""
+        window = sorted(self.samples[:min(self.count, self.size)])
+        if not window:
+            return (0.0,) * len(points)
+        return tuple(window[min(len(window) - 1, int(len(window) * p / 100))]
+                     for p in points)
+
+
+class NullProfiler:
+    """Stand-in used while profiling is off; every hook does nothing"""
+    enabled = False
+
+    def frame_start(self):
+        pass
+
+    def lap(self, section):
+        pass
+
+    def ticked(self, ticks, lateness):
+        pass
+
+    def turned(self, latency):
+        pass
+
+    def frame_end(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FrameProfiler:
+    """Rolling frame, input, tick and draw timings plus tick rate and missed deadlines.
+
+    The main loop calls frame_start() after waking up, lap(section) after
+    each phase, ticked() with the scheduler's result and frame_end() at the
+    end. Once per second a snapshot is kept; close() writes them and a
+    summary as JSON lines when a log path was given.
+    """
+    enabled = True
+    LATE_TOLERANCE = 0.002  # A tick this late (seconds) counts as a missed deadline
+    PANEL_Y = 15  # Panel row, level with the STATS box
+    PANEL_WIDTH = 19
+
+    def __init__(self, log_path=None, clock=time.perf_counter):
+        self.log_path = log_path
+        self.clock = clock
+        self.stats = {section: RollingStats() for section in SECTIONS}
+        self.turn_latency = RollingStats()  # Key press to the move that made the turn
+        self.snapshots = deque(maxlen=3600)
+        self.frame_begin = self.lap_begin = 0.0
+        self.ticks = 0
+        self.missed = 0
+        self.total_ticks = 0
+        self.total_missed = 0
+        self.second_begin = clock()
+        self.ticks_per_second = 0.0
+        self.window = None
+        self.shown_at = None  # second_begin of the numbers on screen
+
+    def frame_start(self):
+        self.frame_begin = self.lap_begin = self.clock()
+
+    def lap(self, section):
+        now = self.clock()
+        self.stats[section].add(now - self.lap_begin)
+        self.lap_begin = now
+
+    def ticked(self, ticks, lateness):
+        if ticks:
+            self.ticks += ticks
+            if lateness > self.LATE_TOLERANCE:
+                self.missed += 1
+            # Ticks beyond the first one were all played after their deadline
+            self.missed += ticks - 1
+
+    def turned(self, latency):
+        self.turn_latency.add(latency)
+
+    def frame_end(self):
+        now = self.clock()
+        self.stats['frame'].add(now - self.frame_begin)
+        if now - self.second_begin >= 1.0:
+            self.ticks_per_second = self.ticks / (now - self.second_begin)
+            self.total_ticks += self.ticks
+            self.total_missed += self.missed
+            self.snapshots.append(self.snapshot(time.time()))
+            self.ticks = self.missed = 0
+            self.second_begin = now
+
+    def snapshot(self, timestamp):
+        """Return the current metrics as a dict of milliseconds and rates"""
+        record = {'time': round(timestamp, 3),
+                  'ticks_per_second': round(self.ticks_per_second, 2),
+                  'missed_deadlines': self.missed}
+        for section in SECTIONS:
+            p50, p95, p99 = self.stats[section].percentiles(50, 95, 99)
+            record[section] = {'p50_ms': round(p50 * 1000, 3),
+                               'p95_ms': round(p95 * 1000, 3),
+                               'p99_ms': round(p99 * 1000, 3)}
+        p50, p95, p99 = self.turn_latency.percentiles(50, 95, 99)
+        record['turn_latency'] = {'p50_ms': round(p50 * 1000, 3),
+                                  'p95_ms': round(p95 * 1000, 3),
+                                  'p99_ms': round(p99 * 1000, 3)}
+        return record
+
+    def close(self):
+        """Write the per-second snapshots and a summary to the log, if any"""
+        if not self.log_path:
+            return
+        summary = self.snapshot(time.time())
+        summary['summary'] = True
+        summary['total_ticks'] = self.total_ticks + self.ticks
+        summary['total_missed_deadlines'] = self.total_missed + self.missed
+        with open(self.log_path, 'a') as f:
+            for record in list(self.snapshots) + [summary]:
+                f.write(json.dumps(record) + '\n')
+
+    def draw(self, renderer, game, full):
+        """Side panel hook called by the renderer each frame"""
+        import curses
+
+        x = renderer.view_width + 2 + renderer.PANEL_WIDTH + 1
+        max_y, max_x = renderer.stdscr.getmaxyx()
+        if x + self.PANEL_WIDTH > max_x or self.PANEL_Y + 10 > max_y:
+            return  # No room next to the STATS box
+        if self.window is None:
+            self.window = renderer.newwin(10, self.PANEL_WIDTH, self.PANEL_Y + 1, x)
+            full = True
+        elif full:
+            self.window.mvwin(self.PANEL_Y + 1, x)
+
+        # Numbers change every frame; refresh them once per second
+        if full or self.shown_at != self.second_begin:
+            self.shown_at = self.second_begin
+            frame = self.stats['frame'].percentiles(50, 95, 99)
+            lines = [
+                "╔═══ PROFILER ═══╗",
+                f"║ p50: {frame[0] * 1000:6.2f} ms ║",
+                f"║ p95: {frame[1] * 1000:6.2f} ms ║",
+                f"║ p99: {frame[2] * 1000:6.2f} ms ║",
+                "║ in/tk/dr p95ms ║",
+                "║ {:4.1f} {:4.1f} {:4.1f} ║".format(
+                    *(self.stats[s].percentiles(95)[0] * 1000 for s in ('input', 'tick', 'draw'))),
+                f"║ Ticks/s: {self.ticks_per_second:5.1f} ║",
+                f"║ Missed: {self.total_missed + self.missed:6} ║",
+                f"║ Turn p95:{self.turn_latency.percentiles(95)[0] * 1000:3.0f}ms ║",
+                "╚════════════════╝",
+            ]
+            for y, text in enumerate(lines):
+                self.window.addstr(y, 0, text, curses.color_pair(3))
+        # The board may have been copied over our area on the virtual screen
+        self.window.touchwin()
+        self.window.noutrefresh()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Snake Game Replays
+Records games as seed + rules + inputs and plays them back
+Usage: python snake_replay.py FILE [--headless] [--rate N]
+Playback keys: space pause, +/- rate (1x-64x), left/right seek, q quit
+"""
+
+import argparse
+import os
+import struct
+import time
+
+from snake_engine import SnakeEngine, INPUT_AUTO_SPEED, INPUT_SPEED, INPUT_RESIZE
+
+MAGIC = b'SNKR'
+VERSION = 2  # Version 2 added board resizes to the inputs
+HEADER = struct.Struct('<4sBQHH')  # magic, version, seed, height, width
+INPUT_END = 0xFF  # Marks the final tick, followed by the final score
+
+# Engine attributes at the start of a game stored in every recording,
+# with their struct formats
+CONFIG_FIELDS = (
+    ('score', 'I'),
+    ('max_bombs', 'H'),
+    ('bomb_spawn_chance', 'd'),
+    ('bomb_min_duration', 'H'),
+    ('bomb_max_duration', 'H'),
+    ('bomb_cooldown_time', 'H'),
+    ('bonus_food_min_duration', 'H'),
+    ('bonus_food_max_duration', 'H'),
+    ('bonus_spawn_chance', 'd'),
+    ('bonus_cooldown_time', 'H'),
+    ('early_removal_chance', 'd'),
+    ('base_speed', 'd'),
+    ('speed_multiplier', 'd'),
+    ('auto_speed_increase', '?'),
+)
+CONFIG = struct.Struct('<' + ''.join(fmt for _, fmt in CONFIG_FIELDS))
+
+SEEK_TICKS = 100  # Ticks skipped by one seek key press
+MAX_RATE = 64
+
+
+class Recording:
+    """A finished game: seed, board size, rules and the inputs made on each tick"""
+    def __init__(self, seed, height, width, config, inputs, ticks=0, score=0):
+        self.seed = seed
+        self.height = height
+        self.width = width
+        self.config = config  # Dict of CONFIG_FIELDS values
+        self.inputs = inputs  # List of (tick, code, value)
+        self.ticks = ticks
+        self.score = score
+
+
+class Recorder:
+    """Logs the inputs of a game that has just started"""
+    def __init__(self, engine):
+        self.engine = engine
+        self.height, self.width = engine.height, engine.width  # Resizes are inputs
+        self.config = {name: getattr(engine, name) for name, _ in CONFIG_FIELDS}
+        engine.inputs = []
+
+    def recording(self):
+        """Return the game so far as a Recording"""
+        engine = self.engine
+        return Recording(engine.seed, self.height, self.width, self.config,
+                         list(engine.inputs), engine.tick, engine.score)
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode(recording):
+    """Encode a Recording as bytes"""
+    out = bytearray(HEADER.pack(MAGIC, VERSION, recording.seed,
+                                recording.height, recording.width))
+    out += CONFIG.pack(*(recording.config[name] for name, _ in CONFIG_FIELDS))
+    last = 0
+    for tick, code, value in recording.inputs:
+        _write_varint(out, tick - last)
+        out.append(code)
+        if code in (INPUT_AUTO_SPEED, INPUT_SPEED):
+            out.append(value)
+        elif code == INPUT_RESIZE:
+            _write_varint(out, value)
+        last = tick
+    _write_varint(out, recording.ticks - last)
+    out.append(INPUT_END)
+    _write_varint(out, recording.score)
+    return bytes(out)
+
+
+def decode(data):
+    """Decode bytes written by encode into a Recording"""
+    magic, version, seed, height, width = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a snake replay")
+    if version not in (1, VERSION):
+        raise ValueError(f"unsupported replay version {version}")
+    values = CONFIG.unpack_from(data, HEADER.size)
+    config = {name: value for (name, _), value in zip(CONFIG_FIELDS, values)}
+
+    pos = HEADER.size + CONFIG.size
+    inputs = []
+    tick = 0
+    while True:
+        delta, pos = _read_varint(data, pos)
+        tick += delta
+        code = data[pos]
+        pos += 1
+        if code == INPUT_END:
+            score, pos = _read_varint(data, pos)
+            return Recording(seed, height, width, config, inputs, tick, score)
+        value = 0
+        if code in (INPUT_AUTO_SPEED, INPUT_SPEED):
+            value = data[pos]
+            pos += 1
+        elif code == INPUT_RESIZE:
+            value, pos = _read_varint(data, pos)
+        inputs.append((tick, code, value))
+
+
+def load(path):
+    """Read a Recording from a file"""
+    with open(path, 'rb') as f:
+        return decode(f.read())
+
+
+def save(recording, path):
+    """Write a Recording to a file"""
+    with open(path, 'wb') as f:
+        f.write(encode(recording))
+
+
+class Playback:
+    """Re-simulates a Recording on an engine, applying each input on its tick"""
+    def __init__(self, recording, engine):
+        self.recording = recording
+        self.engine = engine
+        self.next_input = 0
+        for name, value in recording.config.items():
+            setattr(engine, name, value)
+        engine.update_speed()
+        engine.generate_food()
+
+    @property
+    def finished(self):
+        return self.engine.game_over or self.engine.tick >= self.recording.ticks
+
+    def advance_to(self, tick):
+        """Play inputs and moves until the engine reaches tick or the recording ends"""
+        engine = self.engine
+        inputs = self.recording.inputs
+        tick = min(tick, self.recording.ticks)
+        while True:
+            while (self.next_input < len(inputs) and
+                   inputs[self.next_input][0] == engine.tick):
+                _, code, value = inputs[self.next_input]
+                engine.apply_input(code, value)
+                self.next_input += 1
+            if engine.tick >= tick or engine.game_over:
+                break
+            engine.move_snake()
+
+
+def simulate(recording, until=None):
+    """Replay a recording headlessly at full speed and return the engine"""
+    playback = Playback(recording, SnakeEngine(recording.height, recording.width,
+                                               recording.seed))
+    playback.advance_to(recording.ticks if until is None else until)
+    return playback.engine
+
+
+def play(stdscr, recording, rate=1):
+    """Show a recording in the terminal at 1x to 64x speed with seeking"""
+    import curses
+    from snake_game import SnakeGame, setup_screen
+
+    def start(tick):
+        game = SnakeGame(recording.height, recording.width,
+                         recording.height, recording.width, recording.seed)
+        playback = Playback(recording, game)
+        playback.advance_to(tick)
+        return playback
+
+    setup_screen(stdscr)
+    playback = start(0)
+    paused = False
+    next_tick = time.monotonic()
+
+    while True:
+        game = playback.engine
+        game.draw(stdscr)
+        status = f"Replay {game.tick}/{recording.ticks}  {rate}x"
+        if paused:
+            status += "  PAUSED"
+        stdscr.addstr(game.renderer.view_height + 2, 2, f"{status:<{max(len(status), 30)}}")
+        stdscr.noutrefresh()
+        curses.doupdate()
+
+        # Sleep until the next tick is due or a key arrives
+        if paused or playback.finished:
+            stdscr.timeout(-1)
+        else:
+            stdscr.timeout(max(0, int((next_tick - time.monotonic()) * 1000)))
+        key = stdscr.getch()
+
+        if key == ord('q'):
+            break
+        elif key == ord(' '):
+            paused = not paused
+            next_tick = time.monotonic()
+        elif key in (ord('+'), ord('=')):
+            rate = min(MAX_RATE, rate * 2)
+        elif key in (ord('-'), ord('_')):
+            rate = max(1, rate // 2)
+        elif key == curses.KEY_RIGHT:
+            playback.advance_to(game.tick + SEEK_TICKS)
+        elif key == curses.KEY_LEFT:
+            # Moves cannot be undone, so seeking back replays from the start
+            playback = start(max(0, game.tick - SEEK_TICKS))
+
+        if paused or playback.finished:
+            continue
+        # Play every tick that is due; only the last one gets drawn
+        now = time.monotonic()
+        while next_tick <= now and not playback.finished:
+            playback.advance_to(playback.engine.tick + 1)
+            next_tick += playback.engine.speed / rate
+        if next_tick <= now:
+            next_tick = now
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back a recorded snake game")
+    parser.add_argument('file', help="replay file written with snake_game.py --record")
+    parser.add_argument('--headless', action='store_true',
+                        help="re-simulate at full speed and print the result")
+    parser.add_argument('--rate', type=int, default=1, choices=[1, 2, 4, 8, 16, 32, 64],
+                        help="initial playback speed")
+    args = parser.parse_args()
+
+    recording = load(args.file)
+    if args.headless:
+        start = time.perf_counter()
+        engine = simulate(recording)
+        elapsed = time.perf_counter() - start
+        status = "ok" if engine.score == recording.score else "MISMATCH"
+        print(f"{os.path.basename(args.file)}: {engine.tick} ticks, "
+              f"score {engine.score} (recorded {recording.score}, {status}), "
+              f"{elapsed * 1000:.1f} ms")
+    else:
+        import curses
+        curses.wrapper(play, recording, args.rate)
+
+
+if __name__ == "__main__":
+    main()
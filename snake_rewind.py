@@ -0,0 +1,135 @@
+"""
+Snake Game Rewind
+Keeps recent keyframes of a game so the 'z' key can step it back in time
+"""
+
+import math
+import sys
+from collections import deque
+
+STEP_SECONDS = 2  # Game time stepped back by one press of the rewind key
+INPUT_BYTES = sys.getsizeof((1 << 20, 0, 0)) + sys.getsizeof(1 << 20)  # A log entry and its tick
+
+
+class RewindBuffer:
+    """Ring of EngineState keyframes covering the last `seconds` of play.
+
+    A game is fully determined by its state and the inputs that follow, so
+    a keyframe is only taken every `interval` ticks; the ticks in between
+    are rebuilt by restoring the keyframe before the target and replaying
+    the logged inputs on it. Rewinding any distance therefore costs one
+    restore plus less than one interval of moves. Keyframes older than the
+    window are dropped. On boards too large for a keyframe per interval
+    to fit in `max_bytes`, keyframes are spaced further apart instead.
+
+    The engine must log its inputs; attach() starts a log if there is none.
+    A log started that way is the buffer's own, and inputs older than the
+    oldest keyframe are dropped from it as keyframes are; a recording's log
+    is left whole. `nbytes` counts the keyframes and the inputs they need.
+    """
+    def __init__(self, seconds=30, interval=10, max_bytes=32 << 20):
+        self.seconds = seconds
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.keyframes = deque()  # (clock, EngineState, nbytes), oldest first
+        self.keyframe_bytes = 0  # Memory held by the keyframes
+        self.log = None  # Input log started by attach()
+        self.inputs = None  # Input log of the current game
+        self.first_input = 0  # Index in it of the oldest keyframe's first input
+        self.clock = 0.0  # Game time played, in seconds
+        self.seed = None  # Seed of the game the keyframes belong to
+        self.spacing = interval  # Ticks between keyframes for the current game
+
+    def clear(self):
+        self.keyframes.clear()
+        self.keyframe_bytes = 0
+        self.inputs = None
+        self.clock = 0.0
+
+    def attach(self, engine):
+        """Start logging inputs on a game that does not log them yet"""
+        if engine.inputs is None:
+            engine.inputs = self.log = []
+
+    @property
+    def input_bytes(self):
+        """Memory held by the inputs logged since the oldest keyframe"""
+        if self.inputs is None:
+            return 0
+        return (len(self.inputs) - self.first_input) * INPUT_BYTES
+
+    @property
+    def nbytes(self):
+        """Memory held for rewinding: keyframes and the inputs to replay on them"""
+        return self.keyframe_bytes + self.input_bytes
+
+    def record(self, engine):
+        """Note the state before a move; call once per tick, before move_snake()"""
+        if engine.seed != self.seed or (self.keyframes and engine.tick < self.keyframes[-1][1].tick):
+            # A new game started
+            self.clear()
+            self.seed = engine.seed
+        if not self.keyframes or engine.tick - self.keyframes[-1][1].tick >= self.spacing:
+            state = engine.snapshot()
+            size = state.nbytes()
+            # Spread the keyframes that fit in memory over the window
+            fit = max(1, self.max_bytes // size - 1)
+            self.spacing = max(self.interval, math.ceil(self.seconds / engine.speed / fit))
+            self.keyframes.append((self.clock, state, size))
+            self.keyframe_bytes += size
+            while len(self.keyframes) > 1 and (
+                    self.keyframe_bytes > self.max_bytes or
+                    self.keyframes[1][0] <= self.clock - self.seconds):
+                self.keyframe_bytes -= self.keyframes.popleft()[2]
+            self.trim_inputs(engine)
+        self.clock += engine.speed
+
+    def trim_inputs(self, engine):
+        """Drop inputs from before the oldest keyframe from the buffer's own
+        log; other logs are only counted from there"""
+        self.inputs = inputs = engine.inputs
+        oldest = self.keyframes[0][1].inputs or 0
+        if inputs is not None and inputs is self.log and oldest:
+            del inputs[:oldest]
+            # Keyframes note how long the log was when they were taken
+            for _, state, _ in self.keyframes:
+                state.inputs -= oldest
+            oldest = 0
+        self.first_input = oldest
+
+    @property
+    def oldest_tick(self):
+        """Earliest tick that can be rewound to, or None with no keyframes"""
+        return self.keyframes[0][1].tick if self.keyframes else None
+
+    def rewind(self, engine, seconds):
+        """Step the game back about `seconds` at its current speed and pause it.
+
+        Returns the tick the game is now on, or None if there was nothing
+        to rewind to. Inputs logged after that tick are dropped, so a game
+        being recorded carries on from the rewound state.
+        """
+        if not self.keyframes or engine.seed != self.seed or engine.inputs is None:
+            return None
+        target = max(self.oldest_tick, engine.tick - max(1, round(seconds / engine.speed)))
+        while len(self.keyframes) > 1 and self.keyframes[-1][1].tick > target:
+            self.keyframe_bytes -= self.keyframes.pop()[2]
+        clock, state, _ = self.keyframes[-1]
+
+        # restore() trims the input log back to the keyframe, so keep the
+        # inputs up to the target and replay them
+        inputs = [entry for entry in engine.inputs[state.inputs:] if entry[0] < target]
+        engine.restore(state)
+        next_input = 0
+        while True:
+            while next_input < len(inputs) and inputs[next_input][0] == engine.tick:
+                _, code, value = inputs[next_input]
+                engine.apply_input(code, value)
+                next_input += 1
+            if engine.tick >= target or engine.game_over:
+                break
+            engine.move_snake()
+        self.clock = clock + (engine.tick - state.tick) * engine.speed
+        self.trim_inputs(engine)
+        engine.paused = True
+        return engine.tick
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Snake Game Scores
+Keeps every finished game in a local SQLite database, written from a
+background thread, with leaderboards per board size and speed
+Usage: python snake_scores.py [--db FILE] [--board HxW] [--speed X] [--days N]
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.snake_scores.db')
+LEADERBOARD_SIZE = 5  # Scores kept in the cache for the game-over screen
+MAX_BATCH = 512  # Games inserted in one transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,        -- Unix time the game ended
+    day TEXT NOT NULL,              -- Local date, YYYY-MM-DD
+    height INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    speed INTEGER NOT NULL,         -- Speed multiplier in tenths
+    auto_speed INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    death TEXT,                     -- wall, self or bomb; NULL for a win
+    won INTEGER NOT NULL
+);
+-- Top scores for a board and speed are a walk down this index
+CREATE INDEX IF NOT EXISTS games_top ON games (height, width, speed, score DESC);
+-- Per-day totals, kept up to date with every insert so they cost the
+-- same however many games there are
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    total_score INTEGER NOT NULL,
+    best_score INTEGER NOT NULL,
+    total_ticks INTEGER NOT NULL,
+    PRIMARY KEY (day, height, width)
+) WITHOUT ROWID;
+"""
+
+INSERT_GAME = """
+INSERT INTO games (played_at, day, height, width, speed, auto_speed, score, length,
+                   ticks, seed, death, won)
+VALUES (:played_at, :day, :height, :width, :speed, :auto_speed, :score, :length,
+        :ticks, :seed, :death, :won)
+"""
+
+ADD_TO_DAY = """
+INSERT INTO daily VALUES (:day, :height, :width, 1, :score, :score, :ticks)
+ON CONFLICT (day, height, width) DO UPDATE SET
+    games = games + 1,
+    total_score = total_score + excluded.total_score,
+    best_score = max(best_score, excluded.best_score),
+    total_ticks = total_ticks + excluded.total_ticks
+"""
+
+
+def connect(path):
+    """Open a score database, creating the tables on first use"""
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")  # Readers don't wait for the writer
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+def speed_key(multiplier):
+    """A speed multiplier as stored: whole tenths"""
+    return round(multiplier * 10)
+
+
+def game_row(engine, played_at=None):
+    """The row recorded for a finished game"""
+    played_at = time.time() if played_at is None else played_at
+    return {
+        'played_at': played_at,
+        'day': time.strftime('%Y-%m-%d', time.localtime(played_at)),
+        'height': engine.height,
+        'width': engine.width,
+        'speed': speed_key(engine.speed_multiplier),
+        'auto_speed': int(engine.auto_speed_increase),
+        'score': engine.score,
+        'length': len(engine.snake),
+        'ticks': engine.tick,
+        'seed': engine.seed,
+        'death': engine.death,
+        'won': int(engine.won),
+    }
+
+
+def insert_games(db, rows):
+    """Add games and their daily totals in one transaction"""
+    with db:
+        db.executemany(INSERT_GAME, rows)
+        db.executemany(ADD_TO_DAY, rows)
+
+
+def top_scores(db, height, width, speed, limit=LEADERBOARD_SIZE):
+    """Return the best (score, length, ticks, day) on a board at a speed (in tenths)"""
+    return db.execute(
+        "SELECT score, length, ticks, day FROM games "
+        "WHERE height = ? AND width = ? AND speed = ? "
+        "ORDER BY score DESC LIMIT ?", (height, width, speed, limit)).fetchall()
+
+
+def daily_totals(db, first_day, last_day=None):
+    """Return (day, games, mean score, best score, total ticks) for each day in a range"""
+    return db.execute(
+        "SELECT day, sum(games), sum(total_score) * 1.0 / sum(games), max(best_score), "
+        "sum(total_ticks) FROM daily WHERE day BETWEEN ? AND ? GROUP BY day ORDER BY day",
+        (first_day, last_day or '9999-12-31')).fetchall()
+
+
+class ScoreStore:
+    """Records finished games without ever making the caller wait on disk.
+
+    record() and leaderboard() only touch an in-memory queue and cache. A
+    writer thread owns the database connection: it inserts whatever games
+    have queued up in one transaction, then re-reads the leaderboards that
+    are being shown, so the game-over screen draws from a cached result
+    that catches up a moment after the game is saved. `version` goes up
+    whenever the cache changes.
+
+    If the database cannot be opened or written, `error` is set and games
+    are dropped; the game itself carries on.
+    """
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.queue = queue.SimpleQueue()
+        self.cache = {}  # (height, width, speed) -> tuple of top_scores rows
+        self.version = 0
+        self.error = None
+        self.saved = 0  # Games committed so far
+        # Items queued by the caller and finished by the writer; each side
+        # only ever writes its own counter
+        self.requested = 0
+        self.handled = 0
+        self.thread = threading.Thread(target=self.run, name='snake-scores', daemon=True)
+        self.thread.start()
+
+    def record(self, engine):
+        """Queue a finished game to be saved"""
+        self.save(game_row(engine))
+
+    def save(self, row):
+        """Queue a game_row() dict to be saved"""
+        self.requested += 1
+        self.queue.put(row)
+
+    def leaderboard(self, height, width, speed_multiplier):
+        """Return the cached top scores for a board and speed, or None until
+        they have been read; the first call for a board asks for them"""
+        key = (height, width, speed_key(speed_multiplier))
+        if key not in self.cache:
+            self.cache[key] = None
+            self.requested += 1
+            self.queue.put(key)
+        return self.cache[key]
+
+    def busy(self):
+        """True while queued games or leaderboard reads are not done yet"""
+        return self.thread.is_alive() and self.handled < self.requested
+
+    def close(self, timeout=2.0):
+        """Save the games still queued, waiting at most timeout seconds"""
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def run(self):
+        try:
+            db = connect(self.path)
+        except sqlite3.Error as e:
+            self.error = e
+            return
+        done = False
+        while not done:
+            items = [self.queue.get()]
+            # Whatever else has queued up goes in the same transaction
+            while len(items) < MAX_BATCH:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [item for item in items if isinstance(item, dict)]
+            wanted = {item for item in items if isinstance(item, tuple)}
+            done = None in items
+            try:
+                if rows:
+                    insert_games(db, rows)
+                    self.saved += len(rows)
+                    # Boards shown before whose scores just changed
+                    wanted.update(key for key in ((row['height'], row['width'], row['speed'])
+                                                  for row in rows) if key in self.cache)
+                for key in wanted:
+                    self.cache[key] = tuple(top_scores(db, *key))
+                if wanted:
+                    self.version += 1
+            except sqlite3.Error as e:
+                self.error = e
+            self.handled += len(items) - done
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show saved snake scores")
+    parser.add_argument('--db', default=DEFAULT_PATH, help="score database")
+    parser.add_argument('--board', default='20x40', help="board size HEIGHTxWIDTH")
+    parser.add_argument('--speed', type=float, default=1.0, help="speed multiplier")
+    parser.add_argument('--top', type=int, default=10, help="scores to list")
+    parser.add_argument('--days', type=int, default=7, help="days of daily totals to list")
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        parser.error(f"no scores saved yet in {args.db}")
+
+    height, width = (int(n) for n in args.board.lower().split('x'))
+    db = connect(args.db)
+    print(f"Top scores on {height}x{width} at {args.speed:.1f}x:")
+    for rank, (score, length, ticks, day) in enumerate(
+            top_scores(db, height, width, speed_key(args.speed), args.top), 1):
+        print(f"{rank:4}. {score:7}  length {length:5}  {ticks:7} moves  {day}")
+    first_day = time.strftime('%Y-%m-%d', time.localtime(time.time() - (args.days - 1) * 86400))
+    print(f"\n{'day':10} {'games':>7} {'mean':>8} {'best':>7} {'moves':>10}")
+    for day, games, mean, best, ticks in daily_totals(db, first_day):
+        print(f"{day:10} {games:7} {mean:8.1f} {best:7} {ticks:10}")
+
+
+if __name__ == "__main__":
+    main()
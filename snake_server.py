@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Snake Game Server
+Hosts many headless games in one process for bots, tests and remote players
+Usage: python snake_server.py [--port N | --unix PATH] [--host HOST] [--watch [ID]]
+
+Protocol (little-endian, fixed-size headers after a 1-byte type):
+  client -> server  START height width seed   begin a new game (seed 0: random)
+                    TURN action               UP, RIGHT, DOWN or LEFT
+                    LIST                      ask for the running session ids
+                    WATCH id                  spectate a session (0: the oldest)
+  server -> client  STATE ...                 after every tick, see encode_state
+                    SESSIONS count ids...     reply to LIST
+                    KEYFRAME / DELTA ...      to spectators, see encode_keyframe
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import struct
+from array import array
+
+from snake_engine import (SnakeEngine, TurnQueue, DIRECTIONS,
+                          CELL_SNAKE, CELL_FOOD, CELL_BONUS, CELL_BOMB)
+from snake_profiler import RollingStats
+
+MSG_START = 0x01
+MSG_TURN = 0x02
+MSG_LIST = 0x03
+MSG_WATCH = 0x04
+MSG_STATE = 0x81
+MSG_SESSIONS = 0x82
+MSG_KEYFRAME = 0x83
+MSG_DELTA = 0x84
+START = struct.Struct('<HHQ')  # height, width, seed
+TURN = struct.Struct('<B')  # action
+WATCH = struct.Struct('<I')  # session id
+SESSIONS = struct.Struct('<I')  # count, followed by one uint per session id
+# type, tick, score, length, flags, direction, head, tail, food, bonus food,
+# bonus food timer and bomb count, followed by one int per bomb cell
+STATE = struct.Struct('<BIIIBBiiiiHB')
+BOMB = struct.Struct('<i')
+STATE_FLAGS = ('game_over', 'won', 'paused')
+# Spectator frames: type, tick, score, speed, flags, bomb count and head cell,
+# then for a keyframe the board size and every cell's CELL_* flags, or for a
+# delta the number of changed cells, their indices and their new flags
+FRAME = struct.Struct('<BIIfBBi')
+KEYFRAME = struct.Struct('<HH')
+DELTA = struct.Struct('<I')
+
+MIN_BOARD = (10, 20)
+MAX_BOARD = (1000, 1000)
+MAX_BUFFER = 1 << 20  # Bytes queued to a client before it is dropped as stalled
+SPECTATOR_BUFFER = 1 << 16  # Bytes queued to a spectator before frames are skipped
+KEYFRAME_TICKS = 100  # Ticks between keyframes sent to every spectator
+
+
+def encode_state(engine):
+    """Encode what a client needs to follow the game after a tick.
+
+    Cells are packed indices (y * width + x), -1 for none. The head and
+    tail plus the length are enough to track the body from tick to tick.
+    """
+    width = engine.width
+    food = -1 if engine.food is None else engine.food[0] * width + engine.food[1]
+    bonus = -1 if engine.bonus_food is None else engine.bonus_food[0] * width + engine.bonus_food[1]
+    flags = engine.game_over | engine.won << 1 | engine.paused << 2  # As in STATE_FLAGS
+    data = STATE.pack(MSG_STATE, engine.tick, engine.score, len(engine.snake), flags,
+                      DIRECTIONS.index(engine.direction), engine.snake.head_index(),
+                      engine.snake.tail_index(), food, bonus, engine.bonus_food_timer,
+                      len(engine.bombs))
+    if engine.bombs:
+        data += struct.pack(f'<{len(engine.bombs)}i', *(y * width + x for y, x in engine.bombs))
+    return data
+
+
+def decode_state(data):
+    """Decode a STATE message into a dict"""
+    (_, tick, score, length, flags, direction, head, tail, food, bonus,
+     bonus_timer, count) = STATE.unpack_from(data)
+    state = {'tick': tick, 'score': score, 'length': length, 'direction': direction,
+             'head': head, 'tail': tail, 'food': food, 'bonus_food': bonus,
+             'bonus_food_timer': bonus_timer,
+             'bombs': list(struct.unpack_from(f'<{count}i', data, STATE.size))}
+    for bit, name in enumerate(STATE_FLAGS):
+        state[name] = bool(flags >> bit & 1)
+    return state
+
+
+def encode_frame(engine, kind):
+    flags = engine.game_over | engine.won << 1 | engine.paused << 2  # As in STATE_FLAGS
+    return FRAME.pack(kind, engine.tick, engine.score, engine.speed, flags,
+                      len(engine.bombs), engine.snake.head_index())
+
+
+def encode_keyframe(engine):
+    """Encode the whole board for a spectator"""
+    return (encode_frame(engine, MSG_KEYFRAME) + KEYFRAME.pack(engine.height, engine.width)
+            + engine.grid)
+
+
+def encode_delta(engine):
+    """Encode the cells changed since engine.dirty was last cleared"""
+    cells = array('I', engine.dirty)
+    grid = engine.grid
+    return (encode_frame(engine, MSG_DELTA) + DELTA.pack(len(cells)) + cells.tobytes()
+            + bytes(grid[index] for index in cells))
+
+
+async def read_frame(reader):
+    """Read one KEYFRAME or DELTA message from a stream and decode it into a dict.
+
+    A keyframe has 'height', 'width' and a 'grid' of cell flags; a delta
+    has the changed 'cells' as (index, flags) pairs.
+    """
+    header = await reader.readexactly(FRAME.size)
+    kind, tick, score, speed, flags, bombs, head = FRAME.unpack(header)
+    frame = {'keyframe': kind == MSG_KEYFRAME, 'tick': tick, 'score': score,
+             'speed': speed, 'bombs': bombs, 'head': head}
+    for bit, name in enumerate(STATE_FLAGS):
+        frame[name] = bool(flags >> bit & 1)
+    if kind == MSG_KEYFRAME:
+        frame['height'], frame['width'] = KEYFRAME.unpack(await reader.readexactly(KEYFRAME.size))
+        frame['grid'] = await reader.readexactly(frame['height'] * frame['width'])
+    elif kind == MSG_DELTA:
+        count, = DELTA.unpack(await reader.readexactly(DELTA.size))
+        cells = array('I')
+        cells.frombytes(await reader.readexactly(4 * count))
+        frame['cells'] = list(zip(cells, await reader.readexactly(count)))
+    else:
+        raise ValueError(f"unexpected message type {kind:#x}")
+    return frame
+
+
+async def read_state(reader):
+    """Read one STATE message from a stream and decode it"""
+    header = await reader.readexactly(STATE.size)
+    count = header[-1]
+    return decode_state(header + await reader.readexactly(count * BOMB.size))
+
+
+class Spectator:
+    """A connection watching a session"""
+    def __init__(self, writer):
+        self.writer = writer
+        self.synced = False  # False until it is sent a keyframe, and after skipped frames
+        self.skipped = 0  # Frames dropped because it fell behind
+
+
+class Session:
+    """One game hosted by the server.
+
+    send(data) delivers encoded states. A session with a policy is a bot:
+    policy(engine) picks an action (or None) before each tick, and a new
+    game starts by itself when one ends. A player's TURN messages wait in
+    `turns` and are made one per tick. While anyone is watching, the
+    engine tracks changed cells in its dirty set for the delta frames.
+    """
+    def __init__(self, send, policy=None):
+        self.id = None  # Assigned by the server
+        self.send = send
+        self.policy = policy
+        self.engine = None
+        self.turns = TurnQueue()
+        self.generation = 0  # Bumped on every new game, to drop stale timer entries
+        self.closed = False
+        self.spectators = []
+
+    def new_game(self, height, width, seed=None):
+        self.engine = SnakeEngine(height, width, seed)
+        self.engine.generate_food()
+        self.turns.clear()
+        self.generation += 1
+        if self.spectators:
+            self.engine.dirty = set()
+            for spectator in self.spectators:
+                spectator.synced = False
+
+    def watch(self, spectator):
+        """Add a spectator and send it the board as it is now"""
+        if self.engine.dirty is None:
+            self.engine.dirty = set()
+        self.spectators.append(spectator)
+        spectator.writer.write(encode_keyframe(self.engine))
+        spectator.synced = True
+
+    def unwatch(self, spectator):
+        if spectator in self.spectators:
+            self.spectators.remove(spectator)
+        if not self.spectators and self.engine is not None:
+            self.engine.dirty = None
+
+    def broadcast(self):
+        """Send the tick just played to every spectator.
+
+        The delta and keyframe are each encoded at most once and the same
+        bytes go to everyone. A spectator with a backlog skips frames and
+        gets a keyframe once it has caught up.
+        """
+        engine = self.engine
+        periodic = engine.tick % KEYFRAME_TICKS == 0
+        delta = keyframe = None
+        for spectator in self.spectators:
+            writer = spectator.writer
+            if writer.transport.get_write_buffer_size() > SPECTATOR_BUFFER:
+                spectator.synced = False
+                spectator.skipped += 1
+            elif periodic or not spectator.synced:
+                if keyframe is None:
+                    keyframe = encode_keyframe(engine)
+                writer.write(keyframe)
+                spectator.synced = True
+            else:
+                if delta is None:
+                    delta = encode_delta(engine)
+                writer.write(delta)
+        engine.dirty.clear()
+
+
+class GameServer:
+    """Ticks every session on its own speed from one shared timer loop.
+
+    Sessions wait in a heap ordered by their next deadline; run() sleeps
+    until the earliest one is due, ticks every session that is due, and
+    schedules each one a tick interval after its previous deadline. How
+    late each tick fired is kept in `jitter`, and how long players' turns
+    waited for their move in `turn_latency`.
+    """
+    MAX_CATCH_UP = 5  # Ticks a session may fall behind before it is resynced
+
+    def __init__(self):
+        self.sessions = {}  # id -> Session, oldest first
+        self.ids = itertools.count(1)
+        self.heap = []  # (deadline, sequence, session, generation)
+        self.sequence = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.jitter = RollingStats(4096)
+        self.turn_latency = RollingStats(4096)
+        self.ticks = 0
+
+    def add_session(self, send, policy=None, height=20, width=40, seed=None, delay=None):
+        """Start hosting a game and return its Session.
+        
+        The first tick comes after `delay` seconds, by default one tick
+        interval; spreading the delays keeps many bots from all ticking
+        at the same moment.
+        """
+        session = Session(send, policy)
+        self.register(session)
+        self.start_game(session, height, width, seed, delay)
+        return session
+
+    def register(self, session):
+        if session.id is None:
+            session.id = next(self.ids)
+            self.sessions[session.id] = session
+
+    def remove_session(self, session):
+        """Stop hosting a session; its spectators are disconnected"""
+        session.closed = True
+        self.sessions.pop(session.id, None)
+        for spectator in session.spectators:
+            spectator.writer.close()
+        session.spectators.clear()
+
+    def start_game(self, session, height, width, seed=None, delay=None):
+        """Begin a new game in a session; its first tick is one interval away"""
+        session.new_game(height, width, seed)
+        loop = asyncio.get_running_loop()
+        self.schedule(session, loop.time() + (session.engine.speed if delay is None else delay))
+        session.send(encode_state(session.engine))
+
+    def schedule(self, session, deadline):
+        heapq.heappush(self.heap, (deadline, next(self.sequence), session, session.generation))
+        if deadline <= self.heap[0][0]:
+            self.wakeup.set()
+
+    def tick(self, session):
+        """Play one move of a session and send the result"""
+        engine = session.engine
+        latency = session.turns.apply(engine)
+        if latency is not None:
+            self.turn_latency.add(latency)
+        if session.policy is not None:
+            action = session.policy(engine)
+            if action is not None:
+                engine.turn(action)
+        engine.move_snake()
+        self.ticks += 1
+        session.send(encode_state(engine))
+        if session.spectators:
+            session.broadcast()
+
+    async def run(self):
+        """The timer loop; runs until cancelled"""
+        loop = asyncio.get_running_loop()
+        heap = self.heap
+        while True:
+            self.wakeup.clear()
+            if not heap:
+                await self.wakeup.wait()
+                continue
+            if heap[0][0] > loop.time():
+                timer = loop.call_at(heap[0][0], self.wakeup.set)
+                await self.wakeup.wait()
+                timer.cancel()
+                continue
+
+            while heap and heap[0][0] <= loop.time():
+                deadline, _, session, generation = heapq.heappop(heap)
+                if session.closed or generation != session.generation:
+                    continue  # Left the server or started over since
+                now = loop.time()
+                self.jitter.add(now - deadline)
+                self.tick(session)
+                engine = session.engine
+                if engine.game_over:
+                    if session.policy is not None:
+                        self.start_game(session, engine.height, engine.width)
+                    continue  # A player starts the next game with START
+                deadline += engine.speed
+                if deadline < now - self.MAX_CATCH_UP * engine.speed:
+                    deadline = now + engine.speed
+                heapq.heappush(heap, (deadline, next(self.sequence), session, generation))
+            # Let the clients' reads and writes run between batches
+            await asyncio.sleep(0)
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection: START begins a game and TURN steers it,
+        or WATCH makes it a spectator of another session"""
+        def send(data):
+            if writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                # The client stopped reading; don't let its backlog grow
+                self.remove_session(session)
+                writer.close()
+                return
+            writer.write(data)
+
+        session = Session(send)
+        spectator = watched = None
+        try:
+            while not session.closed:
+                kind = (await reader.readexactly(1))[0]
+                if kind == MSG_START and watched is None:
+                    height, width, seed = START.unpack(await reader.readexactly(START.size))
+                    height = max(MIN_BOARD[0], min(MAX_BOARD[0], height))
+                    width = max(MIN_BOARD[1], min(MAX_BOARD[1], width))
+                    self.register(session)
+                    self.start_game(session, height, width, seed or None)
+                elif kind == MSG_TURN:
+                    action, = TURN.unpack(await reader.readexactly(TURN.size))
+                    if session.engine is not None and action < len(DIRECTIONS):
+                        session.turns.push(action, session.engine.direction)
+                elif kind == MSG_LIST:
+                    writer.write(bytes([MSG_SESSIONS]) + SESSIONS.pack(len(self.sessions))
+                                 + array('I', self.sessions).tobytes())
+                elif kind == MSG_WATCH and session.id is None and watched is None:
+                    key, = WATCH.unpack(await reader.readexactly(WATCH.size))
+                    watched = self.sessions.get(key) if key else next(iter(self.sessions.values()), None)
+                    if watched is None:
+                        break  # Nothing to watch
+                    spectator = Spectator(writer)
+                    watched.watch(spectator)
+                else:
+                    break  # Not speaking our protocol
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if watched is not None:
+                watched.unwatch(spectator)
+            self.remove_session(session)
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=0, path=None):
+        """Listen on TCP (or a Unix socket when path is given) and tick forever"""
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle_client, path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        for sock in server.sockets:
+            print(f"Serving snake games on {sock.getsockname()}")
+        async with server:
+            await self.run()
+
+
+class Client:
+    """Minimal protocol client, e.g. for bots and tests"""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=None, path=None):
+        if path is not None:
+            return cls(*await asyncio.open_unix_connection(path))
+        return cls(*await asyncio.open_connection(host, port))
+
+    def start(self, height=20, width=40, seed=0):
+        self.writer.write(bytes([MSG_START]) + START.pack(height, width, seed))
+
+    def turn(self, action):
+        self.writer.write(bytes([MSG_TURN]) + TURN.pack(action))
+
+    async def state(self):
+        """Wait for the next STATE message"""
+        return await read_state(self.reader)
+
+    async def sessions(self):
+        """Return the ids of the running sessions"""
+        self.writer.write(bytes([MSG_LIST]))
+        header = await self.reader.readexactly(1 + SESSIONS.size)
+        count, = SESSIONS.unpack_from(header, 1)
+        ids = array('I')
+        ids.frombytes(await self.reader.readexactly(4 * count))
+        return list(ids)
+
+    def watch(self, session_id=0):
+        """Spectate a session; frames then arrive through frame()"""
+        self.writer.write(bytes([MSG_WATCH]) + WATCH.pack(session_id))
+
+    async def frame(self):
+        """Wait for the next spectator frame"""
+        return await read_frame(self.reader)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class BoardMirror:
+    """A spectator's copy of a watched board, kept up to date from frames"""
+    def __init__(self):
+        self.height = self.width = 0
+        self.grid = bytearray()
+        self.head = -1
+        self.frame = None  # The last frame applied
+
+    def apply(self, frame):
+        """Apply a frame; return the cell indices to redraw, or None to redraw all"""
+        self.frame = frame
+        old_head = self.head
+        self.head = frame['head']
+        if frame['keyframe']:
+            self.height, self.width = frame['height'], frame['width']
+            self.grid = bytearray(frame['grid'])
+            return None
+        for index, flags in frame['cells']:
+            self.grid[index] = flags
+        # The old head is drawn as body now, though its flags did not change
+        return [index for index, _ in frame['cells']] + [old_head, self.head]
+
+
+async def watch(stdscr, client, session_id=0):
+    """Show a session in the terminal from its spectator frames until q is pressed"""
+    import curses
+    from snake_game import setup_screen
+
+    def draw_cell(index):
+        y, x = divmod(index, mirror.width)
+        if 0 <= y < rows - 1 and 0 <= x < cols - 1:
+            flags = mirror.grid[index]
+            if flags & CELL_BOMB:
+                stdscr.addch(y, x, 'X', curses.color_pair(2) | curses.A_BOLD)
+            elif flags & CELL_BONUS:
+                stdscr.addch(y, x, '◆', curses.color_pair(3) | curses.A_BOLD)
+            elif flags & CELL_FOOD:
+                stdscr.addch(y, x, '★', curses.color_pair(2))
+            elif flags & CELL_SNAKE:
+                stdscr.addch(y, x, '●' if index == mirror.head else '○', curses.color_pair(1))
+            else:
+                stdscr.addch(y, x, ' ')
+
+    setup_screen(stdscr)
+    client.watch(session_id)
+    mirror = BoardMirror()
+    while stdscr.getch() != ord('q'):
+        try:
+            frame = await asyncio.wait_for(client.frame(), 0.1)
+        except asyncio.TimeoutError:
+            continue  # Check for q now and then while nothing changes
+        except asyncio.IncompleteReadError:
+            break  # The session ended
+        rows, cols = stdscr.getmaxyx()
+        changed = mirror.apply(frame)
+        if changed is None:
+            stdscr.erase()
+            # Walls: the outer ring of the board
+            for y in range(min(mirror.height, rows - 1)):
+                for x in range(min(mirror.width, cols - 1)):
+                    if y in (0, mirror.height - 1) or x in (0, mirror.width - 1):
+                        stdscr.addch(y, x, '#')
+            changed = [index for index, flags in enumerate(mirror.grid) if flags]
+        for index in changed:
+            draw_cell(index)
+        status = (f"Watching tick {frame['tick']}  score {frame['score']}  "
+                  f"bombs {frame['bombs']}  {frame['speed']:.2f}s/move")
+        if frame['game_over']:
+            status += "  GAME OVER"
+        stdscr.addstr(min(mirror.height, rows - 1), 0, status[:cols - 1].ljust(cols - 1))
+        stdscr.refresh()
+
+
+async def host(host, port, path, bots=0):
+    """Run a server, optionally with some autopilot games already going"""
+    from snake_autopilot import Autopilot
+    server = GameServer()
+    for _ in range(bots):
+        server.add_session(lambda data: None, Autopilot().decide)
+    await server.serve(host, port, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host headless snake games over a socket")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5151)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--bots', metavar='N', type=int, default=0,
+                        help="host N autopilot games, e.g. for spectators to watch")
+    parser.add_argument('--watch', metavar='ID', type=int, nargs='?', const=0,
+                        help="spectate a session on a running server (default: the oldest)")
+    args = parser.parse_args()
+    try:
+        if args.watch is not None:
+            import curses
+
+            async def spectate(stdscr):
+                client = await Client.connect(args.host, args.port, args.unix)
+                await watch(stdscr, client, args.watch)
+            curses.wrapper(lambda stdscr: asyncio.run(spectate(stdscr)))
+        else:
+            asyncio.run(host(args.host, args.port, args.unix, args.bots))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Snake Game Tournaments
+Plays every policy x config x seed combination headlessly on a process pool
+and streams one JSON line per game to a results file
+Usage: python snake_tournament.py --policy autopilot --policy greedy
+           --config "" --config bomb_spawn_chance=0.02 --seeds 0:1000 --output results.jsonl
+
+Games already in the results file are skipped, so running the same command
+again resumes an interrupted tournament.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from snake_engine import SnakeEngine, DIRECTIONS, CELL_SNAKE, CELL_BOMB
+
+
+def parse_params(params):
+    """Parse 'key=value,...' into a dict of numbers"""
+    values = {}
+    for item in filter(None, params.split(',')):
+        key, _, value = item.partition('=')
+        try:
+            values[key.strip()] = int(value)
+        except ValueError:
+            values[key.strip()] = float(value)
+    return values
+
+
+# --- Policies -------------------------------------------------------------
+# Each factory takes the policy parameters and the game seed and returns a
+# callable that picks an action (or None) for an engine before every move
+
+def safe_actions(engine):
+    """Actions whose next move does not crash"""
+    head_y, head_x = engine.snake[0]
+    grid, width = engine.grid, engine.width
+    back = (-engine.direction[0], -engine.direction[1])  # turn() ignores reversing
+    safe = []
+    for action, (dy, dx) in enumerate(DIRECTIONS):
+        y, x = head_y + dy, head_x + dx
+        if ((dy, dx) != back and 0 < y < engine.height - 1 and 0 < x < width - 1 and
+                not grid[y * width + x] & (CELL_SNAKE | CELL_BOMB)):
+            safe.append(action)
+    return safe
+
+
+def random_policy(seed):
+    rng = random.Random(seed)
+
+    def decide(engine):
+        safe = safe_actions(engine)
+        return rng.choice(safe) if safe else None
+    return decide
+
+
+def greedy_policy(seed):
+    """Take the safe move that gets closest to the food"""
+    def decide(engine):
+        safe = safe_actions(engine)
+        if not safe or engine.food is None:
+            return safe[0] if safe else None
+        (head_y, head_x), (food_y, food_x) = engine.snake[0], engine.food
+        return min(safe, key=lambda action: abs(head_y + DIRECTIONS[action][0] - food_y) +
+                   abs(head_x + DIRECTIONS[action][1] - food_x))
+    return decide
+
+
+def autopilot_policy(seed, budget=1.0, **params):
+    # A generous budget keeps decisions, and so results, independent of machine load
+    from snake_autopilot import Autopilot
+    return Autopilot(budget=budget, **params).decide
+
+
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+    'autopilot': autopilot_policy,
+}
+
+
+def make_policy(spec, seed):
+    """Build the policy for a 'name:key=value,...' spec"""
+    name, _, params = spec.partition(':')
+    if name not in POLICIES:
+        raise ValueError(f"unknown policy {name!r}; choose from {', '.join(POLICIES)}")
+    return POLICIES[name](seed, **parse_params(params))
+
+
+# --- Games ----------------------------------------------------------------
+
+def play(policy_spec, config_spec, seed, height, width, max_ticks):
+    """Play one game and return its result as a dict"""
+    engine = SnakeEngine(height, width, seed)
+    for name, value in parse_params(config_spec).items():
+        setattr(engine, name, value)
+    engine.update_speed()
+    engine.generate_food()
+    decide = make_policy(policy_spec, seed)
+    turn, move_snake = engine.turn, engine.move_snake
+    while not engine.game_over and engine.tick < max_ticks:
+        action = decide(engine)
+        if action is not None:
+            turn(action)
+        move_snake()
+    return {'policy': policy_spec, 'config': config_spec, 'seed': seed,
+            'score': engine.score, 'length': len(engine.snake), 'ticks': engine.tick,
+            'death': engine.death, 'won': engine.won}
+
+
+def play_chunk(policy_spec, config_spec, seeds, height, width, max_ticks):
+    """Worker entry point: play a run of seeds and return their results"""
+    return [play(policy_spec, config_spec, seed, height, width, max_ticks) for seed in seeds]
+
+
+def completed(path):
+    """Return the (policy, config, seed) keys of the games in a results file.
+
+    A line cut short by an interruption is removed so appending can go on.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'rb+') as f:
+        good = 0
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                result = json.loads(line)
+            except ValueError:
+                break
+            done.add((result['policy'], result['config'], result['seed']))
+            good += len(line)
+        f.truncate(good)
+    return done
+
+
+def run_tournament(policies, configs, seeds, output, workers=None, chunk=20,
+                   height=20, width=40, max_ticks=20000, progress=None):
+    """Play every game not yet in the output file and append the results.
+
+    Work goes to the pool in chunks of seeds, at most two per worker in
+    flight, and each chunk's results are written as soon as it finishes.
+    progress(done, total) is called after each chunk. Returns the number
+    of games played.
+    """
+    done = completed(output)
+    units = []
+    for policy in policies:
+        for config in configs:
+            todo = [seed for seed in seeds if (policy, config, seed) not in done]
+            units.extend((policy, config, todo[i:i + chunk]) for i in range(0, len(todo), chunk))
+    total = sum(len(unit[2]) for unit in units)
+    played = 0
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers) as pool, open(output, 'a') as out:
+        pending = set()
+        units = iter(units)
+        while True:
+            for unit in units:
+                pending.add(pool.submit(play_chunk, *unit, height, width, max_ticks))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results = future.result()
+                out.write(''.join(json.dumps(result) + '\n' for result in results))
+                played += len(results)
+            out.flush()
+            if progress:
+                progress(played, total)
+    return played
+
+
+def summarize(path):
+    """Return per (policy, config) aggregates of a results file, read a line at a time"""
+    groups = defaultdict(lambda: {'games': 0, 'score': 0, 'ticks': 0, 'won': 0,
+                                  'wall': 0, 'self': 0, 'bomb': 0, 'limit': 0})
+    with open(path) as f:
+        for line in f:
+            result = json.loads(line)
+            group = groups[result['policy'], result['config']]
+            group['games'] += 1
+            group['score'] += result['score']
+            group['ticks'] += result['ticks']
+            group['won'] += result['won']
+            if result['death']:
+                group[result['death']] += 1
+            elif not result['won']:
+                group['limit'] += 1  # Still going at --max-ticks
+    return groups
+
+
+def seed_range(text):
+    """Parse a --seeds argument: START:STOP or a single count"""
+    try:
+        start, _, stop = text.rpartition(':')
+        return range(int(start or 0), int(stop))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected START:STOP or COUNT, got {text!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play snake policies against each other")
+    parser.add_argument('--policy', action='append', metavar='NAME[:KEY=VALUE,...]',
+                        help=f"policy to play, repeatable ({', '.join(POLICIES)}), e.g. "
+                             "autopilot:cycle_threshold=0.3")
+    parser.add_argument('--config', action='append', metavar='KEY=VALUE,...',
+                        help="engine settings to play under, repeatable, e.g. "
+                             "bomb_spawn_chance=0.02,bomb_cooldown_time=10 (default: the rules as shipped)")
+    parser.add_argument('--seeds', type=seed_range, default=range(100),
+                        help="seeds to play, START:STOP or a count (default 100)")
+    parser.add_argument('--board', default='20x40', help="board size HEIGHTxWIDTH")
+    parser.add_argument('--max-ticks', type=int, default=20000,
+                        help="stop a game that is still going after this many moves")
+    parser.add_argument('--workers', type=int, help="processes to use (default: one per core)")
+    parser.add_argument('--chunk', type=int, default=20, help="games per work unit")
+    parser.add_argument('--output', default='results.jsonl', help="JSON lines results file")
+    args = parser.parse_args()
+
+    policies = args.policy or ['autopilot']
+    configs = args.config or ['']
+    height, width = (int(n) for n in args.board.lower().split('x'))
+    # Fail on a bad spec now rather than in every worker
+    probe = SnakeEngine(height, width, 0)
+    for policy in policies:
+        try:
+            make_policy(policy, 0)
+        except (ValueError, TypeError) as e:
+            parser.error(f"bad policy {policy!r}: {e}")
+    for config in configs:
+        for name in parse_params(config):
+            if not hasattr(probe, name):
+                parser.error(f"unknown engine setting {name!r}")
+
+    start = time.perf_counter()
+
+    def progress(done, total):
+        rate = done / (time.perf_counter() - start)
+        print(f"\r{done}/{total} games, {rate:.0f} games/s", end='', file=sys.stderr)
+    played = run_tournament(policies, configs, args.seeds, args.output, args.workers,
+                            args.chunk, height, width, args.max_ticks, progress)
+    print(f"\n{played} games played", file=sys.stderr)
+
+    print(f"{'policy':24} {'config':32} {'games':>7} {'score':>8} {'ticks':>8} "
+          f"{'won':>5} {'wall':>5} {'self':>5} {'bomb':>5} {'limit':>5}")
+    for (policy, config), group in summarize(args.output).items():
+        games = group['games']
+        print(f"{policy:24} {config or '-':32} {games:7} {group['score'] / games:8.1f} "
+              f"{group['ticks'] / games:8.0f} {group['won']:5} {group['wall']:5} "
+              f"{group['self']:5} {group['bomb']:5} {group['limit']:5}")
+
+
+if __name__ == "__main__":
+    main()
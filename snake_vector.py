@@ -0,0 +1,272 @@
+"""
+Vectorized Snake Engine
+Advances many independent games in lockstep with NumPy array operations
+Requires NumPy (pip install numpy)
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("snake_vector needs NumPy: pip install numpy")
+
+from snake_engine import (SnakeEngine, DIRECTIONS, RIGHT,
+                          CELL_SNAKE, CELL_FOOD, CELL_BONUS, CELL_BOMB)
+
+# Cell index offset for each direction action
+_DY = np.array([dy for dy, dx in DIRECTIONS], dtype=np.int64)
+_DX = np.array([dx for dy, dx in DIRECTIONS], dtype=np.int64)
+
+
+class VectorSnakeEngine:
+    """N snake games on the same board size, stepped together.
+
+    Every env follows the same rules as SnakeEngine.move_snake. Cells are
+    flat indices y * width + x. Each snake body is a ring buffer row in
+    `body`, with the head at `head_slot` and `length` segments following it.
+    Finished envs are reset automatically when auto_reset is set; their
+    final score and length are kept in `last_score` and `last_length`.
+    """
+    def __init__(self, num_envs, height=20, width=40, seed=None, auto_reset=True):
+        self.num_envs = num_envs
+        self.height = height
+        self.width = width
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+        self.env_ids = np.arange(num_envs)
+
+        # Rules, the scalar engine's defaults so both stay in step
+        self.max_bombs = SnakeEngine.max_bombs
+        self.bomb_spawn_chance = SnakeEngine.bomb_spawn_chance
+        self.bomb_min_duration = SnakeEngine.bomb_min_duration
+        self.bomb_max_duration = SnakeEngine.bomb_max_duration
+        self.bomb_cooldown_time = SnakeEngine.bomb_cooldown_time
+        self.bonus_food_min_duration = SnakeEngine.bonus_food_min_duration
+        self.bonus_food_max_duration = SnakeEngine.bonus_food_max_duration
+        self.bonus_spawn_chance = SnakeEngine.bonus_spawn_chance
+        self.bonus_cooldown_time = SnakeEngine.bonus_cooldown_time
+        self.early_removal_chance = SnakeEngine.early_removal_chance
+        self.auto_speed_increase = True  # As every SnakeEngine starts
+
+        cells = height * width
+        capacity = (height - 2) * (width - 2)
+        interior = np.zeros((height, width), dtype=bool)
+        interior[1:-1, 1:-1] = True
+        self.interior = interior.ravel()
+
+        self.grid = np.zeros((num_envs, cells), dtype=np.uint8)
+        self.body = np.zeros((num_envs, capacity), dtype=np.int32)
+        self.head_slot = np.zeros(num_envs, dtype=np.int64)
+        self.length = np.zeros(num_envs, dtype=np.int64)
+        self.direction = np.zeros(num_envs, dtype=np.int64)
+        self.food = np.full(num_envs, -1, dtype=np.int64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.base_speed = np.zeros(num_envs, dtype=np.float64)
+        self.game_over = np.zeros(num_envs, dtype=bool)
+        self.won = np.zeros(num_envs, dtype=bool)
+        self.bombs = np.full((num_envs, self.max_bombs), -1, dtype=np.int64)
+        self.bomb_timers = np.zeros((num_envs, self.max_bombs), dtype=np.int64)
+        self.bomb_cooldown = np.zeros(num_envs, dtype=np.int64)
+        self.bonus_food = np.full(num_envs, -1, dtype=np.int64)
+        self.bonus_food_timer = np.zeros(num_envs, dtype=np.int64)
+        self.bonus_cooldown = np.zeros(num_envs, dtype=np.int64)
+        self.last_score = np.zeros(num_envs, dtype=np.int64)
+        self.last_length = np.zeros(num_envs, dtype=np.int64)
+
+        self.reset_envs(self.env_ids)
+
+    @property
+    def heads(self):
+        """Head cell index of every env"""
+        return self.body[self.env_ids, self.head_slot]
+
+    def snake_cells(self, env):
+        """Return the body of one env as (y, x) tuples, head first"""
+        capacity = self.body.shape[1]
+        slots = (self.head_slot[env] + np.arange(self.length[env])) % capacity
+        return [divmod(int(index), self.width) for index in self.body[env, slots]]
+
+    def reset_envs(self, envs):
+        """Start fresh games in the given envs"""
+        if len(envs) == 0:
+            return
+        start = (self.height // 2) * self.width + self.width // 2
+        self.grid[envs] = 0
+        self.grid[envs, start] = CELL_SNAKE
+        self.body[envs, 0] = start
+        self.head_slot[envs] = 0
+        self.length[envs] = 1
+        self.direction[envs] = RIGHT
+        self.score[envs] = 0
+        self.base_speed[envs] = 0.1
+        self.game_over[envs] = False
+        self.won[envs] = False
+        self.bombs[envs] = -1
+        self.bomb_timers[envs] = 0
+        self.bomb_cooldown[envs] = 0
+        self.bonus_food[envs] = -1
+        self.bonus_food_timer[envs] = 0
+        self.bonus_cooldown[envs] = 0
+        self.food[envs] = -1
+        self.spawn_food(envs)
+
+    def free_cells(self, envs):
+        """Pick one random free cell per env, or -1 where the board is full"""
+        free = (self.grid[envs] == 0) & self.interior
+        keys = self.rng.random(free.shape)
+        keys[~free] = -1.0
+        cells = keys.argmax(axis=1)
+        cells[~free.any(axis=1)] = -1
+        return cells
+
+    def spawn_food(self, envs):
+        """Place new food in the given envs, ending games whose board is full"""
+        old = self.food[envs]
+        had_food = old >= 0
+        self.grid[envs[had_food], old[had_food]] &= ~np.uint8(CELL_FOOD)
+        cells = self.free_cells(envs)
+        full = cells < 0
+        self.won[envs[full]] = True
+        self.game_over[envs[full]] = True
+        self.food[envs] = cells
+        placed = envs[~full]
+        self.grid[placed, cells[~full]] |= np.uint8(CELL_FOOD)
+
+    def step(self, actions=None):
+        """Advance every env by one tick.
+
+        actions holds one direction action per env, or -1 to keep going
+        straight. Returns (rewards, dones): the score gained this tick and
+        which envs finished. Finished envs are reset afterwards when
+        auto_reset is on.
+        """
+        n = self.num_envs
+        env_ids = self.env_ids
+        grid = self.grid
+        width = self.width
+        capacity = self.body.shape[1]
+        rng = self.rng
+
+        # Turn, ignoring reversals into the snake
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int64)
+            turn = (actions >= 0) & (actions != (self.direction + 2) % 4)
+            self.direction = np.where(turn, actions, self.direction)
+
+        running = ~self.game_over
+        head = self.body[env_ids, self.head_slot]
+        y = head // width + _DY[self.direction]
+        x = head % width + _DX[self.direction]
+        wall = (y <= 0) | (y >= self.height - 1) | (x <= 0) | (x >= width - 1)
+        new_head = np.where(wall, head, y * width + x)
+        hit = ~wall & ((grid[env_ids, new_head] & (CELL_SNAKE | CELL_BOMB)) != 0)
+        dead = running & (wall | hit)
+        self.game_over |= dead
+        alive = running & ~dead
+        moved = env_ids[alive]
+
+        # Add new head
+        self.head_slot[moved] = (self.head_slot[moved] - 1) % capacity
+        self.body[moved, self.head_slot[moved]] = new_head[moved]
+        grid[moved, new_head[moved]] |= np.uint8(CELL_SNAKE)
+
+        # Food, bonus food or tail removal
+        rewards = np.zeros(n, dtype=np.int64)
+        ate_food = alive & (new_head == self.food)
+        ate_bonus = alive & ~ate_food & (new_head == self.bonus_food)
+        rewards[ate_food] = 10
+        rewards[ate_bonus] = 50
+        self.score += rewards
+
+        eaten = env_ids[ate_food]
+        self.spawn_food(eaten)
+        if self.auto_speed_increase:
+            self.base_speed[eaten] = np.maximum(0.05, self.base_speed[eaten] - 0.005)
+
+        self.grid[env_ids[ate_bonus], self.bonus_food[ate_bonus]] &= ~np.uint8(CELL_BONUS)
+        self.bonus_food[ate_bonus] = -1
+        self.bonus_food_timer[ate_bonus] = 0
+
+        grow = ate_food | ate_bonus
+        shrink = env_ids[alive & ~grow]
+        tail_slot = (self.head_slot[shrink] + self.length[shrink]) % capacity
+        grid[shrink, self.body[shrink, tail_slot]] &= ~np.uint8(CELL_SNAKE)
+        self.length[grow] += 1
+
+        # Update cooldowns
+        self.bomb_cooldown[alive & (self.bomb_cooldown > 0)] -= 1
+        self.bonus_cooldown[alive & (self.bonus_cooldown > 0)] -= 1
+
+        # Randomly spawn bombs (with cooldown check)
+        bomb_free = self.bombs < 0
+        spawn = (alive & (self.bomb_cooldown == 0) & bomb_free.any(axis=1) &
+                 (rng.random(n) < self.bomb_spawn_chance))
+        spawned = env_ids[spawn]
+        if len(spawned):
+            cells = self.free_cells(spawned)
+            ok = cells >= 0
+            envs = spawned[ok]
+            slots = bomb_free[envs].argmax(axis=1)
+            self.bombs[envs, slots] = cells[ok]
+            self.bomb_timers[envs, slots] = rng.integers(
+                self.bomb_min_duration, self.bomb_max_duration + 1, len(envs))
+            grid[envs, cells[ok]] |= np.uint8(CELL_BOMB)
+            self.bomb_cooldown[spawned] = self.bomb_cooldown_time
+
+        # Randomly spawn bonus food (with cooldown check)
+        spawn = (alive & (self.bonus_food < 0) & (self.bonus_cooldown == 0) &
+                 (rng.random(n) < self.bonus_spawn_chance))
+        spawned = env_ids[spawn]
+        if len(spawned):
+            cells = self.free_cells(spawned)
+            ok = cells >= 0
+            envs = spawned[ok]
+            self.bonus_food[envs] = cells[ok]
+            self.bonus_food_timer[envs] = rng.integers(
+                self.bonus_food_min_duration, self.bonus_food_max_duration + 1, len(envs))
+            grid[envs, cells[ok]] |= np.uint8(CELL_BONUS)
+            self.bonus_cooldown[spawned] = self.bonus_cooldown_time
+
+        # Update bonus food timer
+        has_bonus = alive & (self.bonus_food >= 0)
+        self.bonus_food_timer[has_bonus] -= 1
+        self.remove_bonus(has_bonus & (self.bonus_food_timer <= 0))
+
+        # Update bomb timers and remove expired bombs
+        active = alive[:, None] & (self.bombs >= 0)
+        expired = active & (self.bomb_timers <= 1)
+        env_rows, slots = np.nonzero(expired)
+        grid[env_rows, self.bombs[env_rows, slots]] &= ~np.uint8(CELL_BOMB)
+        self.bombs[expired] = -1
+        self.bomb_timers[expired] = 0
+        self.bomb_timers[active & ~expired] -= 1
+
+        # Small chance for bombs to disappear early
+        active = self.bombs >= 0
+        early = alive & active.any(axis=1) & (rng.random(n) < self.early_removal_chance)
+        envs = env_ids[early]
+        if len(envs):
+            keys = rng.random(active[envs].shape)
+            keys[~active[envs]] = -1.0
+            slots = keys.argmax(axis=1)
+            grid[envs, self.bombs[envs, slots]] &= ~np.uint8(CELL_BOMB)
+            self.bombs[envs, slots] = -1
+            self.bomb_timers[envs, slots] = 0
+
+        # Small chance for bonus food to disappear early
+        self.remove_bonus(alive & (self.bonus_food >= 0) &
+                          (rng.random(n) < self.early_removal_chance))
+
+        dones = dead | self.game_over & running
+        if self.auto_reset:
+            finished = env_ids[dones]
+            self.last_score[finished] = self.score[finished]
+            self.last_length[finished] = self.length[finished]
+            self.reset_envs(finished)
+        return rewards, dones
+
+    def remove_bonus(self, mask):
+        """Clear the bonus food in the envs selected by mask"""
+        envs = self.env_ids[mask]
+        self.grid[envs, self.bonus_food[envs]] &= ~np.uint8(CELL_BONUS)
+        self.bonus_food[envs] = -1
+        self.bonus_food_timer[envs] = 0
@@ -0,0 +1,92 @@
+"""
+Replay analytics: finding recordings, per-game results and running totals
+"""
+
+import json
+import os
+import sys
+from collections import Counter
+
+import snake_analytics
+import snake_benchmark
+from snake_benchmark import record_games
+
+
+def test_results_agree_with_the_games_played():
+    snake_benchmark.check_analytics()
+
+
+def test_find_recordings(tmp_path):
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    for name in ('one.snkr', 'a/two.snkr', 'a/b/three.snkr', 'a/notes.txt'):
+        (tmp_path / name).write_bytes(b'')
+    try:
+        os.symlink(tmp_path, tmp_path / 'a' / 'up', target_is_directory=True)
+    except OSError:
+        pass  # No symlinks here; the walk is the same without the loop
+    found = snake_analytics.find_recordings([str(tmp_path), 'given.txt'])
+    names = sorted(os.path.relpath(path, tmp_path) for path in found)
+    # Files named directly are taken whatever they are called
+    assert names == sorted([os.path.join('a', 'b', 'three.snkr'), os.path.join('a', 'two.snkr'),
+                            'one.snkr', os.path.relpath('given.txt', tmp_path)])
+
+
+def test_unreadable_files_give_an_error_line(tmp_path):
+    broken = tmp_path / 'broken.snkr'
+    broken.write_bytes(b'SNKR\x02')
+    for path in (broken, tmp_path / 'missing.snkr'):
+        result = snake_analytics.analyze_file(str(path))
+        assert result['file'] == str(path) and result['error']
+
+
+def test_chunked_takes_items_as_needed():
+    taken = []
+
+    def items():
+        for i in range(7):
+            taken.append(i)
+            yield i
+    chunks = snake_analytics.chunked(items(), 3)
+    assert next(chunks) == [0, 1, 2] and taken == [0, 1, 2]
+    assert list(chunks) == [[3, 4, 5], [6]]
+
+
+def test_percentile():
+    counts = Counter({1: 50, 2: 40, 10: 10})
+    assert snake_analytics.percentile(counts, 0.5) == 1
+    assert snake_analytics.percentile(counts, 0.9) == 2
+    assert snake_analytics.percentile(counts, 0.99) == 10
+    assert snake_analytics.percentile(Counter(), 0.5) is None
+
+
+def test_summary_totals():
+    summary = snake_analytics.Summary()
+    game = {'matches': True, 'score': 70, 'ticks': 200, 'death': 'wall', 'board': '20x40',
+            'death_cell': [0, 5], 'food_latency': [3, 9], 'near_misses': 2,
+            'bonuses': [[45, 20], [48, None], [62, None]]}
+    summary.add(game)
+    summary.add(dict(game, matches=False, death=None, death_cell=None))
+    summary.add({'file': 'broken.snkr', 'error': 'bad header'})
+    totals = summary.to_dict()
+    assert (totals['games'], totals['errors'], totals['mismatches']) == (2, 1, 1)
+    assert totals['deaths'] == {'wall': 1, 'None': 1}
+    assert totals['death_heatmaps'] == {'20x40': [[0, 5, 1]]}
+    assert totals['food_latency']['eaten'] == 4 and totals['food_latency']['mean'] == 6
+    assert totals['bonus_pickup'] == [
+        {'lifetime': '40-49', 'spawned': 4, 'picked': 2, 'rate': 0.5},
+        {'lifetime': '60-69', 'spawned': 2, 'picked': 0, 'rate': 0.0}]
+    assert totals['bonus_left_at_pickup'] == {20: 2}
+    assert totals['near_misses_per_1000_ticks'] == 10.0
+
+
+def test_main_writes_results_and_summary(tmp_path, monkeypatch, capsys):
+    record_games(str(tmp_path / 'games'), 3)
+    output, summary = tmp_path / 'results.jsonl', tmp_path / 'summary.json'
+    monkeypatch.setattr(sys, 'argv', ['snake_analytics.py', str(tmp_path / 'games'),
+                                      '--output', str(output), '--summary', str(summary),
+                                      '--workers', '1'])
+    snake_analytics.main()
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(results) == 3 and all(result['matches'] for result in results)
+    assert json.loads(summary.read_text())['games'] == 3
+    assert capsys.readouterr().out.startswith('3 games, 0 unreadable')
@@ -0,0 +1,119 @@
+"""
+The ANSI output backend: double buffering, wide glyphs and the byte budget
+"""
+
+import curses
+import os
+
+import pytest
+
+import snake_ansi
+import snake_benchmark
+from snake_ansi import AnsiScreen, BLANK, WIDE
+from snake_benchmark import FakeTerminal
+
+
+@pytest.fixture
+def pipe():
+    read, write = os.pipe()
+    yield read, write
+    os.close(read)
+    os.close(write)
+
+
+def sent(screen, read):
+    """Flush a frame and return the bytes it wrote"""
+    screen.flush()
+    return os.read(read, 1 << 16) if screen.last_bytes else b''
+
+
+def test_terminal_matches_the_frames():
+    snake_benchmark.check_ansi()
+
+
+def test_char_width_is_cached():
+    snake_ansi.char_width.cache_clear()
+    assert snake_ansi.char_width('a') == 1
+    assert snake_ansi.char_width('字') == 2
+    assert snake_ansi.char_width('字') == 2
+    info = snake_ansi.char_width.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
+def test_one_write_per_frame_and_nothing_when_unchanged(pipe):
+    read, write = pipe
+    screen = AnsiScreen(5, 20, {}, write)
+    screen.stdscr.addstr(1, 2, 'hello')
+    screen.stdscr.noutrefresh()
+    first = sent(screen, read)
+    assert first.startswith(b'\x1b[0;37;40m\x1b[H\x1b[2J') and b'hello' in first
+    assert screen.last_writes == 1
+    screen.stdscr.addstr(1, 2, 'hello')  # The same as before
+    screen.stdscr.noutrefresh()
+    assert sent(screen, read) == b'' and screen.last_writes == 0
+
+
+def test_short_gaps_are_reprinted(pipe):
+    read, write = pipe
+    screen = AnsiScreen(5, 20, {}, write)
+    screen.stdscr.addstr(0, 0, 'abcdefghij')
+    screen.stdscr.noutrefresh()
+    sent(screen, read)
+    screen.stdscr.addch(0, 1, 'B')
+    screen.stdscr.addch(0, 4, 'E')
+    screen.stdscr.addch(0, 10, 'K')
+    screen.stdscr.noutrefresh()
+    # 'cd' is shorter than a cursor move; the gap of MAX_GAP + 1 before 'K' is not
+    assert sent(screen, read) == b'\x1b[1;2HBcdE\x1b[1;11HK'
+
+
+def test_wide_glyphs(pipe):
+    read, write = pipe
+    window = AnsiScreen(3, 10, {}, write).stdscr
+    window.addstr(0, 0, '字x')
+    assert window.cells[:3] == [('字', 0), (WIDE, 0), ('x', 0)]
+    window.addch(0, 1, 'y')  # Over the right half
+    assert window.cells[:2] == [BLANK, ('y', 0)]
+
+
+def test_drawing_off_the_window_raises():
+    window = AnsiScreen(3, 10, {}, -1).stdscr
+    with pytest.raises(curses.error):
+        window.addch(3, 0, 'x')
+    with pytest.raises(curses.error):
+        window.addstr(2, 8, 'xyz')
+
+
+def test_budget_defers_only_panels(pipe):
+    read, write = pipe
+    screen = AnsiScreen(10, 40, {}, write, budget=100)
+    panel = screen.newwin(8, 10, 0, 30)
+    terminal = FakeTerminal()
+    terminal.feed(sent(screen, read))  # The clear
+    screen.credit = 0  # No savings from the quiet first frame
+    for row in range(8):
+        screen.stdscr.addstr(row, 0, 'board')
+        panel.addstr(row, 0, f'panel {row}')
+    screen.stdscr.noutrefresh()
+    panel.noutrefresh()
+    terminal.feed(sent(screen, read))
+    assert all(terminal.cell(row, 0) == ('b', screen.sgr(0)) for row in range(8))
+    assert screen.deferred > 0
+    for _ in range(10):  # Quiet frames
+        terminal.feed(sent(screen, read))
+    assert not screen.pending and not screen.deferred
+    assert [terminal.cell(row, 36)[0] for row in range(8)] == [str(row) for row in range(8)]
+    assert screen.metrics()['over_budget_frames'] == 0
+
+
+def test_resize_repaints(pipe):
+    read, write = pipe
+    screen = AnsiScreen(5, 20, {}, write)
+    screen.stdscr.addstr(0, 0, 'x')
+    screen.stdscr.noutrefresh()
+    sent(screen, read)
+    screen.resize(6, 30)
+    screen.stdscr.addstr(5, 29, 'y')
+    screen.stdscr.noutrefresh()
+    data = sent(screen, read)
+    assert data.startswith(b'\x1b[0;37;40m\x1b[H\x1b[2J') and data.endswith(b'\x1b[6;30Hy')
@@ -0,0 +1,105 @@
+"""
+The many-snake arena: its owner grid, collisions and shared item rules
+"""
+
+import sys
+
+import pytest
+
+import snake_arena
+import snake_benchmark
+from snake_arena import Arena, Bots, FREE, WALL, DEATH_BOMB, DEATH_WALL
+from snake_engine import Board, SnakeEngine, DIRECTIONS, CELL_FOOD, CELL_SNAKE
+
+RIGHT, LEFT = DIRECTIONS.index((0, 1)), DIRECTIONS.index((0, -1))
+
+
+def quiet_arena(height=10, width=10):
+    arena = Arena(height, width, 0, seed=0, food=0)
+    arena.bomb_spawn_chance = arena.bonus_spawn_chance = 0
+    return arena
+
+
+def test_collisions_determinism_and_item_lifetimes():
+    snake_benchmark.check_arena()
+
+
+def test_only_the_border_is_wall():
+    arena = Arena(8, 12, 0, seed=0, food=0)
+    for index, who in enumerate(arena.owner):
+        y, x = divmod(index, 12)
+        border = y in (0, 7) or x in (0, 11)
+        assert who == (WALL if border else FREE), (y, x)
+
+
+def test_shares_the_engine_bookkeeping_and_rules():
+    for name in ('occupy', 'vacate', 'update_items', 'set_bonus_food', 'place_bomb',
+                 'remove_bomb', 'generate_bomb', 'generate_bonus_food'):
+        assert getattr(Arena, name) is getattr(Board, name) is getattr(SnakeEngine, name)
+    assert Arena(20, 40, 0, seed=0).bomb_spawn_chance == SnakeEngine.bomb_spawn_chance
+    assert Arena(60, 120, 100, seed=0).max_bombs == 10
+
+
+def test_grid_and_free_pool_stay_in_sync():
+    arena = Arena(30, 60, 40, seed=1)
+    arena.bomb_spawn_chance = arena.bonus_spawn_chance = 0.2
+    bots = Bots(1)
+    for _ in range(300):
+        arena.step(bots.actions(arena))
+        if arena.game_over:
+            break
+    for y in range(1, 29):
+        for x in range(1, 59):
+            index = y * 60 + x
+            assert (index in arena.free) == (arena.grid[index] == 0)
+            assert bool(arena.grid[index] & CELL_SNAKE) == (arena.owner[index] >= 0)
+    assert arena.bombs and all(index in arena.timers.expiry for index in arena.bombs)
+
+
+def test_eating_grows_and_food_is_put_back():
+    arena = quiet_arena()
+    arena.food_count = 1
+    snake = arena.add_snake([5 * 10 + 3], DIRECTIONS[RIGHT])
+    arena.food[5 * 10 + 4] = None
+    arena.occupy(5 * 10 + 4, CELL_FOOD)
+    arena.step()
+    assert (snake.score, len(snake)) == (10, 2)
+    assert len(arena.food) == 1 and 5 * 10 + 4 not in arena.food
+
+
+def test_walls_and_bombs_kill():
+    arena = quiet_arena()
+    bomber = arena.add_snake([5 * 10 + 3], DIRECTIONS[RIGHT])
+    arena.place_bomb(5 * 10 + 4, 50)
+    waller = arena.add_snake([2 * 10 + 1], DIRECTIONS[LEFT])
+    assert arena.step() == 0 and arena.game_over
+    assert (bomber.death, waller.death) == (DEATH_BOMB, DEATH_WALL)
+    assert all(who in (FREE, WALL) for who in arena.owner)
+
+
+def test_turns_cannot_reverse():
+    arena = quiet_arena()
+    snake = arena.add_snake([5 * 10 + 3, 5 * 10 + 2], DIRECTIONS[RIGHT])
+    arena.step([LEFT])
+    assert snake.direction == DIRECTIONS[RIGHT] and snake.alive
+
+
+def test_too_many_snakes():
+    with pytest.raises(ValueError, match='no room'):
+        Arena(4, 4, 5, seed=0)
+
+
+def test_more_players_than_snakes_is_an_error(monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['snake_arena.py', '--snakes', '1', '--players', '2'])
+    with pytest.raises(SystemExit) as exit:
+        snake_arena.main()
+    assert exit.value.code == 2
+    assert '--players 2 needs at least that many --snakes' in capsys.readouterr().err
+
+
+def test_headless_run(monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['snake_arena.py', '--headless', '--snakes', '30',
+                                      '--board', '40x80', '--ticks', '100', '--seed', '2'])
+    snake_arena.main()
+    out = capsys.readouterr().out
+    assert out.startswith('100 ticks, ') and 'best: snake' in out
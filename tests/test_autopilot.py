@@ -0,0 +1,84 @@
+"""
+The autopilot: Hamiltonian cycles, pathfinding within a time budget and
+the caches it keeps between ticks
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import snake_autopilot
+from snake_autopilot import Autopilot, board_cycle, hamiltonian_cycle
+from snake_engine import SnakeEngine, DIRECTIONS
+
+
+def is_cycle(cycle, height, width):
+    playable = {(y, x) for y in range(1, height - 1) for x in range(1, width - 1)}
+    steps = {(b[0] - a[0], b[1] - a[1]) for a, b in zip(cycle, cycle[1:] + cycle[:1])}
+    return set(cycle) == playable and len(cycle) == len(playable) and steps <= set(DIRECTIONS)
+
+
+@pytest.mark.parametrize('height, width', [(4, 4), (6, 9), (20, 40), (22, 78)])
+def test_hamiltonian_cycle(height, width):
+    assert is_cycle(hamiltonian_cycle(height, width), height, width)
+
+
+def test_board_cycle_turns_the_board_when_rows_are_odd():
+    assert is_cycle(board_cycle(7, 10), 7, 10)
+    assert board_cycle(7, 9) is None
+    with pytest.raises(ValueError):
+        hamiltonian_cycle(7, 10)
+
+
+def play(seed, height=20, width=40, ticks=3000, **rules):
+    game = SnakeEngine(height, width, seed)
+    for name, value in rules.items():
+        setattr(game, name, value)
+    game.generate_food()
+    autopilot = Autopilot(budget=1.0)
+    while not game.game_over and game.tick < ticks:
+        action = autopilot.decide(game)
+        if action is not None:
+            game.turn(action)
+        game.move_snake()
+        assert len(autopilot.retry) <= 2  # Only the food and the bonus food
+    return game, autopilot
+
+
+def test_plays_well():
+    scores = [play(seed)[0].score for seed in range(3)]
+    assert min(scores) >= 1000
+
+
+def test_avoids_bombs():
+    for seed in range(3):
+        game, _ = play(seed, ticks=1000, bomb_spawn_chance=0.2, max_bombs=10)
+        assert game.death is None, f"seed {seed}: {game.death} at {game.tick}"
+
+
+def test_fills_a_small_board():
+    game, _ = play(0, 6, 8, ticks=20000)
+    assert game.won
+
+
+def test_falls_back_when_out_of_time():
+    game = SnakeEngine(20, 40, 0)
+    game.generate_food()
+    autopilot = Autopilot(budget=0.0)
+    for _ in range(200):
+        action = autopilot.decide(game)
+        if action is not None:
+            game.turn(action)
+        if not game.step():
+            break
+    assert autopilot.timeouts > 0
+    assert game.tick >= 100
+
+
+def test_does_not_need_curses():
+    code = ("import sys; sys.modules['curses'] = sys.modules['_curses'] = None; "
+            "import snake_autopilot, snake_tournament")
+    subprocess.run([sys.executable, '-c', code], check=True,
+                   cwd=os.path.dirname(os.path.abspath(snake_autopilot.__file__)))
@@ -0,0 +1,79 @@
+"""
+The benchmark runner: results, baselines and regression reports
+"""
+
+import ast
+import inspect
+import json
+import sys
+
+import pytest
+
+import snake_benchmark
+from snake_benchmark import HIGHER, LOWER
+
+
+def fake_group(values):
+    def group():
+        yield "fake/rate", values[0], "games/s", HIGHER
+        yield "fake/cost", values[1], "us", LOWER
+        yield "fake/alive", values[2], "snakes", HIGHER
+    return group
+
+
+def test_every_result_says_which_way_is_better():
+    tree = ast.parse(inspect.getsource(snake_benchmark))
+    groups = [node for node in tree.body
+              if isinstance(node, ast.FunctionDef) and node.name.startswith('group_')]
+    assert {node.name for node in groups} == {group.__name__
+                                              for group in snake_benchmark.GROUPS.values()}
+    for node in groups:
+        for result in ast.walk(node):
+            if isinstance(result, ast.Yield):
+                assert isinstance(result.value, ast.Tuple) and len(result.value.elts) == 4, \
+                    f"{node.name} line {result.lineno}"
+                assert result.value.elts[3].id in ('HIGHER', 'LOWER'), \
+                    f"{node.name} line {result.lineno}"
+
+
+def test_compare_uses_each_results_direction(capsys):
+    baseline = {'fake/rate': {'value': 100.0}, 'fake/cost': {'value': 10.0},
+                'fake/alive': {'value': 500.0}, 'fake/gone': {'value': 1.0}}
+    results = {
+        'fake/rate': {'value': 50.0, 'unit': 'games/s', 'better': HIGHER},
+        'fake/cost': {'value': 5.0, 'unit': 'us', 'better': LOWER},
+        'fake/alive': {'value': 250.0, 'unit': 'snakes', 'better': HIGHER},
+        'fake/new': {'value': 1.0, 'unit': 'us', 'better': LOWER},
+    }
+    assert snake_benchmark.compare(results, baseline, 0.2) == ['fake/rate', 'fake/alive']
+    results['fake/cost']['value'] = 11.0  # Within the threshold
+    assert 'fake/cost' not in snake_benchmark.compare(results, baseline, 0.2)
+    results['fake/cost']['value'] = 13.0
+    assert 'fake/cost' in snake_benchmark.compare(results, baseline, 0.2)
+
+
+def test_baseline_round_trip(tmp_path, monkeypatch, capsys):
+    baseline = tmp_path / 'baseline.json'
+    monkeypatch.setitem(snake_benchmark.GROUPS, 'fake', fake_group([100.0, 10.0, 500.0]))
+    monkeypatch.setattr(sys, 'argv', ['snake_benchmark.py', '--only', 'fake',
+                                      '--output', str(baseline)])
+    snake_benchmark.main()
+    saved = json.loads(baseline.read_text())['results']
+    assert saved['fake/alive'] == {'value': 500.0, 'unit': 'snakes', 'better': HIGHER}
+
+    # Fewer snakes left alive is a regression, a cheaper tick is not
+    monkeypatch.setitem(snake_benchmark.GROUPS, 'fake', fake_group([100.0, 5.0, 250.0]))
+    monkeypatch.setattr(sys, 'argv', ['snake_benchmark.py', '--only', 'fake',
+                                      '--compare', str(baseline)])
+    with pytest.raises(SystemExit) as exit:
+        snake_benchmark.main()
+    assert exit.value.code == 1
+    report = capsys.readouterr().out
+    assert 'fake/alive' in report.split('REGRESSION')[0].splitlines()[-1]
+    assert report.count('REGRESSION') == 1
+
+
+def test_failed_checks_raise_even_under_optimization():
+    with pytest.raises(snake_benchmark.CheckFailed, match="7 went wrong"):
+        snake_benchmark.expect(False, "{} went wrong", 7)
+    snake_benchmark.expect(True, "never formatted {}")
@@ -0,0 +1,66 @@
+"""
+The headless engine and its step API
+"""
+
+import os
+import random
+import subprocess
+import sys
+
+import snake_engine
+from snake_engine import SnakeEngine, DEATH_WALL, RIGHT
+from snake_benchmark import safe_action
+
+
+def actions(seed, count):
+    rng = random.Random(seed)
+    return [rng.choice([None, None, 0, 1, 2, 3]) for _ in range(count)]
+
+
+def state(game):
+    return (game.tick, list(game.snake), game.food, game.bonus_food, list(game.bombs),
+            game.score, game.game_over, bytes(game.grid))
+
+
+def test_step_many_matches_step():
+    for seed in range(10):
+        one, many = SnakeEngine(20, 40, seed), SnakeEngine(20, 40, seed)
+        one.generate_food()
+        many.generate_food()
+        moves = actions(seed, 300)
+        played = 0
+        for action in moves:
+            played += 1
+            if not one.step(action):
+                break
+        assert many.step_many(moves) == played
+        assert state(many) == state(one)
+
+
+def test_step_many_stops_at_game_over():
+    game = SnakeEngine(20, 40, 0)
+    game.set_food((1, 1))
+    assert game.step_many([RIGHT] * 100) == 19
+    assert game.death == DEATH_WALL
+    assert game.step_many([RIGHT] * 10) == 0
+    assert not game.step()
+
+
+def test_same_seed_same_game():
+    def play(seed):
+        game = SnakeEngine(20, 40, seed)
+        game.bomb_spawn_chance = game.bonus_spawn_chance = 0.1
+        game.generate_food()
+        rng = random.Random(seed)
+        while game.step(safe_action(game, rng)) and game.tick < 2000:
+            pass
+        return state(game)
+    assert play(3) == play(3)
+    assert play(3) != play(4)
+
+
+def test_engine_does_not_need_curses():
+    code = ("import sys; sys.modules['curses'] = sys.modules['_curses'] = None; "
+            "import snake_engine; snake_engine.SnakeEngine().step()")
+    subprocess.run([sys.executable, '-c', code], check=True,
+                   cwd=os.path.dirname(os.path.abspath(snake_engine.__file__)))
@@ -0,0 +1,63 @@
+"""
+FreeCells, the pool spawns are drawn from, and the engine's use of it
+"""
+
+import random
+from collections import Counter
+
+from snake_engine import FreeCells
+from snake_autopilot import hamiltonian_cycle
+from snake_benchmark import busy_game, cycle_actions, make_game_on_cycle, safe_action
+
+
+def interior(height, width):
+    return {y * width + x for y in range(1, height - 1) for x in range(1, width - 1)}
+
+
+def test_take_and_put():
+    free = FreeCells(6, 8)
+    assert set(free.cells) == interior(6, 8)
+    rng = random.Random(0)
+    taken = set()
+    for _ in range(500):
+        index = rng.choice(sorted(interior(6, 8)))
+        if index in taken:
+            free.put(index)
+            taken.discard(index)
+        else:
+            free.take(index)
+            taken.add(index)
+        assert set(free.cells) == interior(6, 8) - taken
+        assert len(free) == len(free.cells)
+        assert all(free.where[cell] == slot for slot, cell in enumerate(free.cells))
+        assert all((cell in free) == (cell not in taken) for cell in interior(6, 8))
+
+
+def test_sample_is_uniform():
+    free = FreeCells(4, 6)
+    rng = random.Random(1)
+    counts = Counter(free.sample(rng) for _ in range(8000))
+    assert set(counts) == set(free.cells)
+    assert max(counts.values()) < 1.2 * min(counts.values())
+
+
+def test_sample_on_a_full_board():
+    free = FreeCells(3, 3)
+    free.take(4)
+    assert free.sample(random.Random(0)) is None
+
+
+def test_engine_pool_matches_grid():
+    game = busy_game(2, ticks=0)
+    rng = random.Random(2)
+    while game.step(safe_action(game, rng)) and game.tick < 1000:
+        assert set(game.free.cells) == {index for index in interior(game.height, game.width)
+                                        if not game.grid[index]}
+
+
+def test_eating_the_last_food_wins():
+    game, cycle = make_game_on_cycle(len(hamiltonian_cycle(8, 10)) - 1, 8, 10)
+    assert game.generate_food() == cycle[-1]  # The only free cell
+    game.step(cycle_actions(cycle, len(cycle) - 2, 1)[0])
+    assert len(game.free) == 0
+    assert game.won and game.game_over and game.food is None
@@ -0,0 +1,90 @@
+"""
+Large boards: compact snake storage and the scrolling viewport
+"""
+
+import random
+from array import array
+from collections import deque
+
+import snake_game
+from snake_engine import RingBody, SnakeEngine
+from snake_benchmark import FakeCurses, FakeWindow, bench_body_memory, safe_action
+
+
+def test_ring_body_behaves_like_a_deque():
+    rng = random.Random(0)
+    body, model = RingBody(1000, capacity=2), deque()
+    for _ in range(5000):
+        pos = (rng.randrange(1000), rng.randrange(1000))
+        choice = rng.random()
+        if choice < 0.4:
+            body.appendleft(pos)
+            model.appendleft(pos)
+        elif choice < 0.7:
+            body.append(pos)
+            model.append(pos)
+        elif model:
+            assert body.pop() == model.pop()
+        assert len(body) == len(model)
+        if model:
+            assert body[0] == model[0] and body[-1] == model[-1]
+    assert list(body) == list(model)
+    assert list(body.indices()) == [y * 1000 + x for y, x in model]
+    copy = body.copy()
+    body.clear()
+    assert list(copy) == list(model) and len(body) == 0
+
+
+def test_segments_take_four_bytes():
+    assert array('i').itemsize == 4
+    # Doubling the ring when full leaves it at most half empty
+    assert bench_body_memory(length=20000) <= 8 + 0.1
+
+
+def test_viewport_follows_the_head(monkeypatch):
+    game = snake_game.SnakeGame(200, 400, 200, 400, seed=0)
+    game.bomb_spawn_chance = game.bonus_spawn_chance = 0.05
+    game.generate_food()
+    monkeypatch.setattr(snake_game, 'curses', FakeCurses)
+    screen = FakeWindow(40, 100)
+    rng = random.Random(0)
+    scrolls = 0
+    while game.step(safe_action(game, rng)) and game.tick < 2000:
+        view = (game.renderer.top, game.renderer.left) if game.renderer else None
+        game.draw(screen)
+        renderer = game.renderer
+        assert (renderer.view_height, renderer.view_width) == (37, 75)
+        assert renderer.visible(*game.snake[0])
+        assert 0 <= renderer.top <= game.height - renderer.view_height
+        assert 0 <= renderer.left <= game.width - renderer.view_width
+        scrolls += view is not None and view != (renderer.top, renderer.left)
+        # Nothing is drawn past the viewport
+        assert all(y < 40 and x < renderer.view_width + 2 + renderer.PANEL_WIDTH
+                   for y, x in screen.cells)
+    assert scrolls > 5
+    # The frame is dotted on sides where the board carries on
+    assert screen.cells[0, 0][0] == '┌'
+    edges = {screen.cells[0, 1][0], screen.cells[1, 0][0]}
+    assert edges <= {'─', '┄', '│', '┆'}
+
+
+def test_small_boards_fit_the_terminal(monkeypatch):
+    game = snake_game.SnakeGame(20, 40, seed=0)
+    game.generate_food()
+    monkeypatch.setattr(snake_game, 'curses', FakeCurses)
+    screen = FakeWindow(45, 120)
+    game.draw(screen)
+    renderer = game.renderer
+    assert (renderer.top, renderer.left, renderer.view_height, renderer.view_width) == \
+        (0, 0, 20, 40)
+    assert screen.cells[0, 1][0] == '─' and screen.cells[1, 0][0] == '│'
+
+
+def test_large_engine_plays():
+    game = SnakeEngine(1000, 1000, 0)
+    game.generate_food()
+    rng = random.Random(0)
+    for _ in range(500):
+        assert game.step(safe_action(game, rng))
+    assert len(game.free) == 998 * 998 - len(game.snake) - 1 - len(game.bombs) - \
+        (game.bonus_food is not None)
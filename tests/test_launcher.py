@@ -0,0 +1,89 @@
+"""
+The launcher: finding a terminal, remembering it and timing the first frame
+"""
+
+import json
+import sys
+
+import pytest
+
+import snake_benchmark
+import snake_game_launcher as launcher
+
+
+@pytest.fixture
+def linux(monkeypatch, tmp_path):
+    """A Linux machine with a config file of its own and only xterm and konsole on PATH"""
+    monkeypatch.setattr(launcher.platform, 'system', lambda: 'Linux')
+    monkeypatch.setattr(launcher, 'CONFIG_PATH', str(tmp_path / 'launcher.json'))
+    on_path = {'xterm': '/usr/bin/xterm', 'konsole': '/usr/bin/konsole'}
+    monkeypatch.setattr(launcher.shutil, 'which', on_path.get)
+    return tmp_path
+
+
+def test_terminals_on_path_in_order(linux):
+    assert list(launcher.candidate_terminals({})) == [
+        ('konsole', '/usr/bin/konsole'), ('xterm', '/usr/bin/xterm')]
+
+
+def test_remembered_terminal_comes_first(linux):
+    program = linux / 'xfce4-terminal'
+    program.write_text('')
+    config = {'terminal': 'xfce4-terminal', 'path': str(program)}
+    assert next(launcher.candidate_terminals(config)) == ('xfce4-terminal', str(program))
+    program.unlink()  # Uninstalled since
+    assert next(launcher.candidate_terminals(config))[0] == 'konsole'
+
+
+def test_open_terminal_remembers_what_worked(linux, monkeypatch):
+    started = []
+
+    def popen(command, **options):
+        if command[0] == '/usr/bin/konsole':
+            raise OSError("broken install")
+        started.append((command, options['env']['SNAKE_LAUNCH_MODE']))
+
+    monkeypatch.setattr(launcher.subprocess, 'Popen', popen)
+    env = {'SNAKE_LAUNCH_MODE': 'new-window'}
+    assert launcher.open_terminal(['python3', 'snake_game.py'], env) == 'xterm'
+    assert started == [(['/usr/bin/xterm', '-e', 'python3', 'snake_game.py'], 'new-window')]
+    assert launcher.load_config() == {'terminal': 'xterm', 'path': '/usr/bin/xterm'}
+
+
+def test_no_terminal(linux, monkeypatch):
+    monkeypatch.setattr(launcher.shutil, 'which', lambda name: None)
+    assert launcher.open_terminal(['python3'], {}) is None
+
+
+def test_terminal_app_script_quotes_the_command():
+    build = launcher.TERMINALS['Darwin']['osascript']
+    command = build('/usr/bin/osascript', ['python3', "it's.py"], '/games dir',
+                    {'SNAKE_LAUNCH_MODE': 'new-window'})
+    assert command[:2] == ['/usr/bin/osascript', '-e']
+    assert 'cd \'/games dir\' && env SNAKE_LAUNCH_MODE=new-window python3' in command[2]
+    assert '\\"' in command[2]  # Double quotes of the shell quoting are escaped
+
+
+def test_startup_stats(tmp_path):
+    path = tmp_path / 'startup.jsonl'
+    assert launcher.startup_stats(str(path)) is None
+    path.write_text(''.join(json.dumps({'first_frame_ms': ms}) + '\n'
+                            for ms in (300, 100, 200, 400, 150)))
+    assert launcher.startup_stats(str(path)) == (5, 200, 400, 150)
+    assert launcher.startup_stats(str(path), last=2) == (2, 400, 400, 150)
+    path.write_text('not json\n')
+    assert launcher.startup_stats(str(path)) is None
+
+
+def test_stats_option(tmp_path, monkeypatch, capsys):
+    log = tmp_path / 'startup.jsonl'
+    monkeypatch.setattr(sys, 'argv', ['snake_game_launcher.py', '--stats',
+                                      '--startup-log', str(log)])
+    launcher.main()
+    assert capsys.readouterr().out.startswith('No launches logged')
+
+
+def test_first_frame_is_logged():
+    pytest.importorskip('pty')
+    first_frame = snake_benchmark.bench_first_frame(runs=1)
+    assert first_frame is not None and first_frame > 0
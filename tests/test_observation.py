@@ -0,0 +1,78 @@
+"""
+Observation planes kept current by the engine, alone and batched
+"""
+
+import pytest
+
+import snake_benchmark
+from snake_engine import (SnakeEngine, ObservationBatch, OBS_CHANNELS, OBS_BODY, OBS_HEAD,
+                          OBS_FOOD, OBS_BONUS, OBS_BOMB)
+from snake_benchmark import busy_game, observation_planes
+
+
+def test_planes_match_planes_built_from_scratch():
+    snake_benchmark.check_observation()
+
+
+def test_plane_contents():
+    game = SnakeEngine(20, 40, 0)
+    game.generate_food()
+    game.place_bomb((3, 4), 30)
+    game.set_bonus_food((5, 6))
+    game.bonus_food_timer = 12
+    view = game.observe()
+    assert all(view[OBS_BODY, y, x] == 1.0 for y, x in game.snake)
+    head_y, head_x = game.snake[0]
+    assert view[OBS_HEAD, head_y, head_x] == 1.0
+    assert sum(view.tolist()[OBS_HEAD], []).count(1.0) == 1
+    assert view[OBS_FOOD, game.food[0], game.food[1]] == 1.0
+    assert view[OBS_BONUS, 5, 6] == 12.0
+    assert view[OBS_BOMB, 3, 4] == 30.0
+    game.move_snake()
+    # Countdowns tick down with the game
+    assert view[OBS_BONUS, 5, 6] == 11.0 and view[OBS_BOMB, 3, 4] == 29.0
+
+
+def test_planes_are_only_kept_once_asked_for():
+    game = busy_game(2, ticks=0)
+    assert game.observation is None
+    game.step()
+    view = game.observe()
+    assert game.observe().obj is view.obj  # Kept, not rebuilt
+    assert bytes(view) == observation_planes(game)
+
+
+def test_the_view_is_read_only():
+    view = busy_game(2, ticks=0).observe()
+    with pytest.raises(TypeError):
+        view[OBS_BODY, 1, 1] = 1.0
+
+
+def test_batch_slots():
+    games = [busy_game(seed, ticks=0) for seed in range(3)]
+    batch = ObservationBatch(games)
+    assert batch.view().shape == (3, OBS_CHANNELS, 20, 40)
+    old, new = games[1], busy_game(7, ticks=0)
+    batch.attach(1, new)
+    assert old.observation is None  # No longer writes into the slot
+    old.step()
+    new.step()
+    assert bytes(batch.view()) == b''.join(observation_planes(game)
+                                           for game in (games[0], new, games[2]))
+
+
+def test_batch_rejects_other_board_sizes():
+    batch = ObservationBatch([busy_game(0, ticks=0)])
+    with pytest.raises(ValueError, match='does not fit'):
+        batch.attach(0, SnakeEngine(10, 20, 0))
+
+
+def test_a_resized_game_leaves_the_batch():
+    games = [busy_game(seed, ticks=0) for seed in range(2)]
+    batch = ObservationBatch(games)
+    before = bytes(batch.view())
+    games[0].resize(18, 36)
+    games[0].step()
+    assert games[0].observe().shape == (OBS_CHANNELS, 18, 36)
+    assert bytes(games[0].observe()) == observation_planes(games[0])
+    assert bytes(batch.view()) == before
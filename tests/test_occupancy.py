@@ -0,0 +1,63 @@
+"""
+The occupancy grid: one byte of CELL_* flags per cell, kept in step with
+the snake, food, bonus food and bombs
+"""
+
+import random
+
+from snake_engine import (SnakeEngine, CELL_SNAKE, CELL_FOOD, CELL_BONUS, CELL_BOMB,
+                          DEATH_WALL, DEATH_SELF, DEATH_BOMB, RIGHT, DOWN, LEFT, UP)
+from snake_benchmark import busy_game, safe_action
+
+
+def expected_grid(game):
+    """The grid rebuilt from scratch from the game's pieces"""
+    grid = bytearray(game.height * game.width)
+    for y, x in game.snake:
+        grid[y * game.width + x] |= CELL_SNAKE
+    if game.food is not None:
+        grid[game.food[0] * game.width + game.food[1]] |= CELL_FOOD
+    if game.bonus_food is not None:
+        grid[game.bonus_food[0] * game.width + game.bonus_food[1]] |= CELL_BONUS
+    for y, x in game.bombs:
+        grid[y * game.width + x] |= CELL_BOMB
+    return grid
+
+
+def test_grid_follows_every_move():
+    for seed in range(5):
+        game = busy_game(seed, ticks=0)
+        rng = random.Random(seed)
+        while game.step(safe_action(game, rng)) and game.tick < 1000:
+            assert game.grid == expected_grid(game), f"seed {seed}, tick {game.tick}"
+
+
+def test_wall_collision():
+    game = SnakeEngine(20, 40, 0)
+    game.set_food((1, 1))  # Out of the way
+    while game.step():
+        pass
+    assert game.death == DEATH_WALL
+    assert game.snake[0] == (10, 38)  # The move into the wall is refused
+
+
+def test_self_collision():
+    game = SnakeEngine(20, 40, 0)
+    game.bomb_spawn_chance = game.bonus_spawn_chance = 0
+    for x in (19, 18, 17, 16):
+        game.snake.append((10, x))
+        game.occupy(10 * 40 + x, CELL_SNAKE)
+    game.set_food((1, 1))
+    for action in (DOWN, LEFT, UP):
+        game.step(action)
+    assert game.death == DEATH_SELF
+
+
+def test_bomb_collision():
+    game = SnakeEngine(20, 40, 0)
+    game.bomb_spawn_chance = game.bonus_spawn_chance = 0
+    game.set_food((1, 1))
+    game.place_bomb((10, 22), 50)
+    assert game.step(RIGHT)
+    assert not game.step()
+    assert game.death == DEATH_BOMB
@@ -0,0 +1,100 @@
+"""
+The frame profiler: rolling percentiles, missed deadlines and the metrics log
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import snake_profiler
+from snake_profiler import FrameProfiler, RollingStats
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_percentiles():
+    stats = RollingStats(size=100)
+    assert stats.percentiles(50, 99) == (0.0, 0.0)
+    for value in range(100):
+        stats.add(float(value))
+    assert stats.percentiles(0, 50, 95, 99) == (0.0, 50.0, 95.0, 99.0)
+
+
+def test_percentiles_cover_only_the_window():
+    stats = RollingStats(size=10)
+    for value in range(1000):
+        stats.add(float(value))
+    assert stats.percentiles(0, 100) == (990.0, 999.0)
+
+
+def play(profiler, clock, frames, tick_every=1, lateness=0.0):
+    """Run frames of 10 ms: 1 ms input, 2 ms tick, 3 ms drawing, then a wait"""
+    for frame in range(frames):
+        profiler.frame_start()
+        for section, cost in (('input', 0.001), ('tick', 0.002), ('draw', 0.003)):
+            clock.now += cost
+            profiler.lap(section)
+        profiler.ticked(1 if frame % tick_every == 0 else 0, lateness)
+        clock.now += 0.004
+        profiler.frame_end()
+
+
+def test_sections_and_tick_rate():
+    clock = Clock()
+    profiler = FrameProfiler(clock=clock)
+    play(profiler, clock, 150, tick_every=2)
+    for section, cost in (('input', 1), ('tick', 2), ('draw', 3), ('frame', 10)):
+        assert profiler.stats[section].percentiles(50)[0] == pytest.approx(cost / 1000)
+    assert len(profiler.snapshots) == 1
+    assert profiler.ticks_per_second == pytest.approx(50, rel=0.02)
+
+
+def test_missed_deadlines():
+    clock = Clock()
+    profiler = FrameProfiler(clock=clock)
+    profiler.ticked(1, FrameProfiler.LATE_TOLERANCE / 2)
+    assert profiler.missed == 0
+    profiler.ticked(1, FrameProfiler.LATE_TOLERANCE * 2)
+    assert profiler.missed == 1
+    profiler.ticked(3, 0.0)  # Two of them were played to catch up
+    assert profiler.missed == 3
+    profiler.ticked(0, 1.0)
+    assert profiler.missed == 3
+
+
+def test_metrics_log(tmp_path):
+    clock = Clock()
+    path = tmp_path / 'metrics.jsonl'
+    profiler = FrameProfiler(str(path), clock=clock)
+    play(profiler, clock, 350, lateness=0.005)
+    profiler.turned(0.02)
+    profiler.close()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record.get('summary') for record in records] == [None, None, None, True]
+    assert records[0]['draw']['p50_ms'] == pytest.approx(3.0)
+    assert records[0]['missed_deadlines'] == 100
+    assert records[-1]['total_ticks'] == 350
+    assert records[-1]['total_missed_deadlines'] == 350
+    assert records[-1]['turn_latency']['p99_ms'] == pytest.approx(20.0)
+
+
+def test_no_log_without_a_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    FrameProfiler().close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_does_not_need_curses():
+    code = ("import sys; sys.modules['curses'] = sys.modules['_curses'] = None; "
+            "import snake_profiler, snake_server")
+    subprocess.run([sys.executable, '-c', code], check=True,
+                   cwd=os.path.dirname(os.path.abspath(snake_profiler.__file__)))
@@ -0,0 +1,75 @@
+"""
+The incremental renderer: each frame rewrites only the cells that changed,
+and must leave the screen as a full repaint would
+"""
+
+import random
+
+import snake_game
+from snake_benchmark import FakeCurses, FakeWindow, safe_action
+
+BLANK = (' ', 0)
+
+
+def draw_without_terminal(monkeypatch):
+    """Swap curses for FakeCurses; games must be created before this"""
+    FakeCurses.windows = []
+    monkeypatch.setattr(snake_game, 'curses', FakeCurses)
+
+
+def busy_game(seed):
+    game = snake_game.SnakeGame(20, 40, seed=seed)
+    game.bomb_spawn_chance = 0.2
+    game.bonus_spawn_chance = 0.1
+    game.max_bombs = 10
+    game.generate_food()
+    return game
+
+
+def board(window, renderer):
+    """The viewport's cells, leaving out those covered by a two-column bomb"""
+    cells = {}
+    for y in range(renderer.view_height):
+        for x in range(renderer.view_width):
+            if window.cells.get((y, x - 1), BLANK)[0] != '💣':
+                cells[y, x] = window.cells.get((y, x), BLANK)
+    return cells
+
+
+def test_frames_match_full_repaints(monkeypatch):
+    for seed in range(3):
+        monkeypatch.undo()
+        game, repainted = busy_game(seed), busy_game(seed)
+        draw_without_terminal(monkeypatch)
+        screen, full_screen = FakeWindow(45, 120), FakeWindow(45, 120)
+        rng = random.Random(seed)
+        for frame in range(400):
+            action = safe_action(game, rng)
+            for each in (game, repainted):
+                each.step(action)
+                if frame % 100 == 99:
+                    each.paused = not each.paused  # Overlay on, then off again
+            game.draw(screen)
+            repainted.redraw_all()
+            repainted.draw(full_screen)
+            assert board(screen, game.renderer) == board(full_screen, repainted.renderer), \
+                f"seed {seed}, frame {frame}"
+            if game.game_over:
+                break
+
+
+def test_quiet_frames_write_little(monkeypatch):
+    game = busy_game(0)
+    game.bomb_spawn_chance = game.bonus_spawn_chance = 0
+    draw_without_terminal(monkeypatch)
+    screen = FakeWindow(45, 120)
+    game.draw(screen)
+    game.step()
+    game.draw(screen)  # The first frame after a repaint may rewrite panel values
+    writes = screen.writes
+    for _ in range(5):
+        game.step()
+        game.draw(screen)
+    # At most the new head, the old head and the freed tail; the panels
+    # have a window of their own
+    assert screen.writes - writes <= 5 * 3
@@ -0,0 +1,77 @@
+"""
+Seeded games and their compact binary recordings
+"""
+
+import random
+
+import pytest
+
+import snake_replay
+from snake_engine import SnakeEngine
+from snake_benchmark import safe_action
+
+
+def record(seed, ticks=2000, seen=None):
+    """Play a game with turns, speed changes and a resize; return the
+    finished engine and its recording. The state on every tick, after its
+    speed change or resize, is put in seen when given."""
+    game = SnakeEngine(20, 40, seed)
+    game.bomb_spawn_chance = game.bonus_spawn_chance = 0.05
+    game.generate_food()
+    recorder = snake_replay.Recorder(game)
+    rng = random.Random(seed)
+    while not game.game_over and game.tick < ticks:
+        if game.tick == 20:
+            game.set_speed_multiplier(1.5)
+            game.set_auto_speed(False)
+        if game.tick == 40:
+            game.resize(18, 44)
+        if seen is not None:
+            seen[game.tick] = state(game)
+        game.step(safe_action(game, rng))
+    return game, recorder.recording()
+
+
+def state(game):
+    return (game.tick, list(game.snake), game.food, game.bonus_food, list(game.bombs),
+            game.score, game.death, game.speed, (game.height, game.width), bytes(game.grid))
+
+
+def test_encode_decode_round_trip():
+    _, recording = record(0)
+    decoded = snake_replay.decode(snake_replay.encode(recording))
+    assert vars(decoded) == vars(recording)
+
+
+def test_playback_reproduces_the_game():
+    for seed in range(10):
+        game, recording = record(seed)
+        replayed = snake_replay.simulate(snake_replay.decode(snake_replay.encode(recording)))
+        assert state(replayed) == state(game), f"seed {seed}"
+        assert replayed.score == recording.score
+
+
+def test_playback_stops_part_way():
+    seen = {}
+    game, recording = record(1, seen=seen)
+    for tick in (0, 1, 20, 21, 40, 41, game.tick // 2, game.tick - 1):
+        assert state(snake_replay.simulate(recording, until=tick)) == seen[tick], f"tick {tick}"
+
+
+def test_recordings_are_small():
+    game, recording = record(2)
+    # A few bytes per input after the fixed header and rules
+    fixed = snake_replay.HEADER.size + snake_replay.CONFIG.size
+    assert len(snake_replay.encode(recording)) <= fixed + 4 * len(recording.inputs) + 8
+
+
+def test_save_and_load(tmp_path):
+    _, recording = record(3, ticks=200)
+    path = tmp_path / 'game.snkr'
+    snake_replay.save(recording, path)
+    assert vars(snake_replay.load(path)) == vars(recording)
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        snake_replay.decode(b'NOPE' + bytes(64))
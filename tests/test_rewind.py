@@ -0,0 +1,76 @@
+"""
+Rewinding a game through the keyframe ring buffer
+"""
+
+import random
+
+import snake_benchmark
+from snake_engine import SnakeEngine
+from snake_rewind import RewindBuffer
+from snake_benchmark import rewound_game, safe_action
+
+
+def test_rewound_games_match_what_was_played():
+    snake_benchmark.check_rewind()
+
+
+def test_nothing_to_rewind():
+    game = SnakeEngine(20, 40, 0)
+    rewind = RewindBuffer()
+    assert rewind.rewind(game, 1) is None  # No keyframes yet
+    rewind.record(game)
+    assert rewind.rewind(game, 1) is None  # The game does not log its inputs
+    assert not game.paused
+
+
+def test_rewind_pauses_and_goes_back_by_ticks():
+    game, rewind, _ = rewound_game(seed=2, ticks=300)
+    tick = game.tick
+    assert rewind.rewind(game, 1) == game.tick == tick - round(1 / game.speed)
+    assert game.paused
+
+
+def test_keyframes_cover_only_the_window():
+    game, rewind, _ = rewound_game(seed=2, ticks=600, seconds=5, interval=10)
+    # The clock is a running sum of tick lengths, so allow for rounding
+    assert rewind.clock - rewind.keyframes[0][0] <= 5 + rewind.spacing * game.speed + 1e-9
+    assert rewind.clock - rewind.keyframes[0][0] >= 5  # The whole window is kept
+    assert all(b[1].tick - a[1].tick == 10
+               for a, b in zip(rewind.keyframes, list(rewind.keyframes)[1:]))
+    # Going back further than the window stops at the oldest keyframe
+    oldest = rewind.oldest_tick
+    assert rewind.rewind(game, 1000) == oldest
+
+
+def test_keyframes_are_spread_to_fit_in_memory():
+    size = SnakeEngine(20, 40, 0).snapshot().nbytes()
+    game, rewind, _ = rewound_game(seed=2, ticks=600, max_bytes=size * 5)
+    assert rewind.spacing > rewind.interval
+    assert rewind.keyframe_bytes <= rewind.max_bytes
+    assert rewind.nbytes == rewind.keyframe_bytes + rewind.input_bytes
+
+
+def test_a_new_game_clears_the_buffer():
+    game, rewind, _ = rewound_game(seed=2, ticks=300)
+    other = SnakeEngine(20, 40, 3)
+    rewind.attach(other)
+    rewind.record(other)
+    assert len(rewind.keyframes) == 1 and rewind.seed == 3
+    assert rewind.rewind(game, 1) is None  # Keyframes of another game
+
+
+def test_play_carries_on_after_a_rewind():
+    game, rewind, _ = rewound_game(seed=2, ticks=300)
+    tick = rewind.rewind(game, 2)
+    assert all(entry[0] < tick for entry in game.inputs)
+    game.paused = False
+    rng = random.Random(7)
+    seen = {}
+    for _ in range(100):
+        seen[game.tick] = (list(game.snake), game.score)
+        rewind.record(game)
+        if not game.step(safe_action(game, rng)):
+            break
+    # The branch played after the rewind is what a second rewind goes back to
+    target = rewind.rewind(game, 1)
+    assert (list(game.snake), game.score) == seen[target]
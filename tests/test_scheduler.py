@@ -0,0 +1,75 @@
+"""
+The fixed-timestep scheduler driving the terminal game's main loop
+"""
+
+from snake_game import TickScheduler
+
+INTERVAL = 0.125  # Exact in binary, so deadlines add up without rounding
+LATE = 1 / 128
+
+
+class Clock:
+    """A clock the test moves by hand"""
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def started():
+    clock = Clock()
+    scheduler = TickScheduler(clock)
+    scheduler.start(INTERVAL)
+    return clock, scheduler
+
+
+def test_stopped_until_started():
+    clock = Clock()
+    scheduler = TickScheduler(clock)
+    assert scheduler.timeout_ms() == -1
+    assert scheduler.due_ticks(INTERVAL) == 0
+    scheduler.start(INTERVAL)
+    assert scheduler.timeout_ms() == 125
+    scheduler.stop()
+    assert scheduler.timeout_ms() == -1
+
+
+def test_start_keeps_a_running_deadline():
+    clock, scheduler = started()
+    clock.now += 0.0625
+    scheduler.start(INTERVAL)
+    assert scheduler.timeout_ms() == 62  # Rounded down; settle() sleeps the rest
+
+
+def test_deadlines_do_not_drift():
+    clock, scheduler = started()
+    # Wake up a little late every time; the ticks stay on the interval grid
+    for _ in range(100):
+        clock.now = scheduler.next_tick + LATE
+        assert scheduler.due_ticks(INTERVAL) == 1
+        assert scheduler.lateness == LATE
+    assert scheduler.next_tick == 100.0 + 101 * INTERVAL
+
+
+def test_late_ticks_catch_up():
+    clock, scheduler = started()
+    clock.now += 3.5 * INTERVAL
+    assert scheduler.due_ticks(INTERVAL) == 3
+    assert scheduler.lateness == 2.5 * INTERVAL
+    assert scheduler.next_tick == clock.now + 0.5 * INTERVAL
+
+
+def test_long_stalls_resync_instead_of_catching_up():
+    clock, scheduler = started()
+    clock.now += 60  # Suspended
+    assert scheduler.due_ticks(INTERVAL) == TickScheduler.MAX_CATCH_UP
+    assert scheduler.next_tick == clock.now + INTERVAL
+    assert scheduler.due_ticks(INTERVAL) == 0
+
+
+def test_interval_changes_apply_from_the_next_tick():
+    clock, scheduler = started()
+    clock.now += INTERVAL
+    assert scheduler.due_ticks(INTERVAL / 2) == 1
+    assert scheduler.next_tick == clock.now + INTERVAL / 2
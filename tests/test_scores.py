@@ -0,0 +1,79 @@
+"""
+The SQLite score store, its leaderboards and daily totals
+"""
+
+import time
+
+import snake_benchmark
+import snake_scores
+from snake_benchmark import busy_game, score_rows, wait_idle
+
+
+def test_saved_games_leaderboards_and_errors():
+    snake_benchmark.check_scores()
+
+
+def test_game_row():
+    game = busy_game(2, ticks=100)
+    game.set_speed_multiplier(1.5)
+    played_at = time.mktime((2026, 3, 4, 12, 0, 0, 0, 0, -1))
+    row = snake_scores.game_row(game, played_at)
+    assert row['day'] == '2026-03-04' and row['speed'] == 15
+    assert (row['score'], row['length'], row['ticks'], row['seed']) == (
+        game.score, len(game.snake), game.tick, 2)
+    assert snake_scores.speed_key(0.3) == 3
+
+
+def test_top_scores_are_per_board_and_speed(tmp_path):
+    db = snake_scores.connect(str(tmp_path / 'scores.db'))
+    rows = score_rows(500)
+    snake_scores.insert_games(db, rows)
+    for key in ((20, 40, 10), (15, 60, 5)):
+        expected = sorted((row['score'] for row in rows
+                           if (row['height'], row['width'], row['speed']) == key), reverse=True)
+        got = snake_scores.top_scores(db, *key, limit=8)
+        assert [score for score, *_ in got] == expected[:8]
+    db.close()
+
+
+def test_daily_totals(tmp_path):
+    db = snake_scores.connect(str(tmp_path / 'scores.db'))
+    rows = score_rows(6000)  # Games every 30 seconds, so two to three days
+    snake_scores.insert_games(db, rows)
+    days = sorted({row['day'] for row in rows})
+    totals = snake_scores.daily_totals(db, days[0])
+    assert [day for day, *_ in totals] == days
+    for day, games, mean, best, ticks in totals:
+        played = [row for row in rows if row['day'] == day]
+        assert games == len(played) and best == max(row['score'] for row in played)
+        assert abs(mean - sum(row['score'] for row in played) / games) < 1e-9
+        assert ticks == sum(row['ticks'] for row in played)
+    assert [day for day, *_ in snake_scores.daily_totals(db, days[1], days[1])] == days[1:2]
+    db.close()
+
+
+def test_leaderboard_cache_follows_saves(tmp_path):
+    store = snake_scores.ScoreStore(str(tmp_path / 'scores.db'))
+    store.leaderboard(20, 40, 1.0)
+    store.leaderboard(10, 20, 1.0)
+    wait_idle(store)
+    version = store.version
+    game = busy_game(2, ticks=300)
+    store.record(game)
+    wait_idle(store)
+    assert store.leaderboard(20, 40, 1.0)[0][0] == game.score
+    assert store.leaderboard(10, 20, 1.0) == ()
+    assert store.version == version + 1
+    store.close()
+
+
+def test_close_saves_what_is_queued(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    store = snake_scores.ScoreStore(path)
+    for row in score_rows(50):
+        store.save(row)
+    store.close()
+    assert not store.thread.is_alive() and store.saved == 50
+    db = snake_scores.connect(path)
+    assert db.execute("SELECT count(*) FROM games").fetchone() == (50,)
+    db.close()
@@ -0,0 +1,117 @@
+"""
+The game server: its wire format, sessions and timer loop
+"""
+
+import asyncio
+import tempfile
+
+import snake_benchmark
+import snake_server
+from snake_engine import SnakeEngine, DIRECTIONS
+
+
+def serve(test):
+    """Run test(server, path) against a server listening on a Unix socket"""
+    async def run(path):
+        server = snake_server.GameServer()
+        listener = await asyncio.start_unix_server(server.handle_client, path)
+        timer_loop = asyncio.ensure_future(server.run())
+        try:
+            return await test(server, path)
+        finally:
+            timer_loop.cancel()
+            listener.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        return asyncio.run(run(directory + '/snake.sock'))
+
+
+def test_remote_game_matches_a_local_one():
+    assert snake_benchmark.check_server() > 3
+
+
+def test_state_round_trip():
+    engine = SnakeEngine(20, 40, 3)
+    engine.generate_food()
+    engine.place_bomb((2, 3), 50)
+    engine.place_bomb((4, 5), 50)
+    engine.set_bonus_food((6, 7))
+    engine.bonus_food_timer = 40
+    state = snake_server.decode_state(snake_server.encode_state(engine))
+    head, tail = engine.snake[0], engine.snake[-1]
+    assert state['head'] == head[0] * 40 + head[1]
+    assert state['tail'] == tail[0] * 40 + tail[1]
+    assert state['food'] == engine.food[0] * 40 + engine.food[1]
+    assert state['bonus_food'] == 6 * 40 + 7 and state['bonus_food_timer'] == 40
+    assert state['bombs'] == [2 * 40 + 3, 4 * 40 + 5]
+    assert state['direction'] == DIRECTIONS.index(engine.direction)
+    assert not state['game_over'] and not state['paused']
+
+
+def test_board_size_is_clamped():
+    async def test(server, path):
+        client = await snake_server.Client.connect(path=path)
+        client.start(1, 5000, 1)
+        await client.state()
+        session, = server.sessions.values()
+        size = session.engine.height, session.engine.width
+        await client.close()
+        return size
+
+    assert serve(test) == (snake_server.MIN_BOARD[0], snake_server.MAX_BOARD[1])
+
+
+def test_sessions_are_listed_and_closed():
+    async def test(server, path):
+        first = await snake_server.Client.connect(path=path)
+        second = await snake_server.Client.connect(path=path)
+        for client in (first, second):
+            client.start(20, 40, 1)
+            await client.state()
+        listed = await first.sessions()
+        await second.close()
+        while len(server.sessions) > 1:
+            await asyncio.sleep(0.01)
+        remaining = await first.sessions()
+        await first.close()
+        return listed, remaining
+
+    listed, remaining = serve(test)
+    assert len(listed) == 2 and remaining == listed[:1]
+
+
+def test_unknown_messages_end_the_connection():
+    async def test(server, path):
+        client = await snake_server.Client.connect(path=path)
+        client.start(20, 40, 1)
+        await client.state()
+        client.writer.write(b'\x7f')
+        data = await client.reader.read()  # Any states sent before it, then EOF
+        await client.close()
+        return data, server.sessions
+
+    data, sessions = serve(test)
+    assert len(data) % snake_server.STATE.size == 0 and not sessions
+
+
+def test_bots_start_over_when_their_game_ends():
+    def straight_up(engine):
+        engine.speed = 0.002  # Get to the wall quickly
+        return DIRECTIONS.index((-1, 0))
+
+    async def test(server, path):
+        states = []
+        session = server.add_session(states.append, straight_up, seed=1, delay=0)
+        while session.generation < 3:
+            await asyncio.sleep(0.01)
+        return states, server
+
+    states, server = serve(test)
+    decoded = [snake_server.decode_state(data) for data in states]
+    assert sum(state['game_over'] for state in decoded) >= 2
+    # Each game over is followed by a fresh game from tick 0
+    for state, after in zip(decoded, decoded[1:]):
+        if state['game_over']:
+            assert after['tick'] == 0 and not after['game_over']
+    assert server.ticks == sum(state['tick'] > 0 for state in decoded)
+    assert server.jitter.count == server.ticks
@@ -0,0 +1,82 @@
+"""
+Engine snapshots, saved states and resizing a game in progress
+"""
+
+import random
+
+import pytest
+
+import snake_benchmark
+import snake_game
+from snake_engine import EngineState, CELL_SNAKE, CELL_FOOD, CELL_BONUS, CELL_BOMB
+from snake_benchmark import busy_game, safe_action
+
+
+def test_restored_games_play_on_identically():
+    snake_benchmark.check_snapshots()
+
+
+def test_snapshot_is_not_shared_with_the_game():
+    game = busy_game(2)
+    assert not game.game_over
+    state = game.snapshot()
+    before = (state.tick, list(state.snake), bytes(state.grid), dict(state.timers.expiry))
+    rng = random.Random(2)
+    for _ in range(50):
+        game.step(safe_action(game, rng))
+    assert (state.tick, list(state.snake), bytes(state.grid), dict(state.timers.expiry)) == before
+    game.restore(state)
+    game.step(safe_action(game, rng))
+    assert (state.tick, list(state.snake), bytes(state.grid)) == before[:3]
+
+
+def test_from_bytes_checks_the_header():
+    data = busy_game(0).snapshot().to_bytes()
+    with pytest.raises(ValueError):
+        EngineState.from_bytes(b'XXXX' + data[4:])
+
+
+def grid_matches(game):
+    flags = {}
+    for y, x in game.snake:
+        flags[y * game.width + x] = flags.get(y * game.width + x, 0) | CELL_SNAKE
+    for pos, flag in [(game.food, CELL_FOOD), (game.bonus_food, CELL_BONUS)] + \
+            [(pos, CELL_BOMB) for pos in game.bombs]:
+        if pos is not None:
+            flags[pos[0] * game.width + pos[1]] = flags.get(pos[0] * game.width + pos[1], 0) | flag
+    return all(game.grid[index] == flags.get(index, 0) for index in range(len(game.grid)))
+
+
+@pytest.mark.parametrize('height, width', [(30, 60), (20, 40), (12, 24), (10, 20)])
+def test_resize_keeps_the_game_going(height, width):
+    game = busy_game(5)
+    assert not game.game_over
+    score, tick, length = game.score, game.tick, len(game.snake)
+    game.resize(height, width)
+    assert (game.score, game.tick) == (score, tick)
+    assert 1 <= len(game.snake) <= length
+    assert all(0 < y < height - 1 and 0 < x < width - 1 for y, x in game.snake)
+    assert game.food is not None and grid_matches(game)
+    assert set(game.free.cells) == {index for index in range(height * width)
+                                    if not game.grid[index] and
+                                    0 < index // width < height - 1 and
+                                    0 < index % width < width - 1}
+    rng = random.Random(5)
+    for _ in range(200):
+        if not game.step(safe_action(game, rng)):
+            break
+        assert grid_matches(game)
+
+
+def test_resize_canvas_carries_on():
+    game = snake_game.SnakeGame(20, 40, 25, 60, seed=2)
+    game.generate_food()
+    rng = random.Random(2)
+    for _ in range(30):
+        game.step(safe_action(game, rng))
+    score, tick = game.score, game.tick
+    game.resize_canvas(3, 10)
+    assert (game.height, game.width, game.score, game.tick) == (23, 50, score, tick)
+    assert game.paused and not game.game_over
+    game.resize_canvas(10, 20)  # Capped at the maximum size
+    assert (game.height, game.width) == (25, 60)
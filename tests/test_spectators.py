@@ -0,0 +1,125 @@
+"""
+Spectators following a session from keyframes and delta frames
+"""
+
+import asyncio
+import tempfile
+
+import snake_benchmark
+import snake_server
+from snake_benchmark import NullWriter, spectated_session
+
+
+class SlowWriter(NullWriter):
+    """A NullWriter whose connection has `backlog` bytes waiting to be sent"""
+    def __init__(self):
+        super().__init__(keep=True)
+        self.backlog = 0
+
+    def get_write_buffer_size(self):
+        return self.backlog
+
+
+def frames(data):
+    """Decode every frame in data"""
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(bytes(data))
+        reader.feed_eof()
+        decoded = []
+        while not reader.at_eof():
+            decoded.append(await snake_server.read_frame(reader))
+        return decoded
+    return asyncio.run(read())
+
+
+def play(session, ticks):
+    server = snake_server.GameServer()
+    for _ in range(ticks):
+        server.tick(session)
+
+
+def test_mirrored_board_matches_every_tick():
+    assert snake_benchmark.check_spectators() > 100
+
+
+def test_everyone_is_sent_the_same_frames():
+    writers = [NullWriter(keep=True) for _ in range(3)]
+    play(spectated_session(writers), 150)
+    assert writers[0].data == writers[1].data == writers[2].data
+
+
+def test_keyframes_on_joining_and_periodically():
+    writer = NullWriter(keep=True)
+    play(spectated_session([writer]), 250)
+    sent = frames(writer.data)
+    assert len(sent) == 251
+    keyframes = [frame['tick'] for frame in sent if frame['keyframe']]
+    assert keyframes == [0, snake_server.KEYFRAME_TICKS, 2 * snake_server.KEYFRAME_TICKS]
+
+
+def test_a_spectator_that_falls_behind_skips_to_a_keyframe():
+    slow = SlowWriter()
+    session = spectated_session([slow])
+    spectator, = session.spectators
+    play(session, 10)
+    slow.backlog = snake_server.SPECTATOR_BUFFER + 1
+    play(session, 5)
+    assert spectator.skipped == 5 and not spectator.synced
+    slow.backlog = 0
+    play(session, 2)
+    sent = frames(slow.data)
+    assert [frame['tick'] for frame in sent][-3:] == [10, 16, 17]
+    assert sent[-2]['keyframe'] and not sent[-1]['keyframe']
+    assert spectator.synced
+
+
+def test_a_new_game_sends_a_keyframe():
+    writer = NullWriter(keep=True)
+    session = spectated_session([writer])
+    play(session, 20)
+    session.new_game(12, 24, 5)
+    play(session, 1)
+    last = frames(writer.data)[-1]
+    assert last['keyframe'] and (last['height'], last['width']) == (12, 24)
+
+
+def test_dirty_cells_are_tracked_only_while_watched():
+    session = spectated_session([])
+    assert session.engine.dirty is None
+    spectator = snake_server.Spectator(NullWriter())
+    session.watch(spectator)
+    assert session.engine.dirty == set()
+    play(session, 3)
+    assert session.engine.dirty == set()  # Cleared by every broadcast
+    session.unwatch(spectator)
+    assert session.engine.dirty is None
+
+
+def test_watch_over_a_socket():
+    async def run(path):
+        server = snake_server.GameServer()
+        listener = await asyncio.start_unix_server(server.handle_client, path)
+        timer_loop = asyncio.ensure_future(server.run())
+        player = await snake_server.Client.connect(path=path)
+        player.start(20, 40, 1)
+        await player.state()
+        viewer = await snake_server.Client.connect(path=path)
+        viewer.watch()
+        mirror = snake_server.BoardMirror()
+        mirror.apply(await viewer.frame())
+        while mirror.frame['tick'] < 3:
+            mirror.apply(await viewer.frame())
+        session, = server.sessions.values()
+        # The game may have moved on while the frame was read
+        board = bytes(session.engine.grid) if session.engine.tick == 3 else None
+        await viewer.close()
+        await player.close()
+        timer_loop.cancel()
+        listener.close()
+        return mirror, board
+
+    with tempfile.TemporaryDirectory() as directory:
+        mirror, board = asyncio.run(run(directory + '/snake.sock'))
+    assert (mirror.height, mirror.width) == (20, 40)
+    assert board is None or bytes(mirror.grid) == board
@@ -0,0 +1,88 @@
+"""
+The timer wheel behind bombs, bonus food and spawn cooldowns
+"""
+
+import random
+
+from snake_engine import TimerWheel, SnakeEngine, BONUS_TIMER, BOMB_COOLDOWN
+from snake_benchmark import make_game_on_cycle, cycle_actions
+
+
+def test_keys_expire_on_their_tick_in_schedule_order():
+    timers = TimerWheel()
+    timers.schedule('b', 3)
+    timers.schedule('a', 3)
+    timers.schedule('c', 5)
+    assert [timers.advance(tick) for tick in range(1, 6)] == [[], [], ['b', 'a'], [], ['c']]
+    assert timers.now == 5 and 'c' not in timers
+
+
+def test_reschedule_and_cancel():
+    timers = TimerWheel()
+    timers.schedule('a', 2)
+    timers.schedule('b', 2)
+    timers.schedule('a', 4)  # The old entry for tick 2 is skipped
+    timers.cancel('b')
+    assert timers.advance(1) == [] and timers.advance(2) == []
+    assert timers.get('a') == 4 and timers.due_within(2) == ['a']
+    assert timers.advance(3) == [] and timers.advance(4) == ['a']
+
+
+def test_matches_a_dict_of_countdowns():
+    rng = random.Random(0)
+    timers, model = TimerWheel(), {}
+    for tick in range(1, 2000):
+        for _ in range(rng.randrange(3)):
+            key = rng.randrange(50)
+            if rng.random() < 0.2:
+                timers.cancel(key)
+                model.pop(key, None)
+            else:
+                expiry = tick + rng.randrange(1, 30)
+                timers.schedule(key, expiry)
+                model[key] = expiry
+        due = timers.advance(tick)
+        assert sorted(due) == sorted(key for key, expiry in model.items() if expiry == tick)
+        model = {key: expiry for key, expiry in model.items() if expiry != tick}
+        assert timers.expiry == model
+
+
+def test_copy_is_independent():
+    timers = TimerWheel()
+    timers.schedule('a', 2)
+    copy = timers.copy()
+    timers.cancel('a')
+    assert copy.advance(1) == [] and copy.advance(2) == ['a']
+
+
+def test_item_durations_count_the_moves_they_stay():
+    game, cycle = make_game_on_cycle(1)
+    game.set_food((1, 1))
+    game.place_bomb((15, 30), 5)
+    game.set_bonus_food((16, 30))
+    game.bonus_food_timer = 3
+    assert game.bomb_timer((15, 30)) == 5 and game.bonus_food_timer == 3
+    present = []
+    for action in cycle_actions(cycle, 0, 6):
+        game.step(action)
+        present.append((bool(game.bombs), game.bonus_food is not None))
+    assert present == [(True, True), (True, True), (True, False), (True, False),
+                       (False, False), (False, False)]
+
+
+def test_cooldowns():
+    game = SnakeEngine(20, 40, 0)
+    game.set_food((1, 1))
+    game.bomb_spawn_chance = 1.0
+    game.bonus_spawn_chance = 0.0
+    game.bomb_cooldown_time = 4
+    ticks = []
+    for _ in range(12):
+        before = len(game.bombs)
+        game.step()
+        if len(game.bombs) > before:
+            ticks.append(game.tick)
+        if game.tick == 1:
+            assert game.bomb_cooldown == 4 and game.timers.get(BOMB_COOLDOWN) == 5
+    assert ticks == [1, 5, 9]
+    assert BONUS_TIMER not in game.timers
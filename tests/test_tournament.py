@@ -0,0 +1,91 @@
+"""
+Tournaments: policies, single games, resuming and summaries
+"""
+
+import argparse
+import json
+
+import pytest
+
+import snake_benchmark
+import snake_tournament
+from snake_engine import SnakeEngine, DIRECTIONS
+
+
+def test_resumed_tournament_matches_one_played_through():
+    snake_benchmark.check_tournament()
+
+
+def test_parse_params():
+    assert snake_tournament.parse_params('') == {}
+    assert snake_tournament.parse_params('max_bombs=5, bomb_spawn_chance=0.5') == {
+        'max_bombs': 5, 'bomb_spawn_chance': 0.5}
+
+
+def test_seed_range():
+    assert snake_tournament.seed_range('100') == range(100)
+    assert snake_tournament.seed_range('5:10') == range(5, 10)
+    with pytest.raises(argparse.ArgumentTypeError):
+        snake_tournament.seed_range('five')
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError, match='unknown policy'):
+        snake_tournament.make_policy('nope', 0)
+
+
+def test_safe_actions_avoid_walls_and_bombs():
+    engine = SnakeEngine(20, 40, 0)
+    y, x = engine.snake[0]
+    engine.place_bomb((y - 1, x), 50)
+    safe = snake_tournament.safe_actions(engine)
+    assert DIRECTIONS.index((-1, 0)) not in safe
+    assert DIRECTIONS.index((-engine.direction[0], -engine.direction[1])) not in safe
+    engine.snake.clear()
+    engine.snake.appendleft((1, 1))
+    assert not {DIRECTIONS.index((-1, 0)), DIRECTIONS.index((0, -1))} & set(
+        snake_tournament.safe_actions(engine))
+
+
+def test_games_are_reproducible_and_configurable():
+    first = snake_tournament.play('greedy', 'max_bombs=0', 3, 20, 40, 500)
+    assert first == snake_tournament.play('greedy', 'max_bombs=0', 3, 20, 40, 500)
+    assert first['death'] != 'bomb' and first['ticks'] <= 500
+    # Different seeds play different games
+    assert snake_tournament.play('random', '', 4, 20, 40, 500) != \
+        snake_tournament.play('random', '', 5, 20, 40, 500)
+
+
+def test_completed_drops_a_cut_line(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    assert snake_tournament.completed(str(path)) == set()
+    line = json.dumps({'policy': 'greedy', 'config': '', 'seed': 1}) + '\n'
+    path.write_text(line + line[:10])
+    assert snake_tournament.completed(str(path)) == {('greedy', '', 1)}
+    assert path.read_text() == line
+
+
+def test_summarize(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    results = [
+        {'policy': 'greedy', 'config': '', 'seed': 0, 'score': 30, 'ticks': 100,
+         'death': 'wall', 'won': False},
+        {'policy': 'greedy', 'config': '', 'seed': 1, 'score': 10, 'ticks': 300,
+         'death': None, 'won': False},
+        {'policy': 'random', 'config': '', 'seed': 0, 'score': 0, 'ticks': 5,
+         'death': 'bomb', 'won': False},
+    ]
+    path.write_text(''.join(json.dumps(result) + '\n' for result in results))
+    groups = snake_tournament.summarize(str(path))
+    greedy = groups['greedy', '']
+    assert (greedy['games'], greedy['score'], greedy['ticks']) == (2, 40, 400)
+    assert (greedy['wall'], greedy['limit'], greedy['bomb']) == (1, 1, 0)
+    assert groups['random', '']['bomb'] == 1
+
+
+def test_progress_is_reported(tmp_path):
+    calls = []
+    played = snake_tournament.run_tournament(
+        ['random'], [''], range(6), str(tmp_path / 'results.jsonl'), workers=1, chunk=4,
+        max_ticks=200, progress=lambda done, total: calls.append((done, total)))
+    assert played == 6 and calls == [(4, 6), (6, 6)]
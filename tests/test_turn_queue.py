@@ -0,0 +1,67 @@
+"""
+Queued turns: one per move, checked against the direction they will meet
+"""
+
+import curses
+
+import snake_benchmark
+import snake_game
+from snake_engine import SnakeEngine, TurnQueue, DIRECTIONS, UP, RIGHT, DOWN, LEFT
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_quick_turns_land_on_consecutive_moves():
+    snake_benchmark.check_turn_queue()
+
+
+def test_turns_are_checked_against_the_last_one_queued():
+    turns = TurnQueue()
+    turns.push(UP, DIRECTIONS[RIGHT])
+    turns.push(DOWN, DIRECTIONS[RIGHT])  # Reverses the queued UP
+    turns.push(UP, DIRECTIONS[RIGHT])  # Repeats it
+    turns.push(LEFT, DIRECTIONS[RIGHT])  # A corner after UP
+    assert [action for action, _ in turns.turns] == [UP, LEFT]
+    assert turns.dropped == 0  # Only a full queue counts as dropping
+
+
+def test_full_queue_drops_turns():
+    turns = TurnQueue()
+    for action in (UP, LEFT, DOWN, RIGHT, LEFT):
+        turns.push(action, DIRECTIONS[RIGHT])
+    assert len(turns) == TurnQueue.MAX_TURNS and turns.dropped == 2
+
+
+def test_waits_are_timed_by_the_clock():
+    clock = Clock()
+    turns = TurnQueue(clock)
+    turns.push(UP, DIRECTIONS[RIGHT])
+    clock.now = 0.25
+    turns.push(LEFT, DIRECTIONS[RIGHT])
+    clock.now = 0.5
+    game = SnakeEngine(20, 40, 0)
+    assert turns.apply(game) == 0.5 and game.direction == DIRECTIONS[UP]
+    assert turns.pop() == (LEFT, 0.25)
+    assert turns.pop() is None and turns.apply(game) is None
+
+
+def test_arrow_keys_are_queued_and_cleared_with_the_game():
+    game = snake_game.SnakeGame(20, 40, 25, 60, seed=0)
+    game.generate_food()
+    game.change_direction(curses.KEY_UP)
+    game.change_direction(curses.KEY_LEFT)
+    game.change_direction(ord('x'))  # Not an arrow key
+    assert [action for action, _ in game.turns.turns] == [UP, LEFT]
+    assert game.direction == DIRECTIONS[RIGHT]  # Nothing turns before a move
+    state = game.snapshot()
+    game.restore(state)
+    assert not game.turns
+    game.change_direction(curses.KEY_DOWN)
+    game.reset()
+    assert not game.turns
@@ -0,0 +1,57 @@
+"""
+The NumPy vector engine: the same rules as SnakeEngine, many games at once
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import snake_benchmark
+from snake_engine import SnakeEngine, CELL_SNAKE, CELL_FOOD
+from snake_vector import VectorSnakeEngine
+
+
+def test_matches_the_engine_move_for_move():
+    snake_benchmark.check_vector_parity()
+
+
+def test_timers_and_early_removal_match_the_engine():
+    snake_benchmark.check_vector_timers()
+
+
+def test_rules_are_the_engines_defaults():
+    vec = VectorSnakeEngine(2)
+    for name in ('max_bombs', 'bomb_spawn_chance', 'bomb_min_duration', 'bomb_max_duration',
+                 'bomb_cooldown_time', 'bonus_food_min_duration', 'bonus_food_max_duration',
+                 'bonus_spawn_chance', 'bonus_cooldown_time', 'early_removal_chance'):
+        assert getattr(vec, name) == getattr(SnakeEngine(), name), name
+
+
+def test_grid_holds_each_snake_and_its_food():
+    vec = VectorSnakeEngine(16, seed=0)
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        vec.step(rng.integers(-1, 4, vec.num_envs))
+        for env in range(vec.num_envs):
+            snake = {y * vec.width + x for y, x in vec.snake_cells(env)}
+            assert set(np.flatnonzero(vec.grid[env] & CELL_SNAKE)) == snake
+            assert set(np.flatnonzero(vec.grid[env] & CELL_FOOD)) == {vec.food[env]}
+
+
+def test_finished_games_are_reset():
+    vec = VectorSnakeEngine(3, seed=0)
+    keep_going = np.full(3, -1)
+    for tick in range(1, 40):
+        rewards, dones = vec.step(keep_going)
+        if dones.any():
+            break
+    # Running straight from the middle of the board hits the right wall
+    assert tick == SnakeEngine().width // 2 - 1
+    assert dones.all()
+    assert (vec.length == 1).all() and (vec.score == 0).all()
+    assert (vec.last_length >= 1).all()
+
+    manual = VectorSnakeEngine(1, seed=0, auto_reset=False)
+    for _ in range(tick):
+        manual.step(np.full(1, -1))
+    assert manual.game_over[0]